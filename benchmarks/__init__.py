@@ -0,0 +1,4 @@
+"""Benchmarks for the Universal Asset Browser.
+
+Run a benchmark with `python -m benchmarks.<name>` from the repository root.
+"""
@@ -0,0 +1,21 @@
+"""Helpers shared by the benchmarks."""
+
+import json
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def write_results(results, output: str | None = None) -> None:
+    """Print results as JSON and optionally write them to `output`."""
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,123 @@
+"""Search latency while a bulk import is committing.
+
+Seeds a throwaway catalog, then runs a writer thread that inserts assets with
+one commit per asset (what a directory import does through the API) while a
+set of reader threads keep running name searches. Reports reader latency for
+SQLite's default settings and for the tuned pragmas in `database.py`.
+
+    python -m benchmarks.db_concurrency --seed 20000 --imports 2000 --readers 4
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from uab.backend.app.data_access import database, models
+
+from benchmarks.common import percentile, write_results
+
+
+def _seed(session_factory, count: int) -> None:
+    with session_factory() as db:
+        db.bulk_save_objects([
+            models.Asset(name=f"seed_{i:07d}.hdr", directory_path=f"/seed/{i}.hdr", type="asset")
+            for i in range(count)
+        ])
+        db.commit()
+
+
+def run_case(label: str, pragmas: dict, seed: int, imports: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        engine = database.create_sqlite_engine(
+            db_path, pragmas=pragmas, pool_size=readers + 1)
+        database.Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autoflush=False, bind=engine)
+        _seed(session_factory, seed)
+
+        stop = threading.Event()
+        latencies: list[float] = []
+        errors: list[str] = []
+        lock = threading.Lock()
+
+        def _writer():
+            try:
+                for i in range(imports):
+                    with session_factory() as db:
+                        db.add(models.Asset(
+                            name=f"import_{i:07d}.hdr", directory_path=f"/import/{i}.hdr", type="asset"))
+                        db.commit()
+            except Exception as e:
+                errors.append(f"writer: {e}")
+            finally:
+                stop.set()
+
+        def _reader(worker: int):
+            i = 0
+            while not stop.is_set():
+                term = f"_{(worker * 7919 + i) % 1000:03d}"
+                start = time.perf_counter()
+                try:
+                    with session_factory() as db:
+                        db.query(models.Asset).filter(
+                            models.Asset.name.ilike(f"%{term}%")).limit(200).all()
+                except Exception as e:
+                    errors.append(f"reader: {e}")
+                    continue
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                i += 1
+
+        threads = [threading.Thread(target=_reader, args=(n,)) for n in range(readers)]
+        writer = threading.Thread(target=_writer)
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        writer.start()
+        writer.join()
+        import_seconds = time.perf_counter() - start
+        for t in threads:
+            t.join()
+        engine.dispose()
+
+    return {
+        "case": label,
+        "pragmas": pragmas,
+        "import_seconds": round(import_seconds, 3),
+        "imports_per_second": round(imports / import_seconds, 1) if import_seconds else None,
+        "searches": len(latencies),
+        "search_ms_p50": round(percentile(latencies, 50), 3),
+        "search_ms_p99": round(percentile(latencies, 99), 3),
+        "search_ms_max": round(max(latencies, default=0.0), 3),
+        "search_ms_mean": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "errors": errors[:10],
+    }
+
+
+def main(argv: list[str] | None = None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=20000, help="rows present before the import")
+    parser.add_argument("--imports", type=int, default=2000, help="rows inserted one commit at a time")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent search threads")
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    cases = [
+        ("sqlite-defaults", {"journal_mode": "DELETE", "synchronous": "FULL"}),
+        ("tuned", database.SQLITE_PRAGMAS),
+    ]
+    results = [run_case(label, pragmas, args.seed, args.imports, args.readers)
+               for label, pragmas in cases]
+
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Throughput and latency of the sync and async API modes under load.
+
+For each mode a local uvicorn server is started on a seeded throwaway
+catalog, then 1, 16 and 128 concurrent clients issue a mix of search, paged
+list and get-by-id requests for a fixed duration.
+
+    python -m benchmarks.load_test --seed 20000 --duration 10
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from benchmarks.common import percentile, write_results
+
+MODES = ("sync", "async")
+CONCURRENCY = (1, 16, 128)
+
+
+def _seed_catalog(db_path: str, count: int) -> None:
+    # Imported here so the parent process never opens the default catalog.
+    from sqlalchemy.orm import sessionmaker
+    from uab.backend.app.data_access import database, models
+
+    engine = database.create_sqlite_engine(db_path)
+    database.Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        db.bulk_save_objects([
+            models.Asset(name=f"env_{i:07d}.hdr", directory_path=f"/library/{i}.hdr", type="asset")
+            for i in range(count)
+        ])
+        db.commit()
+    engine.dispose()
+
+
+def _start_server(mode: str, port: int, env: dict) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "uab.backend.server:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env={**env, "UAB_API_MODE": mode},
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(url + "/assets/count", timeout=1).raise_for_status()
+            return process
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{mode} server failed to start")
+
+
+def _run_clients(url: str, clients: int, duration: float, seed: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def _client(n: int):
+        nonlocal errors
+        rng = random.Random(n)
+        session = requests.Session()
+        local: list[float] = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            roll = rng.random()
+            if roll < 0.6:
+                path = f"/assets/search?name={rng.randrange(1000):03d}&limit=100"
+            elif roll < 0.8:
+                path = f"/assets/?skip={rng.randrange(seed)}&limit=50"
+            else:
+                path = f"/assets/{rng.randrange(1, seed + 1)}"
+            start = time.perf_counter()
+            try:
+                session.get(url + path, timeout=60).raise_for_status()
+                local.append((time.perf_counter() - start) * 1000)
+            except requests.exceptions.RequestException:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    threads = [threading.Thread(target=_client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms_p50": round(percentile(latencies, 50), 2),
+        "latency_ms_p99": round(percentile(latencies, 99), 2),
+    }
+
+
+def main(argv: list[str] | None = None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=20000, help="assets in the catalog")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per measurement")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--clients", nargs="+", type=int, default=list(CONCURRENCY))
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load.db")
+        _seed_catalog(db_path, args.seed)
+        env = {**os.environ, "UAB_HOME": tmp, "UAB_DB_PATH": db_path}
+        for mode in args.modes:
+            server = _start_server(mode, args.port, env)
+            try:
+                for clients in args.clients:
+                    result = _run_clients(
+                        f"http://127.0.0.1:{args.port}", clients, args.duration, args.seed)
+                    result["mode"] = mode
+                    print(json.dumps(result), file=sys.stderr)
+                    results.append(result)
+            finally:
+                server.terminate()
+                server.wait()
+
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Startup cost: import time breakdown and time to first GUI.
+
+Uses `python -X importtime` in fresh interpreters to break down what
+importing the entry points costs, then times a full offscreen startup: from
+interpreter start to the MainWidget being built, and to the background
+server being ready.
+
+    python -m benchmarks.startup --top 15
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import write_results
+
+MODULES = ("uab.runner", "uab.frontend.main_widget", "uab.backend.server")
+
+# Runs in a fresh interpreter; prints one JSON line with the timings.
+_STARTUP_SCRIPT = """
+import time
+t0 = time.perf_counter()
+import json, sys, threading
+from uab import runner
+t_import = time.perf_counter()
+server = runner.BackgroundServer(port={port})
+threading.Thread(target=server.run, daemon=True).start()
+from PySide6.QtWidgets import QApplication
+from uab.frontend.main_widget import MainWidget
+app = QApplication(sys.argv)
+widget = MainWidget("desktop", server=server)
+widget.show()
+app.processEvents()
+t_gui = time.perf_counter()
+server.ready.wait(60)
+t_ready = time.perf_counter()
+server.stop()
+print(json.dumps({{
+    "import_runner_ms": round((t_import - t0) * 1000, 1),
+    "gui_shown_ms": round((t_gui - t0) * 1000, 1),
+    "server_ready_ms": round((t_ready - t0) * 1000, 1),
+    "server_failed": server.failed,
+}}))
+"""
+
+
+def import_times(module: str, env: dict, top: int) -> dict:
+    """Parse `-X importtime` output for `import module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    total = next((cum for name, _, cum in entries if name == module), None)
+    by_self = sorted(entries, key=lambda e: e[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(total / 1000, 1) if total is not None else None,
+        "modules_imported": len(entries),
+        "top_self_ms": {name: round(self_us / 1000, 1) for name, self_us, _ in by_self},
+    }
+
+
+def startup_times(env: dict, port: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SCRIPT.format(port=port)],
+        env=env, capture_output=True, text=True)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"Startup script failed:\n{result.stderr}")
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "UAB_HOME": tmp,
+            "UAB_DB_PATH": os.path.join(tmp, "startup.db"),
+            "QT_QPA_PLATFORM": os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+        }
+        results = {
+            "imports": [import_times(module, env, args.top) for module in MODULES],
+            "startup": [startup_times(env, args.port) for _ in range(args.repeats)],
+        }
+
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
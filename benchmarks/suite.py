@@ -0,0 +1,243 @@
+"""End-to-end benchmark suite over a synthetic library.
+
+Runs the real pipelines against a throwaway catalog and an in-process server:
+
+- directory import through `Presenter.on_import_asset`,
+- catalog load (`AssetService.get_assets` and `iter_assets`),
+- search latency,
+- preview generation throughput for small and large maps,
+- offscreen `Browser` grid build, reflow and zoom.
+
+Results (with the package version, git commit and parameters) are written as
+JSON so runs can be compared between releases.
+
+    python -m benchmarks.suite --small 1000 --large 10 --output results.json
+"""
+
+import argparse
+import datetime
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.common import percentile, write_results
+from benchmarks.synthetic import generate_library, scan_library
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _version() -> str | None:
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version("uab")
+    except PackageNotFoundError:
+        return None
+
+
+def _start_server(port: int):
+    import uvicorn
+    from uab.backend.server import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+def bench_import(widget, manifest: dict) -> dict:
+    presenter = widget.presenter
+    start = time.perf_counter()
+    for directory in manifest["directories"]:
+        presenter.on_import_asset(directory)
+    elapsed = time.perf_counter() - start
+    count = len(manifest["files"])
+    return {
+        "directories": len(manifest["directories"]),
+        "assets": count,
+        "seconds": round(elapsed, 3),
+        "assets_per_second": round(count / elapsed, 1),
+    }
+
+
+def bench_catalog_load(service, repeats: int) -> dict:
+    loads, streams = [], []
+    count = 0
+    for _ in range(repeats):
+        assets, elapsed = _timed(service.get_assets)
+        count = len(assets or [])
+        loads.append(elapsed * 1000)
+        _, elapsed = _timed(lambda: sum(1 for _ in service.iter_assets()))
+        streams.append(elapsed * 1000)
+    return {
+        "assets": count,
+        "get_assets_ms_p50": round(percentile(loads, 50), 2),
+        "iter_assets_ms_p50": round(percentile(streams, 50), 2),
+    }
+
+
+def bench_search(service, queries: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(queries):
+        term = rng.choice(["env_", "large", f"{rng.randrange(1000):03d}", f"{rng.randrange(10)}"])
+        _, elapsed = _timed(service.search_assets, term)
+        latencies.append(elapsed * 1000)
+    return {
+        "queries": queries,
+        "ms_p50": round(percentile(latencies, 50), 2),
+        "ms_p99": round(percentile(latencies, 99), 2),
+    }
+
+
+def bench_previews(manifest: dict, samples: int, seed: int) -> dict:
+    from uab.core import utils
+
+    rng = random.Random(seed)
+    results = {}
+    for label, large in (("small", False), ("large", True)):
+        files = [f for f in manifest["files"] if f["large"] == large]
+        files = rng.sample(files, min(samples, len(files)))
+        if not files:
+            continue
+        start = time.perf_counter()
+        for f in files:
+            utils.hdr_to_preview(f["path"], as_bytes=True)
+        elapsed = time.perf_counter() - start
+        results[label] = {
+            "images": len(files),
+            "images_per_second": round(len(files) / elapsed, 2),
+            "source_mb_per_second": round(sum(f["bytes"] for f in files) / elapsed / 1e6, 2),
+        }
+    return results
+
+
+def bench_grid(qapp, widget, widths: list[int]) -> dict:
+    presenter = widget.presenter
+    browser = widget.browser
+
+    assets = presenter.asset_service.get_assets() or []
+    _, build_s = _timed(widget.draw_assets, assets)
+    qapp.processEvents()
+    cells = len(browser._cells)
+
+    reflows = []
+    for width in widths:
+        browser.resize(width, 800)
+        qapp.processEvents()
+        _, elapsed = _timed(browser._reflow_grid)
+        reflows.append(elapsed * 1000)
+
+    zooms = []
+    for scale in (0.5, 0.8, 1.2, 1.6, 2.0, 1.0):
+        browser._scale_factor = scale
+        _, elapsed = _timed(browser._reflow_grid)
+        zooms.append(elapsed * 1000)
+
+    return {
+        "assets": len(assets),
+        "cells": cells,
+        "grid_build_ms": round(build_s * 1000, 2),
+        "reflow_ms_p50": round(percentile(reflows, 50), 2),
+        "reflow_ms_max": round(max(reflows, default=0.0), 2),
+        "zoom_reflow_ms_p50": round(percentile(zooms, 50), 2),
+        "zoom_reflow_ms_max": round(max(zooms, default=0.0), 2),
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--library", help="existing library to import instead of generating a temporary one; left unchanged")
+    parser.add_argument("--small", type=int, default=500)
+    parser.add_argument("--large", type=int, default=5)
+    parser.add_argument("--large-width", type=int, default=4096)
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--preview-samples", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Everything the suite writes goes to the temporary directory. This
+        # has to happen before any uab module reads its settings.
+        os.environ["UAB_HOME"] = tmp
+        os.environ["UAB_DB_PATH"] = os.path.join(tmp, "bench.db")
+        os.environ["UAB_LIBRARIES_CONFIG"] = os.path.join(tmp, "libraries.json")
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+        if args.library:
+            # Only read: a real library must not get synthetic files
+            manifest, generate_s = _timed(scan_library, args.library)
+        else:
+            manifest, generate_s = _timed(
+                generate_library, os.path.join(tmp, "library"), args.small, args.large,
+                large_size=(args.large_width, args.large_width // 2), seed=args.seed)
+
+        from PySide6.QtWidgets import QApplication
+        from uab.core import tracing
+        from uab.frontend.main_widget import MainWidget
+
+        # The presenter talks to the server on port 8000.
+        server, thread = _start_server(8000)
+        qapp = QApplication.instance() or QApplication(sys.argv)
+        tracing.enable()
+        try:
+            widget = MainWidget("desktop")
+            widget.resize(1200, 800)
+            widget.show()
+            service = widget.presenter.asset_service
+
+            results = {
+                "meta": {
+                    "uab_version": _version(),
+                    "git_commit": _git_commit(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "params": vars(args),
+                },
+                "library": {
+                    "files": len(manifest["files"]),
+                    "directories": len(manifest["directories"]),
+                    "total_mb": round(manifest["total_bytes"] / 1e6, 2),
+                    "generated": not args.library,
+                    "generate_seconds": round(generate_s, 2),
+                },
+                "import": bench_import(widget, manifest),
+                "catalog_load": bench_catalog_load(service, repeats=5),
+                "search": bench_search(service, args.searches, args.seed),
+                "previews": bench_previews(manifest, args.preview_samples, args.seed),
+                "grid": bench_grid(qapp, widget, [600, 900, 1200, 1600, 2400]),
+                "trace": tracing.summary(),
+            }
+        finally:
+            server.should_exit = True
+            thread.join(timeout=5)
+
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
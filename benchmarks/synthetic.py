@@ -0,0 +1,161 @@
+"""Synthetic HDRI library generator.
+
+Writes Radiance `.hdr` environment maps into a nested directory tree, each
+with a sidecar `<name>.yaml` following `backend/meta/meta_template.yaml`.
+Images are cheap procedural skies (gradient, sun, ground) so they have
+realistic dynamic range and colour variety without shipping real HDRIs.
+
+    python -m benchmarks.synthetic /tmp/uab_library --small 2000 --large 20
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+PROJECTS = ("forest", "desert", "city", "studio", "coast", "mountain")
+CATEGORIES = ("day", "sunset", "overcast", "night", "interior")
+TAGS = ("outdoor", "indoor", "sun", "clouds", "warm", "cold", "urban", "nature", "hdri")
+# Files at least this big count as large maps in a scanned library
+LARGE_FILE_BYTES = 8 * 1024 * 1024
+
+
+def render_sky(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """Procedural equirectangular sky as float32 BGR."""
+    v = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    u = np.linspace(0.0, 1.0, width, dtype=np.float32)[None, :]
+    zenith = rng.uniform(0.1, 1.5, 3).astype(np.float32)
+    horizon = rng.uniform(0.5, 3.0, 3).astype(np.float32)
+    ground = rng.uniform(0.02, 0.4, 3).astype(np.float32)
+
+    sky = (1 - v[..., None] * 2).clip(0, 1)
+    image = zenith * sky + horizon * (1 - sky)
+    image = np.where(v[..., None] > 0.5, ground * (1.0 - (v[..., None] - 0.5)), image)
+
+    # Sun: a small, very bright disc somewhere above the horizon.
+    sun_u, sun_v = rng.uniform(0, 1), rng.uniform(0.05, 0.45)
+    dist2 = (u - sun_u) ** 2 * 4 + (v - sun_v) ** 2
+    sun = np.exp(-dist2 / rng.uniform(1e-5, 1e-4)) * rng.uniform(50, 5000)
+    image = image + sun[..., None].astype(np.float32)
+    image *= rng.uniform(0.05, 4.0)
+    return np.ascontiguousarray(image.astype(np.float32))
+
+
+def write_sidecar(path: Path, name: str, rng: random.Random) -> None:
+    today = datetime.date.today().isoformat()
+    tags = "\n".join(f"  - {tag}" for tag in rng.sample(TAGS, rng.randint(1, 4)))
+    path.write_text(
+        f"name: {name}\n"
+        f"description: Synthetic environment {name}\n"
+        f"tags:\n{tags}\n"
+        f"author: benchmark\n"
+        f"date_created: {today}\n"
+        f"date_added: {today}\n"
+    )
+
+
+def generate_library(
+    root: str | Path,
+    small: int = 500,
+    large: int = 10,
+    small_size: tuple[int, int] = (256, 128),
+    large_size: tuple[int, int] = (4096, 2048),
+    depth: int = 2,
+    sidecars: bool = True,
+    seed: int = 0,
+) -> dict:
+    """Generate a library under `root` and return a manifest.
+
+    Files are spread over `depth` levels of project/category folders. Existing
+    files are kept, so regenerating the same library is cheap.
+    """
+    root = Path(root)
+    rng = random.Random(seed)
+    nprng = np.random.default_rng(seed)
+    files = []
+    for i in range(small + large):
+        is_large = i >= small
+        parts = [rng.choice(PROJECTS), rng.choice(CATEGORIES)][:depth]
+        directory = root.joinpath(*parts)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{'large' if is_large else 'env'}_{i:06d}"
+        path = directory / f"{name}.hdr"
+        if not path.exists():
+            width, height = large_size if is_large else small_size
+            cv2.imwrite(str(path), render_sky(width, height, nprng))
+        if sidecars and not path.with_suffix(".yaml").exists():
+            write_sidecar(path.with_suffix(".yaml"), name, rng)
+        files.append({"path": str(path), "large": is_large, "bytes": path.stat().st_size})
+
+    directories = sorted({os.path.dirname(f["path"]) for f in files})
+    manifest = {
+        "root": str(root),
+        "small": small,
+        "large": large,
+        "small_size": list(small_size),
+        "large_size": list(large_size),
+        "directories": directories,
+        "files": files,
+        "total_bytes": sum(f["bytes"] for f in files),
+    }
+    (root / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def scan_library(root: str | Path, large_bytes: int = LARGE_FILE_BYTES) -> dict:
+    """Manifest of the images already under `root`, like `generate_library`'s.
+
+    Nothing is written. Hidden directories are skipped, and files of at least
+    `large_bytes` count as large maps.
+    """
+    from uab.core import decoders
+
+    root = Path(root)
+    files = []
+    for directory, subdirectories, names in os.walk(root):
+        subdirectories[:] = sorted(d for d in subdirectories if not d.startswith("."))
+        for name in sorted(names):
+            if name.startswith(".") or not decoders.is_supported(name):
+                continue
+            path = os.path.join(directory, name)
+            size = os.path.getsize(path)
+            files.append({"path": path, "large": size >= large_bytes, "bytes": size})
+
+    large = sum(f["large"] for f in files)
+    return {
+        "root": str(root),
+        "small": len(files) - large,
+        "large": large,
+        "directories": sorted({os.path.dirname(f["path"]) for f in files}),
+        "files": files,
+        "total_bytes": sum(f["bytes"] for f in files),
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="directory to generate the library in")
+    parser.add_argument("--small", type=int, default=500, help="number of small maps")
+    parser.add_argument("--large", type=int, default=10, help="number of large maps")
+    parser.add_argument("--large-width", type=int, default=4096)
+    parser.add_argument("--depth", type=int, default=2, choices=(0, 1, 2))
+    parser.add_argument("--no-sidecars", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    manifest = generate_library(
+        args.root, args.small, args.large,
+        large_size=(args.large_width, args.large_width // 2),
+        depth=args.depth, sidecars=not args.no_sidecars, seed=args.seed)
+    print(f"{len(manifest['files'])} files, {manifest['total_bytes'] / 1e6:.1f} MB "
+          f"in {len(manifest['directories'])} directories under {manifest['root']}")
+    return manifest
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Image descriptors computed once per asset at ingest.
+
+Every descriptor is derived from one small scene-linear copy of the image
+(`ANALYSIS_SIZE` pixels on the longest side, decoded by
+`decoders.decode_linear`, so 8-bit textures are linearized from sRGB to
+0..1), so the source file is decoded once and nothing has to be decoded
+again to search the catalog or expose a preview:
+
+- `luminance_*`: log-average, 50th/95th/99th percentiles and maximum of the
+  linear luminance, which previews use for auto-exposure.
+- `sun_*`: the sun, if any, found as pixels `SUN_THRESHOLD` times brighter
+  than the 99th percentile. Azimuth and elevation are in degrees, assuming a
+  lat-long map; intensity is the share of the map's luminance it holds.
+- `phash`: 64-bit DCT perceptual hash of the auto-exposed preview, stored as
+  a signed 64-bit integer.
+- `color_histogram`: joint RGB histogram of that preview with
+  `HISTOGRAM_BINS` bins per channel, as normalized float32 bytes.
+- `dominant_color_*`: up to `PALETTE_SIZE` colour buckets covering at least
+  `PALETTE_MIN_SHARE` of that preview, most common first. A bucket is the
+  nearest colour on a `COLOR_LEVELS`-level RGB grid (the web-safe palette),
+  so colour searches are integer lookups on indexed columns.
+
+`analyze_file` returns the values keyed by `Asset` column. Rows analyzed
+with an older `ANALYSIS_VERSION` are refreshed by `POST /assets/admin/analyze`.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from uab.core import decoders, utils
+
+ANALYSIS_VERSION = 4
+ANALYSIS_SIZE = 256
+HISTOGRAM_BINS = 4
+HISTOGRAM_SIZE = HISTOGRAM_BINS ** 3
+SUN_THRESHOLD = 20.0
+COLOR_LEVELS = 6
+PALETTE_SIZE = 3
+PALETTE_MIN_SHARE = 0.05
+# Default CIE76 distance for colour searches
+COLOR_TOLERANCE = 25.0
+STATS_COLUMNS = (
+    "luminance_log_average", "luminance_p50", "luminance_p95", "luminance_p99", "luminance_max",
+    "sun_intensity", "sun_azimuth", "sun_elevation",
+)
+PALETTE_COLUMNS = tuple(f"dominant_color_{i + 1}" for i in range(PALETTE_SIZE))
+# Columns filled by `analyze_file`, copied as-is onto links to duplicates
+COLUMNS = ("analysis_version", "phash", "color_histogram") + STATS_COLUMNS + PALETTE_COLUMNS
+
+ANALYZE_ON_IMPORT = os.environ.get("UAB_ANALYZE_ON_IMPORT", "1") == "1"
+ANALYSIS_WORKERS = int(os.environ.get("UAB_ANALYSIS_WORKERS", min(8, os.cpu_count() or 1)))
+
+
+def perceptual_hash(rgb: np.ndarray) -> int:
+    """64-bit pHash: signs of the low 8x8 DCT coefficients of a 32x32 grey image."""
+    grey = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(grey, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].ravel()
+    # The DC term only carries mean brightness, so leave it out of the median
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">i8")[0])
+
+
+def color_histogram(rgb: np.ndarray) -> np.ndarray:
+    """Normalized joint RGB histogram with `HISTOGRAM_BINS` bins per channel."""
+    quantized = (rgb.reshape(-1, 3) // (256 // HISTOGRAM_BINS)).astype(np.intp)
+    index = (quantized[:, 0] * HISTOGRAM_BINS + quantized[:, 1]) * HISTOGRAM_BINS + quantized[:, 2]
+    histogram = np.bincount(index, minlength=HISTOGRAM_SIZE).astype(np.float32)
+    return histogram / max(histogram.sum(), 1.0)
+
+
+def _color_bucket(rgb: np.ndarray) -> np.ndarray:
+    """Bucket of each RGB colour in a (..., 3) uint8 array."""
+    levels = np.rint(rgb.astype(np.float32) * ((COLOR_LEVELS - 1) / 255)).astype(np.intp)
+    return (levels[..., 0] * COLOR_LEVELS + levels[..., 1]) * COLOR_LEVELS + levels[..., 2]
+
+
+def _to_lab(rgb: np.ndarray) -> np.ndarray:
+    """CIELAB of a (n, 3) uint8 RGB array."""
+    return cv2.cvtColor(rgb.reshape(-1, 1, 3).astype(np.float32) / 255, cv2.COLOR_RGB2Lab).reshape(-1, 3)
+
+
+_levels = np.rint(np.linspace(0, 255, COLOR_LEVELS)).astype(np.uint8)
+# Bucket centres in bucket order, and their CIELAB coordinates
+BUCKET_COLORS = np.stack(np.meshgrid(_levels, _levels, _levels, indexing="ij"), axis=-1).reshape(-1, 3)
+_BUCKET_LAB = _to_lab(BUCKET_COLORS)
+
+
+def dominant_colors(rgb: np.ndarray) -> list[int | None]:
+    """The `PALETTE_SIZE` most common colour buckets, padded with None."""
+    counts = np.bincount(_color_bucket(rgb).ravel(), minlength=len(BUCKET_COLORS))
+    ranked = np.argsort(counts, kind="stable")[::-1][:PALETTE_SIZE]
+    palette = [int(bucket) for bucket in ranked if counts[bucket] >= PALETTE_MIN_SHARE * counts.sum()]
+    return palette + [None] * (PALETTE_SIZE - len(palette))
+
+
+def parse_color(value: str) -> tuple[int, int, int]:
+    """RGB of a `#rrggbb` (or `rrggbb`) string; raises ValueError otherwise."""
+    digits = value.strip().removeprefix("#")
+    if len(digits) != 6:
+        raise ValueError(f"Expected a colour as #rrggbb, got `{value}`")
+    return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def color_buckets(rgb: tuple[int, int, int], tolerance: float = COLOR_TOLERANCE) -> list[int]:
+    """Buckets whose centre is within `tolerance` (CIE76) of `rgb`.
+
+    The bucket of `rgb` itself is always included, so a small tolerance
+    still matches the colour's own bucket.
+    """
+    target = np.array([rgb], dtype=np.uint8)
+    distances = np.linalg.norm(_BUCKET_LAB - _to_lab(target), axis=1)
+    buckets = set(np.flatnonzero(distances <= tolerance).tolist())
+    buckets.add(int(_color_bucket(target)[0]))
+    return sorted(buckets)
+
+
+def luminance_stats(hdr: np.ndarray) -> dict:
+    """Exposure and sun statistics of a linear BGR image, keyed by column."""
+    lum = utils.luminance(hdr)
+    p50, p95, p99 = (float(value) for value in np.percentile(lum, (50, 95, 99)))
+    stats = {
+        "luminance_log_average": float(np.exp(np.log(lum + 1e-6).mean())),
+        "luminance_p50": p50,
+        "luminance_p95": p95,
+        "luminance_p99": p99,
+        "luminance_max": float(lum.max()),
+        "sun_intensity": None,
+        "sun_azimuth": None,
+        "sun_elevation": None,
+    }
+
+    sun = lum > max(p99 * SUN_THRESHOLD, 1e-6)
+    if sun.any():
+        rows, cols = np.nonzero(sun)
+        weights = lum[rows, cols]
+        height, width = lum.shape
+        # Luminance-weighted centre of the sun pixels; ignores the seam
+        u = np.average(cols + 0.5, weights=weights) / width
+        v = np.average(rows + 0.5, weights=weights) / height
+        stats["sun_intensity"] = float(weights.sum() / max(lum.sum(), 1e-6))
+        stats["sun_azimuth"] = float(u * 360 - 180)
+        stats["sun_elevation"] = float(90 - v * 180)
+    return stats
+
+
+def analyze_file(path: str) -> dict:
+    """Descriptors for the image at `path`, keyed by `Asset` column.
+
+    Returns an empty dict if the file cannot be decoded.
+    """
+    try:
+        hdr = decoders.decode_linear(path, max_size=ANALYSIS_SIZE)
+    except (FileNotFoundError, ValueError, cv2.error) as e:
+        print(f"Cannot analyze {path}: {e}")
+        return {}
+    stats = luminance_stats(hdr)
+    rgb = utils.tonemap_auto(hdr, stats["luminance_log_average"], stats["luminance_p99"])
+    return {
+        "analysis_version": ANALYSIS_VERSION,
+        "phash": perceptual_hash(rgb),
+        "color_histogram": color_histogram(rgb).tobytes(),
+        **stats,
+        **dict(zip(PALETTE_COLUMNS, dominant_colors(rgb))),
+    }
+
+
+def analyze_many(paths: list[str], workers: int = ANALYSIS_WORKERS) -> list[dict]:
+    """`analyze_file` for many files on worker threads; OpenCV releases the GIL."""
+    if workers <= 1 or len(paths) <= 1:
+        return [analyze_file(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="uab-analysis") as executor:
+        return list(executor.map(analyze_file, paths))
@@ -0,0 +1,244 @@
+"""Async API routes for browser CRUD operations.
+
+Same endpoints as `routes.py`, served by `async def` handlers on SQLAlchemy's
+async engine (aiosqlite) instead of FastAPI's threadpool. Enabled by starting
+the server with `UAB_API_MODE=async`.
+"""
+import asyncio
+import heapq
+import itertools
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select, and_, func, delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..data_access import models, libraries
+from ..data_access.libraries import Catalog, Library
+from ..api.schemas import AssetBase, AssetCreate, AssetResponse, AssetCount, DuplicatePolicy
+from ..api.routes import (
+    ASSET_COLUMNS, ASSET_FIELDS, _row, _serialize, _search_filters, _resolve, _list_response,
+    _target_library, _duplicate_query, _pick_duplicate, _descriptor_query, _new_asset,
+    _image_filters, _sync_sidecars, _member_rows, _links_query, _promotions)
+from .. import analysis, fingerprint, sidecar, similarity
+
+
+router = APIRouter(
+    prefix="/assets",
+    responses={404: {"description": "Not found"}},
+)
+
+
+async def _federated_query(catalog: Catalog, filters: list, skip: int, limit: Optional[int]) -> list[tuple]:
+    """Async counterpart of `routes._federated_query`."""
+    window = None if limit is None else skip + limit
+
+    async def _fetch(library: Library, db: AsyncSession) -> list[tuple]:
+        query = select(*ASSET_COLUMNS)
+        if filters:
+            query = query.where(and_(*filters))
+        query = query.order_by(models.Asset.id)
+        if window is not None:
+            query = query.limit(window)
+        result = await db.execute(query)
+        return [_row(library, tuple(columns)) for columns in result]
+
+    merged = heapq.merge(*await catalog.amap(_fetch), key=lambda row: row[0])
+    return list(itertools.islice(merged, skip, window))
+
+
+async def _find_duplicate(catalog: Catalog, quick: str, content_hash: Optional[str]) -> Optional[tuple]:
+    """Async counterpart of `routes._find_duplicate`."""
+    async def _fetch(library: Library, db: AsyncSession) -> list[tuple]:
+        result = await db.execute(_duplicate_query(quick))
+        return [(_row(library, tuple(columns[:-1])), columns[-1]) for columns in result]
+
+    return _pick_duplicate(await catalog.amap(_fetch), content_hash)
+
+
+async def _descriptors_of(catalog: Catalog, asset_id: int) -> dict:
+    """Async counterpart of `routes._descriptors_of`."""
+    library, local_id = catalog.resolve_id(asset_id)
+    async with library.AsyncSessionLocal() as db:
+        row = (await db.execute(_descriptor_query(local_id))).first()
+    return dict(zip(analysis.COLUMNS, row)) if row else {}
+
+
+def _sync_sidecars_of(library: Library, local_ids: list[int]) -> int:
+    """`routes._sync_sidecars` on a sync session; reads files, so call it off the event loop."""
+    with library.SessionLocal() as db:
+        return _sync_sidecars(db, local_ids)
+
+
+async def _promote_links(catalog: Catalog, library: Library, db: AsyncSession,
+                         local_id: int) -> dict[int, list[dict]]:
+    """Async counterpart of `routes._promote_links`, for a single asset."""
+    deleted = {library.global_id(local_id)}
+
+    async def _fetch(other: Library, session: AsyncSession) -> list[tuple]:
+        result = await session.execute(_links_query(list(deleted)))
+        return [(other.global_id(link_id), original) for link_id, original in result]
+
+    links = [link for rows in await catalog.amap(_fetch) for link in rows]
+    updates = _promotions(catalog, links, deleted)
+    if library.index in updates:
+        await db.execute(update(models.Asset), updates.pop(library.index))
+    return updates
+
+
+async def _update_links(catalog: Catalog, updates: dict[int, list[dict]]) -> None:
+    for index, rows in updates.items():
+        async with catalog.libraries[index].AsyncSessionLocal() as db:
+            await db.execute(update(models.Asset), rows)
+            await db.commit()
+
+
+async def _get_or_404(db: AsyncSession, asset_id: int, local_id: int) -> models.Asset:
+    db_asset = await db.get(models.Asset, local_id)
+    if db_asset is None:
+        raise HTTPException(
+            status_code=404, detail=f"Asset with id `{asset_id}` not found")
+    return db_asset
+
+
+# Get endpoints
+
+
+@router.get("/", response_model=list[AssetResponse])
+async def get_all_assets(
+    request: Request,
+    skip: int = Query(0, ge=0, description="Number of assets to skip"),
+    limit: Optional[int] = Query(
+        None, ge=1, description="Maximum number of assets to return"),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    return _list_response(request, await _federated_query(catalog, [], skip, limit))
+
+
+@router.get("/search", response_model=list[AssetResponse])
+async def search_assets(
+    request: Request,
+    name: Optional[str] = Query(
+        None, description="Search by asset name (partial match)"),
+    tags: Optional[str] = Query(
+        None, description="Search by tags (comma-separated)"),
+    skip: int = Query(0, ge=0, description="Number of matches to skip"),
+    limit: Optional[int] = Query(
+        None, ge=1, description="Maximum number of matches to return"),
+    image: list = Depends(_image_filters),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    """Search assets by name and/or tags across all libraries."""
+    return _list_response(
+        request, await _federated_query(catalog, _search_filters(name, tags) + image, skip, limit))
+
+
+@router.get("/count", response_model=AssetCount)
+async def count_assets(
+    name: Optional[str] = Query(
+        None, description="Count assets matching this name (partial match)"),
+    tags: Optional[str] = Query(
+        None, description="Count assets matching these tags (comma-separated)"),
+    image: list = Depends(_image_filters),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    """Count assets, in total and per library, with the same filters as search."""
+    filters = _search_filters(name, tags) + image
+
+    async def _count(library: Library, db: AsyncSession) -> int:
+        query = select(func.count(models.Asset.id))
+        if filters:
+            query = query.where(and_(*filters))
+        return (await db.execute(query)).scalar()
+
+    counts = await catalog.amap(_count)
+    return {
+        "count": sum(counts),
+        "libraries": {library.name: n for library, n in zip(catalog.libraries, counts)},
+    }
+
+
+# `:int` keeps these from shadowing the sync router's static paths, which
+# are registered after this router.
+@router.get("/{asset_id:int}", response_model=AssetResponse)
+async def get_asset(asset_id: int, catalog: Catalog = Depends(libraries.get_catalog)):
+    library, local_id = _resolve(catalog, asset_id)
+    async with library.AsyncSessionLocal() as db:
+        return _serialize(library, await _get_or_404(db, asset_id, local_id))
+
+
+# Post endpoints
+
+
+@router.post("/", response_model=AssetResponse, status_code=status.HTTP_201_CREATED)
+async def create_asset(
+    asset: AssetCreate,
+    response: Response,
+    on_duplicate: DuplicatePolicy = Query(
+        "insert", description="What to do if the file is already cataloged: insert, link or skip"),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    # Hashing reads the file, so keep it off the event loop
+    hashes = await asyncio.to_thread(fingerprint.fingerprint, asset.directory_path)
+    original = None
+    if on_duplicate != "insert" and hashes[0]:
+        original = await _find_duplicate(catalog, *hashes)
+    if original is not None and on_duplicate == "skip":
+        response.status_code = status.HTTP_200_OK
+        return dict(zip(ASSET_FIELDS, original))
+
+    if original is not None:
+        descriptors = await _descriptors_of(catalog, original[0])
+    elif analysis.ANALYZE_ON_IMPORT:
+        descriptors = await asyncio.to_thread(analysis.analyze_file, asset.directory_path)
+    else:
+        descriptors = {}
+
+    library = _target_library(catalog, asset)
+    async with library.AsyncSessionLocal() as db:
+        db_asset = _new_asset(asset, hashes, original, descriptors)
+        db.add(db_asset)
+        if asset.members:
+            await db.flush()
+            await db.execute(insert(models.AssetMember), _member_rows(db_asset.id, asset))
+        await db.commit()
+        similarity.index.invalidate()
+        if sidecar.SIDECARS_ON_IMPORT and sidecar.available():
+            await asyncio.to_thread(_sync_sidecars_of, library, [db_asset.id])
+        await db.refresh(db_asset)
+        return _serialize(library, db_asset)
+
+
+# Put endpoints
+
+@router.put("/{asset_id:int}", response_model=AssetResponse)
+async def update_asset(asset_id: int, asset: AssetBase, catalog: Catalog = Depends(libraries.get_catalog)):
+    library, local_id = _resolve(catalog, asset_id)
+    async with library.AsyncSessionLocal() as db:
+        db_asset = await _get_or_404(db, asset_id, local_id)
+
+        db_asset.name = asset.name
+        db_asset.description = asset.description
+        db_asset.directory_path = asset.directory_path
+
+        await db.commit()
+        await db.refresh(db_asset)
+        return _serialize(library, db_asset)
+
+
+# Delete endpoints
+
+@router.delete("/{asset_id:int}", response_model=AssetResponse)
+async def delete_asset(asset_id: int, catalog: Catalog = Depends(libraries.get_catalog)):
+    library, local_id = _resolve(catalog, asset_id)
+    async with library.AsyncSessionLocal() as db:
+        db_asset = await _get_or_404(db, asset_id, local_id)
+        response = _serialize(library, db_asset)
+        links = await _promote_links(catalog, library, db, local_id)
+        await db.execute(delete(models.AssetTag).where(models.AssetTag.asset_id == local_id))
+        await db.execute(delete(models.AssetMember).where(models.AssetMember.asset_id == local_id))
+        await db.execute(delete(models.UsageEvent).where(models.UsageEvent.asset_id == local_id))
+        await db.execute(delete(models.AssetUsage).where(models.AssetUsage.asset_id == local_id))
+        await db.delete(db_asset)
+        await db.commit()
+        await _update_links(catalog, links)
+        similarity.index.invalidate()
+        return response
@@ -0,0 +1,72 @@
+"""Fast, unvalidated JSON encodings for large list responses.
+
+List endpoints normally build and validate an `AssetResponse` per row. A
+client that trusts the server can skip that by asking for one of these media
+types in its `Accept` header:
+
+- `application/vnd.uab.fast+json`: the same list of objects as the default
+  response, encoded straight from the selected column tuples.
+- `application/vnd.uab.columns+json`: a column-oriented payload,
+  `{"fields": [...], "columns": {field: [values...]}}`, which avoids
+  repeating every key on every row.
+
+orjson is used when installed, otherwise the standard library encoder.
+"""
+
+import json
+from typing import Iterable, Optional, Sequence
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FAST_MEDIA_TYPE = "application/vnd.uab.fast+json"
+COLUMNS_MEDIA_TYPE = "application/vnd.uab.columns+json"
+MEDIA_TYPES = (FAST_MEDIA_TYPE, COLUMNS_MEDIA_TYPE)
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """Return the fast media type the client prefers, or None for the default.
+
+    Only our own media types are considered; `q` values order them and a
+    `q=0` entry opts out.
+    """
+    if not accept:
+        return None
+    best, best_q = None, 0.0
+    for entry in accept.split(","):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        if media_type not in MEDIA_TYPES:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def rows_response(fields: Sequence[str], rows: Iterable[tuple], media_type: str) -> Response:
+    """Encode `rows` (tuples ordered like `fields`) as `media_type`."""
+    if media_type == COLUMNS_MEDIA_TYPE:
+        rows = list(rows)
+        payload = {
+            "fields": list(fields),
+            "columns": {field: [row[i] for row in rows] for i, field in enumerate(fields)},
+        }
+    else:
+        payload = [dict(zip(fields, row)) for row in rows]
+    return Response(content=dumps(payload), media_type=media_type, headers={"Vary": "Accept"})
@@ -1,10 +1,20 @@
 """API routes for browser CRUD operations."""
+import collections
+import heapq
+import itertools
 from typing import Dict, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text, or_, and_
-from ..data_access import models, database
-from ..api.schemas import AssetBase, AssetResponse
+from sqlalchemy import text, or_, and_, func, select, delete, insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..data_access import models, libraries
+from ..data_access.libraries import Catalog, Library
+from ..api.schemas import (
+    AssetBase, AssetCreate, AssetMember, AssetResponse, AssetCount, AssetImport, AssetSync,
+    DuplicateGroup, DuplicatePolicy, ImportResult, SimilarAsset, SyncResult, UsageBatch)
+from ..api import encoding
+from .. import analysis, fingerprint, sidecar, similarity
 
 
 router = APIRouter(
@@ -12,127 +22,1010 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+
+# Columns selected for list responses, starting with the local id. Rows are
+# returned as tuples ordered like ASSET_FIELDS: the catalog-wide id and the
+# library name, followed by the remaining columns.
+ASSET_COLUMNS = (
+    models.Asset.id,
+    models.Asset.name,
+    models.Asset.description,
+    models.Asset.directory_path,
+    models.Asset.preview_image_file_path,
+    *(getattr(models.Asset, column) for column in analysis.STATS_COLUMNS),
+)
+ASSET_FIELDS = ("id", "library") + tuple(c.key for c in ASSET_COLUMNS[1:])
+
+
+def _row(library: Library, columns: tuple) -> tuple:
+    """Turn a selected column tuple into a response row with a catalog-wide id."""
+    return (library.global_id(columns[0]), library.name, *columns[1:])
+
+
+def _serialize(library: Library, db_asset: models.Asset) -> dict:
+    """Convert a shard row to a response dict with a catalog-wide id."""
+    return dict(zip(ASSET_FIELDS, _row(
+        library, tuple(getattr(db_asset, c.key) for c in ASSET_COLUMNS))))
+
+
+def _search_filters(name: Optional[str], tags: Optional[str]) -> list:
+    filters = []
+
+    # Filter by name if provided
+    if name:
+        filters.append(models.Asset.name.ilike(f"%{name}%"))
+
+    # Filter by tags if provided
+    if tags:
+        # Split comma-separated tags and search for any matching tag
+        tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+        if tag_list:
+            # Tags come from sidecars; assets without one are still matched
+            # on their description
+            tag_filters = [models.Asset.id.in_(
+                select(models.AssetTag.asset_id).where(
+                    models.AssetTag.tag.in_([tag.lower() for tag in tag_list])))]
+            for tag in tag_list:
+                tag_filters.append(models.Asset.description.ilike(f"%{tag}%"))
+            filters.append(or_(*tag_filters))
+
+    return filters
+
+
+def _image_filters(
+    min_luminance: Optional[float] = Query(
+        None, description="Minimum log-average luminance"),
+    max_luminance: Optional[float] = Query(
+        None, description="Maximum log-average luminance"),
+    has_sun: Optional[bool] = Query(
+        None, description="Only maps with (true) or without (false) a detected sun"),
+    color: Optional[str] = Query(
+        None, description="Dominant colour as #rrggbb"),
+    tolerance: float = Query(
+        analysis.COLOR_TOLERANCE, ge=0, description="Colour distance (CIE76) accepted around `color`"),
+) -> list:
+    """Filters on the image descriptors, shared by the search routes."""
+    filters = []
+    if min_luminance is not None:
+        filters.append(models.Asset.luminance_log_average >= min_luminance)
+    if max_luminance is not None:
+        filters.append(models.Asset.luminance_log_average <= max_luminance)
+    if has_sun is not None:
+        filters.append(models.Asset.sun_intensity.is_not(None) if has_sun
+                       else and_(models.Asset.sun_intensity.is_(None),
+                                 models.Asset.analysis_version.is_not(None)))
+    if color:
+        try:
+            rgb = analysis.parse_color(color)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Resolved to palette buckets up front, so the query only hits the indexes
+        buckets = analysis.color_buckets(rgb, tolerance)
+        filters.append(or_(*(getattr(models.Asset, column).in_(buckets)
+                             for column in analysis.PALETTE_COLUMNS)))
+    return filters
+
+
+def _federated_query(catalog: Catalog, filters: list, skip: int, limit: Optional[int]) -> list[tuple]:
+    """Query every library in parallel and merge the pages by global id.
+
+    Each library only returns its first `skip + limit` rows; since global ids
+    sort by library first, merging those windows gives the exact page.
+    Only `ASSET_COLUMNS` are selected and rows stay plain tuples.
+    """
+    window = None if limit is None else skip + limit
+
+    def _fetch(library: Library, db: Session) -> list[tuple]:
+        query = db.query(*ASSET_COLUMNS)
+        if filters:
+            query = query.filter(and_(*filters))
+        query = query.order_by(models.Asset.id)
+        if window is not None:
+            query = query.limit(window)
+        return [_row(library, columns) for columns in query]
+
+    merged = heapq.merge(*catalog.map(_fetch), key=lambda row: row[0])
+    return list(itertools.islice(merged, skip, window))
+
+
+def _list_response(request: Request, rows: list[tuple]):
+    """Encode rows with the fast encoder the client asked for, if any.
+
+    Without a fast media type in `Accept`, rows are returned as dicts and
+    validated against the route's `response_model` as usual.
+    """
+    media_type = encoding.negotiate(request.headers.get("accept"))
+    if media_type:
+        return encoding.rows_response(ASSET_FIELDS, rows, media_type)
+    return [dict(zip(ASSET_FIELDS, row)) for row in rows]
+
+
+def _target_library(catalog: Catalog, asset: AssetBase) -> Library:
+    if asset.library:
+        try:
+            return catalog.get(asset.library)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return catalog.library_for_path(asset.directory_path)
+
+
+def _duplicate_query(quick: str):
+    """Originals (not links) with the fingerprint `quick`, plus their full hash."""
+    return (
+        select(*ASSET_COLUMNS, models.Asset.content_hash)
+        .where(models.Asset.fingerprint == quick, models.Asset.duplicate_of.is_(None))
+        .order_by(models.Asset.id)
+    )
+
+
+def _pick_duplicate(results: list[list[tuple]], content_hash: Optional[str]) -> Optional[tuple]:
+    """First row, in library order, whose full hash does not rule it out."""
+    for rows in results:
+        for row, other_hash in rows:
+            if fingerprint.same_content(content_hash, other_hash):
+                return row
+    return None
+
+
+def _find_duplicate(catalog: Catalog, quick: str, content_hash: Optional[str]) -> Optional[tuple]:
+    def _fetch(library: Library, db: Session) -> list[tuple]:
+        return [(_row(library, tuple(columns[:-1])), columns[-1])
+                for columns in db.execute(_duplicate_query(quick))]
+
+    return _pick_duplicate(catalog.map(_fetch), content_hash)
+
+
+def _descriptor_query(local_id: int):
+    return select(*(getattr(models.Asset, column) for column in analysis.COLUMNS)).where(
+        models.Asset.id == local_id)
+
+
+def _descriptors_of(catalog: Catalog, asset_id: int) -> dict:
+    """The stored image descriptors of an asset, keyed by column."""
+    library, local_id = catalog.resolve_id(asset_id)
+    with library.SessionLocal() as db:
+        row = db.execute(_descriptor_query(local_id)).first()
+    return dict(zip(analysis.COLUMNS, row)) if row else {}
+
+
+def _new_asset(asset: AssetBase, hashes: tuple, original: Optional[tuple],
+               descriptors: dict) -> models.Asset:
+    """Build the row for `asset`, linked to the `original` row if given."""
+    quick, content_hash = hashes
+    db_asset = models.Asset(
+        name=asset.name, description=asset.description, directory_path=asset.directory_path,
+        fingerprint=quick, content_hash=content_hash)
+    for column, value in descriptors.items():
+        setattr(db_asset, column, value)
+    if original is not None:
+        original = dict(zip(ASSET_FIELDS, original))
+        db_asset.duplicate_of = original["id"]
+        # Links share the original's preview instead of decoding their own
+        db_asset.preview_image_file_path = original["preview_image_file_path"]
+    return db_asset
+
+
+def _member_rows(local_id: int, asset: AssetCreate) -> list[dict]:
+    return [{"asset_id": local_id, **member.model_dump()} for member in asset.members or ()]
+
+
+def _insert_asset(catalog: Catalog, asset: AssetCreate, hashes: tuple, on_duplicate: str,
+                  descriptors: Optional[dict] = None, sidecars: bool = True) -> tuple[str, dict]:
+    """Insert `asset` according to `on_duplicate`.
+
+    New assets are analyzed unless `descriptors` were computed already;
+    links copy the original's descriptors. Members of a file set are
+    stored with it. Its sidecar is applied unless `sidecars` is False.
+    Returns "created", "linked" or "skipped" with the new asset, or with
+    the existing one when skipped.
+    """
+    original = None
+    if on_duplicate != "insert" and hashes[0]:
+        original = _find_duplicate(catalog, *hashes)
+    if original is not None and on_duplicate == "skip":
+        return "skipped", dict(zip(ASSET_FIELDS, original))
+
+    if original is not None:
+        descriptors = _descriptors_of(catalog, original[0])
+    elif descriptors is None:
+        descriptors = analysis.analyze_file(asset.directory_path) if analysis.ANALYZE_ON_IMPORT else {}
+
+    library = _target_library(catalog, asset)
+    with library.SessionLocal() as db:
+        db_asset = _new_asset(asset, hashes, original, descriptors)
+        db.add(db_asset)
+        if asset.members:
+            db.flush()
+            db.execute(insert(models.AssetMember), _member_rows(db_asset.id, asset))
+        db.commit()
+        similarity.index.invalidate()
+        if sidecars and sidecar.SIDECARS_ON_IMPORT and sidecar.available():
+            _sync_sidecars(db, [db_asset.id])
+        db.refresh(db_asset)
+        return ("created" if original is None else "linked"), _serialize(library, db_asset)
+
+
+def _rows_by_id(catalog: Catalog, asset_ids: list[int]) -> dict[int, tuple]:
+    """Fetch list rows for catalog-wide ids, keyed by id."""
+    local_ids = collections.defaultdict(list)
+    for asset_id in asset_ids:
+        library, local_id = catalog.resolve_id(asset_id)
+        if library is not None:
+            local_ids[library.index].append(local_id)
+
+    def _fetch(library: Library, db: Session) -> list[tuple]:
+        if library.index not in local_ids:
+            return []
+        query = select(*ASSET_COLUMNS).where(models.Asset.id.in_(local_ids[library.index]))
+        return [_row(library, tuple(columns)) for columns in db.execute(query)]
+
+    return {row[0]: row for rows in catalog.map(_fetch) for row in rows}
+
+
+# Stay well below SQLite's limit on bound parameters per statement
+_CHUNK_SIZE = 500
+
+
+def _chunks(values: list, size: int = _CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+_SIDECAR_COLUMNS = (
+    models.Asset.id, models.Asset.directory_path, models.Asset.sidecar_path, models.Asset.sidecar_stamp,
+    *(getattr(models.Asset, field) for field in sidecar.FIELDS),
+)
+
+
+def _sync_sidecars(db: Session, local_ids: Optional[list[int]] = None) -> int:
+    """Apply new, changed or removed sidecars to the assets of one library.
+
+    Only sidecars whose stamp differs from the one stored on the asset are
+    parsed. Columns and tags are written in bulk. Name and description keep
+    their value when the sidecar leaves them empty. Returns how many assets
+    were updated.
+    """
+    if local_ids is None:
+        rows = db.execute(select(*_SIDECAR_COLUMNS)).all()
+    else:
+        rows = [row for chunk in _chunks(local_ids)
+                for row in db.execute(select(*_SIDECAR_COLUMNS).where(models.Asset.id.in_(chunk)))]
+    found = sidecar.find_sidecars([row.directory_path for row in rows])
+    changed = [(row, current) for row, current in zip(rows, found)
+               if (current or (None, None)) != (row.sidecar_path, row.sidecar_stamp)]
+    if not changed:
+        return 0
+    parsed = iter(sidecar.parse_many([current[0] for _, current in changed if current]))
+
+    updates, retagged, tags = [], [], []
+    for row, current in changed:
+        values = {"id": row.id, **{field: getattr(row, field) for field in sidecar.FIELDS}}
+        values["sidecar_path"], values["sidecar_stamp"] = current or (None, None)
+        fields = next(parsed) if current else None
+        if current is None:
+            # The sidecar was removed: drop what came from it
+            values.update(author=None, date_created=None, date_added=None)
+            retagged.append(row.id)
+        elif fields is not None:
+            for field in sidecar.FIELDS:
+                if fields[field] is not None or field not in ("name", "description"):
+                    values[field] = fields[field]
+            retagged.append(row.id)
+            tags += [{"asset_id": row.id, "tag": tag} for tag in fields["tags"]]
+        # An unreadable sidecar only records its stamp, so it is not parsed
+        # again until it changes
+        updates.append(values)
+
+    for chunk in _chunks(retagged):
+        db.execute(delete(models.AssetTag).where(models.AssetTag.asset_id.in_(chunk)))
+    db.execute(update(models.Asset), updates)
+    if tags:
+        db.execute(insert(models.AssetTag), tags)
+    db.commit()
+    return len(updates)
+
+
+def _resolve(catalog: Catalog, asset_id: int) -> tuple[Library, int]:
+    library, local_id = catalog.resolve_id(asset_id)
+    if library is None:
+        raise HTTPException(
+            status_code=404, detail=f"Asset with id `{asset_id}` not found")
+    return library, local_id
+
+
+def _delete_usage(db: Session, local_ids: list[int]) -> None:
+    for chunk in _chunks(local_ids):
+        db.execute(delete(models.UsageEvent).where(models.UsageEvent.asset_id.in_(chunk)))
+        db.execute(delete(models.AssetUsage).where(models.AssetUsage.asset_id.in_(chunk)))
+
+
+def _usage_query(catalog: Catalog, user: str, column, limit: Optional[int]) -> list[tuple]:
+    """Rows of the user's assets with `column` set, most recent `column` first.
+
+    Each library reads its top rows from the covering index on (user,
+    `column`, asset_id); the windows are merged and the page's assets
+    fetched by id.
+    """
+    def _fetch(library: Library, db: Session) -> list[tuple]:
+        query = (select(column, models.AssetUsage.asset_id)
+                 .where(models.AssetUsage.user == user, column.is_not(None))
+                 .order_by(column.desc()))
+        if limit is not None:
+            query = query.limit(limit)
+        return [(used, library.global_id(local_id)) for used, local_id in db.execute(query)]
+
+    merged = heapq.merge(*catalog.map(_fetch), key=lambda row: row[0], reverse=True)
+    asset_ids = [asset_id for _, asset_id in itertools.islice(merged, limit)]
+    rows = _rows_by_id(catalog, asset_ids)
+    return [rows[asset_id] for asset_id in asset_ids if asset_id in rows]
+
+
+def _record_usage(db: Session, events: list[tuple]) -> int:
+    """Store `(local_id, event)` pairs of one library and fold them into
+    `AssetUsage`. Events of assets no longer cataloged are dropped."""
+    local_ids = list({local_id for local_id, _ in events})
+    existing = set()
+    for chunk in _chunks(local_ids):
+        existing.update(db.scalars(select(models.Asset.id).where(models.Asset.id.in_(chunk))))
+    events = [(local_id, event) for local_id, event in events if local_id in existing]
+    if not events:
+        return 0
+    db.execute(insert(models.UsageEvent), [
+        {"asset_id": local_id, "user": event.user, "event": event.event, "timestamp": event.timestamp}
+        for local_id, event in events])
+
+    # (user, asset) -> [uses, last use, last favorite change]
+    rollups = {}
+    for local_id, event in sorted(events, key=lambda pair: pair[1].timestamp):
+        rollup = rollups.setdefault((event.user, local_id), [0, None, None])
+        if event.event in ("viewed", "spawned"):
+            rollup[0] += 1
+            rollup[1] = event.timestamp
+        else:
+            rollup[2] = event
+
+    table = models.AssetUsage
+    used = [{"user": user, "asset_id": local_id, "use_count": uses, "last_used": last_used}
+            for (user, local_id), (uses, last_used, _) in rollups.items() if uses]
+    if used:
+        statement = sqlite_insert(table)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[table.user, table.asset_id],
+            set_={"use_count": table.use_count + statement.excluded.use_count,
+                  "last_used": func.max(func.coalesce(table.last_used, 0), statement.excluded.last_used)}),
+            used)
+    favorites = [{"user": user, "asset_id": local_id, "use_count": 0,
+                  "favorited_at": change.timestamp if change.event == "favorited" else None}
+                 for (user, local_id), (_, _, change) in rollups.items() if change is not None]
+    if favorites:
+        statement = sqlite_insert(table)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[table.user, table.asset_id],
+            set_={"favorited_at": statement.excluded.favorited_at}),
+            favorites)
+    db.commit()
+    return len(events)
+
+
 # Get endpoints
 
 
 @router.get("/", response_model=list[AssetResponse])
-def get_all_assets(db: Session = Depends(database.get_db)):
-    return db.query(models.Asset).all()
+def get_all_assets(
+    request: Request,
+    skip: int = Query(0, ge=0, description="Number of assets to skip"),
+    limit: Optional[int] = Query(
+        None, ge=1, description="Maximum number of assets to return"),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    return _list_response(request, _federated_query(catalog, [], skip, limit))
 
 
 @router.get("/search", response_model=list[AssetResponse])
 def search_assets(
+    request: Request,
     name: Optional[str] = Query(
         None, description="Search by asset name (partial match)"),
     tags: Optional[str] = Query(
         None, description="Search by tags (comma-separated)"),
-    db: Session = Depends(database.get_db)
+    skip: int = Query(0, ge=0, description="Number of matches to skip"),
+    limit: Optional[int] = Query(
+        None, ge=1, description="Maximum number of matches to return"),
+    image: list = Depends(_image_filters),
+    catalog: Catalog = Depends(libraries.get_catalog)
 ):
     """
-    Search assets by name and/or tags.
+    Search assets by name and/or tags across all libraries.
 
     - name: Partial match search on asset name (case-insensitive)
     - tags: Comma-separated list of tags to search for
+    - min_luminance, max_luminance, has_sun: Filters on the luminance
+      statistics computed at ingest
+    - color, tolerance: Assets with a dominant colour near `color`, e.g.
+      `#ff8040`; resolved through the palette indexes, not by decoding images
+    - skip, limit: Pagination over the merged results
+
+    Send `Accept: application/vnd.uab.fast+json` or
+    `application/vnd.uab.columns+json` to skip per-row validation.
     """
-    query = db.query(models.Asset)
-    filters = []
+    return _list_response(
+        request, _federated_query(catalog, _search_filters(name, tags) + image, skip, limit))
 
-    # Filter by name if provided
-    if name:
-        filters.append(models.Asset.name.ilike(f"%{name}%"))
 
-    # Filter by tags if provided
-    if tags:
-        # Split comma-separated tags and search for any matching tag
-        tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
-        if tag_list:
-            # For now, search in description field since tags column doesn't exist yet
-            # TODO: Update this when tags column is added to the Asset model
-            tag_filters = []
-            for tag in tag_list:
-                tag_filters.append(models.Asset.description.ilike(f"%{tag}%"))
-            if tag_filters:
-                filters.append(or_(*tag_filters))
+@router.get("/count", response_model=AssetCount)
+def count_assets(
+    name: Optional[str] = Query(
+        None, description="Count assets matching this name (partial match)"),
+    tags: Optional[str] = Query(
+        None, description="Count assets matching these tags (comma-separated)"),
+    image: list = Depends(_image_filters),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    """Count assets, in total and per library, with the same filters as search."""
+    filters = _search_filters(name, tags) + image
 
-    # Apply all filters
-    if filters:
-        query = query.filter(and_(*filters))
+    def _count(library: Library, db: Session) -> int:
+        query = db.query(func.count(models.Asset.id))
+        if filters:
+            query = query.filter(and_(*filters))
+        return query.scalar()
 
-    return query.all()
+    counts = catalog.map(_count)
+    return {
+        "count": sum(counts),
+        "libraries": {library.name: n for library, n in zip(catalog.libraries, counts)},
+    }
 
 
-@router.get("/{asset_id}", response_model=AssetResponse)
-def get_asset(asset_id: int, db: Session = Depends(database.get_db)):
-    db_asset = db.query(models.Asset).filter(
-        models.Asset.id == asset_id).first()
-    if db_asset is None:
+# Rows fetched from the cursor (and encoded into one chunk) at a time.
+STREAM_BATCH_SIZE = 1000
+
+
+@router.get("/stream")
+def stream_assets(
+    name: Optional[str] = Query(
+        None, description="Only stream assets matching this name (partial match)"),
+    tags: Optional[str] = Query(
+        None, description="Only stream assets matching these tags (comma-separated)"),
+    image: list = Depends(_image_filters),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    """
+    Stream the whole catalog as newline-delimited JSON, one asset per line.
+
+    Rows are read from a streaming cursor in batches of `STREAM_BATCH_SIZE`
+    and sent as soon as they are encoded, so server memory stays flat however
+    large the catalog is. Libraries are streamed one after another.
+    """
+    filters = _search_filters(name, tags) + image
+
+    def _generate():
+        for library in catalog.libraries:
+            with library.SessionLocal() as db:
+                query = select(*ASSET_COLUMNS)
+                if filters:
+                    query = query.where(and_(*filters))
+                query = query.order_by(models.Asset.id).execution_options(
+                    yield_per=STREAM_BATCH_SIZE)
+                for batch in db.execute(query).partitions():
+                    yield b"".join(
+                        encoding.dumps(dict(zip(ASSET_FIELDS, _row(library, tuple(columns))))) + b"\n"
+                        for columns in batch
+                    )
+
+    return StreamingResponse(_generate(), media_type="application/x-ndjson")
+
+
+# Fingerprints per `IN (...)` query, below SQLite's bound parameter limit.
+DUPLICATES_BATCH_SIZE = 500
+
+
+@router.get("/duplicates", response_model=list[DuplicateGroup])
+def list_duplicates(catalog: Catalog = Depends(libraries.get_catalog)):
+    """
+    Groups of assets with the same content fingerprint, across all libraries.
+
+    Largest groups come first. Links made on import are listed with their
+    originals. Assets cataloged before fingerprinting was added only show up
+    after `POST /assets/admin/fingerprint`.
+    """
+    def _count(library: Library, db: Session) -> list[tuple]:
+        query = (select(models.Asset.fingerprint, func.count())
+                 .where(models.Asset.fingerprint.is_not(None))
+                 .group_by(models.Asset.fingerprint))
+        return db.execute(query).all()
+
+    totals = collections.Counter()
+    for counts in catalog.map(_count):
+        for quick, n in counts:
+            totals[quick] += n
+    duplicated = [quick for quick, n in totals.items() if n > 1]
+
+    def _fetch(library: Library, db: Session) -> list[tuple]:
+        rows = []
+        for start in range(0, len(duplicated), DUPLICATES_BATCH_SIZE):
+            query = select(models.Asset.fingerprint, *ASSET_COLUMNS).where(
+                models.Asset.fingerprint.in_(duplicated[start:start + DUPLICATES_BATCH_SIZE]))
+            rows += [(columns[0], _row(library, tuple(columns[1:]))) for columns in db.execute(query)]
+        return rows
+
+    groups = collections.defaultdict(list)
+    if duplicated:
+        for rows in catalog.map(_fetch):
+            for quick, row in rows:
+                groups[quick].append(row)
+    return [
+        {"fingerprint": quick, "assets": [dict(zip(ASSET_FIELDS, row)) for row in sorted(rows)]}
+        for quick, rows in sorted(groups.items(), key=lambda item: (-len(item[1]), item[0]))
+    ]
+
+
+@router.get("/recent", response_model=list[AssetResponse])
+def recent_assets(
+    request: Request,
+    user: str = Query(..., description="User whose assets to list"),
+    limit: Optional[int] = Query(100, ge=1, description="Maximum number of assets to return"),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    """The user's most recently viewed or spawned assets, latest first."""
+    return _list_response(request, _usage_query(catalog, user, models.AssetUsage.last_used, limit))
+
+
+@router.get("/favorites", response_model=list[AssetResponse])
+def favorite_assets(
+    request: Request,
+    user: str = Query(..., description="User whose favorites to list"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of assets to return"),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    """The user's favorite assets, most recently favorited first."""
+    return _list_response(request, _usage_query(catalog, user, models.AssetUsage.favorited_at, limit))
+
+
+@router.get("/{asset_id}/similar", response_model=list[SimilarAsset])
+def similar_assets(
+    asset_id: int,
+    k: int = Query(10, ge=1, le=1000, description="Number of similar assets to return"),
+    catalog: Catalog = Depends(libraries.get_catalog),
+    index: similarity.SimilarityIndex = Depends(similarity.get_similarity_index)
+):
+    """
+    The `k` assets that look most like `asset_id`, closest first.
+
+    Compares the perceptual hashes and colour histograms computed at ingest
+    across all libraries, without decoding any image.
+    """
+    _resolve(catalog, asset_id)
+    try:
+        matches = index.nearest(asset_id, k)
+    except KeyError:
         raise HTTPException(
-            status_code=404, detail=f"Asset with id `{asset_id}` not found")
-    return db_asset
+            status_code=404,
+            detail=f"Asset `{asset_id}` has not been analyzed, see POST /assets/admin/analyze")
+
+    rows = _rows_by_id(catalog, [match_id for match_id, _ in matches])
+    return [
+        {**dict(zip(ASSET_FIELDS, rows[match_id])), "distance": distance}
+        for match_id, distance in matches if match_id in rows
+    ]
+
+
+@router.get("/{asset_id}/members", response_model=list[AssetMember])
+def get_asset_members(asset_id: int, catalog: Catalog = Depends(libraries.get_catalog)):
+    """Files of an asset cataloged as a set; empty for single-file assets."""
+    library, local_id = _resolve(catalog, asset_id)
+    with library.SessionLocal() as db:
+        if db.get(models.Asset, local_id) is None:
+            raise HTTPException(
+                status_code=404, detail=f"Asset with id `{asset_id}` not found")
+        query = (select(models.AssetMember)
+                 .where(models.AssetMember.asset_id == local_id)
+                 .order_by(models.AssetMember.path))
+        return [
+            {"path": m.path, "channel": m.channel, "udim": m.udim, "frame": m.frame}
+            for m in db.scalars(query)
+        ]
+
+
+@router.get("/{asset_id}", response_model=AssetResponse)
+def get_asset(asset_id: int, catalog: Catalog = Depends(libraries.get_catalog)):
+    library, local_id = _resolve(catalog, asset_id)
+    with library.SessionLocal() as db:
+        db_asset = db.query(models.Asset).filter(
+            models.Asset.id == local_id).first()
+        if db_asset is None:
+            raise HTTPException(
+                status_code=404, detail=f"Asset with id `{asset_id}` not found")
+        return _serialize(library, db_asset)
 
 
 # Post endpoints
 
 
 @router.post("/", response_model=AssetResponse, status_code=status.HTTP_201_CREATED)
-def create_asset(asset: AssetBase, db: Session = Depends(database.get_db)):
-    db_asset = models.Asset(
-        name=asset.name, description=asset.description, directory_path=asset.directory_path)
-    db.add(db_asset)
+def create_asset(
+    asset: AssetCreate,
+    response: Response,
+    on_duplicate: DuplicatePolicy = Query(
+        "insert", description="What to do if the file is already cataloged: insert, link or skip"),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    """
+    Catalog a new asset, or a file set with its `members`.
+
+    The file at `directory_path` is fingerprinted. With `on_duplicate=link`
+    a file already in the catalog is inserted as a link to the original;
+    with `skip` it is not inserted and the original is returned with 200.
+    """
+    outcome, result = _insert_asset(
+        catalog, asset, fingerprint.fingerprint(asset.directory_path), on_duplicate)
+    if outcome == "skipped":
+        response.status_code = status.HTTP_200_OK
+    return result
+
+
+@router.post("/import", response_model=ImportResult)
+def import_assets(body: AssetImport, catalog: Catalog = Depends(libraries.get_catalog)):
+    """
+    Catalog many assets in one request.
+
+    Files are fingerprinted, and new ones analyzed, on parallel worker
+    threads first. They are then inserted in order, so duplicates within the
+    batch are caught too. Sidecars of the inserted assets are applied in one
+    pass per library at the end.
+    """
+    return _import_many(catalog, body.assets, body.on_duplicate)
+
+
+def _import_many(catalog: Catalog, assets: list[AssetCreate], on_duplicate: str) -> dict:
+    """Insert `assets` as described in `import_assets`; returns an `ImportResult` dict."""
+    paths = [asset.directory_path for asset in assets]
+    hashes = fingerprint.fingerprint_many(paths)
+
+    # Only decode the files that will be inserted as new assets
+    descriptors = [None] * len(paths)
+    if analysis.ANALYZE_ON_IMPORT:
+        new, seen = [], set()
+        for i, (quick, content_hash) in enumerate(hashes):
+            if on_duplicate != "insert" and quick and (
+                    quick in seen or _find_duplicate(catalog, quick, content_hash) is not None):
+                continue
+            seen.add(quick)
+            new.append(i)
+        for i, result in zip(new, analysis.analyze_many([paths[i] for i in new])):
+            descriptors[i] = result
+
+    counts = {"created": 0, "linked": 0, "skipped": 0}
+    results = []
+    for asset, asset_hashes, asset_descriptors in zip(assets, hashes, descriptors):
+        outcome, result = _insert_asset(
+            catalog, asset, asset_hashes, on_duplicate, asset_descriptors, sidecars=False)
+        counts[outcome] += 1
+        results.append((outcome, result))
+
+    inserted = [result["id"] for outcome, result in results if outcome != "skipped"]
+    if inserted and sidecar.SIDECARS_ON_IMPORT and sidecar.available():
+        local_ids = collections.defaultdict(list)
+        for asset_id in inserted:
+            library, local_id = catalog.resolve_id(asset_id)
+            local_ids[library.index].append(local_id)
+        catalog.map(lambda library, db: _sync_sidecars(db, local_ids.get(library.index, [])))
+        # Sidecars may have renamed them
+        rows = _rows_by_id(catalog, inserted)
+        results = [(outcome, result if outcome == "skipped" else dict(zip(ASSET_FIELDS, rows[result["id"]])))
+                   for outcome, result in results]
+    return {**counts, "assets": [result for _, result in results]}
+
+
+def _assets_by_path(db: Session, paths: list[str]) -> dict[str, int]:
+    """Local ids of the assets cataloging `paths`, as their file or as a member."""
+    found = {}
+    for chunk in _chunks(paths):
+        found.update(db.execute(
+            select(models.Asset.directory_path, models.Asset.id).where(models.Asset.directory_path.in_(chunk))).all())
+        for path, asset_id in db.execute(
+                select(models.AssetMember.path, models.AssetMember.asset_id).where(models.AssetMember.path.in_(chunk))):
+            found.setdefault(path, asset_id)
+    return found
+
+
+def _delete_assets(db: Session, local_ids: list[int]) -> None:
+    for chunk in _chunks(local_ids):
+        db.execute(delete(models.AssetTag).where(models.AssetTag.asset_id.in_(chunk)))
+        db.execute(delete(models.AssetMember).where(models.AssetMember.asset_id.in_(chunk)))
+        db.execute(delete(models.Asset).where(models.Asset.id.in_(chunk)))
+    _delete_usage(db, local_ids)
+
+
+def _links_query(originals: list[int]):
+    """Links to any of the catalog-wide ids `originals`."""
+    return select(models.Asset.id, models.Asset.duplicate_of).where(
+        models.Asset.duplicate_of.in_(originals))
+
+
+def _promotions(catalog: Catalog, links: list[tuple], deleted: set[int]) -> dict[int, list[dict]]:
+    """Updates, by library index, that hand deleted originals over to their links.
+
+    `links` are (catalog-wide id, original) pairs. The lowest-id link of each
+    deleted original that is not deleted itself becomes the original, and
+    the other links are pointed at it.
+    """
+    survivors = collections.defaultdict(list)
+    for asset_id, original in links:
+        if asset_id not in deleted:
+            survivors[original].append(asset_id)
+    updates = collections.defaultdict(list)
+    for asset_ids in survivors.values():
+        promoted = min(asset_ids)
+        for asset_id in asset_ids:
+            library, local_id = catalog.resolve_id(asset_id)
+            updates[library.index].append(
+                {"id": local_id, "duplicate_of": None if asset_id == promoted else promoted})
+    return updates
+
+
+def _promote_links(catalog: Catalog, library: Library, db: Session, local_ids: list[int]) -> dict[int, list[dict]]:
+    """Hand the originals among `local_ids`, about to be deleted, over to their links.
+
+    Links in `library` are updated through `db`, so in the same transaction
+    as the delete. Links in other libraries are out of its reach; their
+    updates are returned, to be applied with `_update_links` once the
+    delete is committed.
+    """
+    deleted = {library.global_id(local_id) for local_id in local_ids}
+    links = []
+    for other in catalog.libraries:
+        session = db if other is library else other.SessionLocal()
+        try:
+            for chunk in _chunks(sorted(deleted)):
+                links += [(other.global_id(local_id), original)
+                          for local_id, original in session.execute(_links_query(chunk))]
+        finally:
+            if session is not db:
+                session.close()
+    updates = _promotions(catalog, links, deleted)
+    if library.index in updates:
+        db.execute(update(models.Asset), updates.pop(library.index))
+    return updates
+
+
+def _update_links(catalog: Catalog, updates: dict[int, list[dict]]) -> None:
+    for index, rows in updates.items():
+        with catalog.libraries[index].SessionLocal() as db:
+            db.execute(update(models.Asset), rows)
+            db.commit()
+
+
+def _apply_sync(catalog: Catalog, library: Library, db: Session, upserts: list[AssetCreate],
+                deletes: list[str]) -> tuple:
+    """Update the assets of one library that catalog any file of `upserts`,
+    then delete the assets of `deletes`.
+
+    Returns the upserts that matched no asset, and the counts of updated
+    and deleted assets.
+    """
+    paths = [[asset.directory_path] + [member.path for member in asset.members or ()] for asset in upserts]
+    existing = _assets_by_path(db, [path for asset_paths in paths for path in asset_paths])
+
+    new, updated, merged = [], {}, set()
+    for asset, asset_paths in zip(upserts, paths):
+        matches = sorted({existing[path] for path in asset_paths if path in existing})
+        if not matches:
+            new.append(asset)
+            continue
+        # Files cataloged separately until now, e.g. tiles that became a set,
+        # are folded into the first asset
+        updated[matches[0]] = asset
+        merged.update(matches[1:])
+    merged -= updated.keys()
+
+    if updated:
+        assets = list(updated.values())
+        hashes = fingerprint.fingerprint_many([asset.directory_path for asset in assets])
+        if analysis.ANALYZE_ON_IMPORT:
+            descriptors = analysis.analyze_many([asset.directory_path for asset in assets])
+        else:
+            descriptors = [{}] * len(assets)
+        db.execute(update(models.Asset), [
+            {"id": local_id, "directory_path": asset.directory_path,
+             "fingerprint": quick, "content_hash": content_hash, **asset_descriptors}
+            for (local_id, asset), (quick, content_hash), asset_descriptors
+            in zip(updated.items(), hashes, descriptors)])
+        for chunk in _chunks(list(updated)):
+            db.execute(delete(models.AssetMember).where(models.AssetMember.asset_id.in_(chunk)))
+        members = [row for local_id, asset in updated.items() for row in _member_rows(local_id, asset)]
+        if members:
+            db.execute(insert(models.AssetMember), members)
+
+    # Looked up after the updates, which may have moved a set off a deleted file
+    removed = set(merged)
+    for chunk in _chunks(deletes):
+        removed.update(db.scalars(select(models.Asset.id).where(models.Asset.directory_path.in_(chunk))))
+        db.execute(delete(models.AssetMember).where(models.AssetMember.path.in_(chunk)))
+    links = _promote_links(catalog, library, db, list(removed)) if removed else {}
+    _delete_assets(db, list(removed))
     db.commit()
-    db.refresh(db_asset)
-    return db_asset
+    _update_links(catalog, links)
+    if updated or removed:
+        similarity.index.invalidate()
+    if updated and sidecar.SIDECARS_ON_IMPORT and sidecar.available():
+        _sync_sidecars(db, list(updated))
+    return new, len(updated), len(removed)
+
+
+@router.post("/sync", response_model=SyncResult)
+def sync_assets(body: AssetSync, catalog: Catalog = Depends(libraries.get_catalog)):
+    """
+    Apply a batch of filesystem changes, as sent by the library watcher.
+
+    Each upsert describes the current state of a file or file set. The
+    asset that catalogs any of its files, as its file or a member, is
+    updated: re-fingerprinted, re-analyzed and given the new members,
+    keeping its name and description. Upserts matching no asset are
+    imported like `/import`. Assets whose file is in `deletes` are removed.
+    """
+    upserts = collections.defaultdict(list)
+    for asset in body.upserts:
+        upserts[_target_library(catalog, asset).index].append(asset)
+
+    # Deleted files can be in any library
+    results = catalog.map(
+        lambda library, db: _apply_sync(catalog, library, db, upserts.get(library.index, []), body.deletes))
+    new = [asset for library_new, _, _ in results for asset in library_new]
+    imported = _import_many(catalog, new, body.on_duplicate) if new else {}
+    return {
+        "created": imported.get("created", 0) + imported.get("linked", 0),
+        "updated": sum(updated for _, updated, _ in results),
+        "deleted": sum(deleted for _, _, deleted in results),
+    }
+
+
+@router.post("/usage", response_model=Dict[str, int])
+def record_usage(body: UsageBatch, catalog: Catalog = Depends(libraries.get_catalog)):
+    """
+    Record a batch of usage events, as buffered by the client.
+
+    Each event is kept in `usage_events` and folded into the per-user
+    rollups behind `/recent` and `/favorites`. Returns how many events were
+    recorded; events of unknown assets are dropped.
+    """
+    events = collections.defaultdict(list)
+    for event in body.events:
+        library, local_id = catalog.resolve_id(event.asset_id)
+        if library is not None:
+            events[library.index].append((local_id, event))
+    counts = catalog.map(
+        lambda library, db: _record_usage(db, events[library.index]) if library.index in events else 0)
+    return {"recorded": sum(counts)}
 
 
 # Put endpoints
 
 @router.put("/{asset_id}", response_model=AssetResponse)
-def update_asset(asset_id: int, asset: AssetBase, db: Session = Depends(database.get_db)):
-    db_asset = db.query(models.Asset).filter(
-        models.Asset.id == asset_id).first()
-    if db_asset is None:
-        raise HTTPException(
-            status_code=404, detail=f"Asset with id `{asset_id}` not found")
+def update_asset(asset_id: int, asset: AssetBase, catalog: Catalog = Depends(libraries.get_catalog)):
+    library, local_id = _resolve(catalog, asset_id)
+    with library.SessionLocal() as db:
+        db_asset = db.query(models.Asset).filter(
+            models.Asset.id == local_id).first()
+        if db_asset is None:
+            raise HTTPException(
+                status_code=404, detail=f"Asset with id `{asset_id}` not found")
 
-    db_asset.name = asset.name
-    db_asset.description = asset.description
-    db_asset.directory_path = asset.directory_path
+        db_asset.name = asset.name
+        db_asset.description = asset.description
+        db_asset.directory_path = asset.directory_path
 
-    db.commit()
-    db.refresh(db_asset)
-    return db_asset
+        db.commit()
+        db.refresh(db_asset)
+        return _serialize(library, db_asset)
 
 
 # Delete endpoints
 
 @router.delete("/{asset_id}", response_model=AssetResponse)
-def delete_asset(asset_id: int, db: Session = Depends(database.get_db)):
-    db_asset = db.query(models.Asset).filter(
-        models.Asset.id == asset_id).first()
-    if db_asset is None:
-        raise HTTPException(
-            status_code=404, detail=f"Asset with id `{asset_id}` not found")
+def delete_asset(asset_id: int, catalog: Catalog = Depends(libraries.get_catalog)):
+    library, local_id = _resolve(catalog, asset_id)
+    with library.SessionLocal() as db:
+        db_asset = db.query(models.Asset).filter(
+            models.Asset.id == local_id).first()
+        if db_asset is None:
+            raise HTTPException(
+                status_code=404, detail=f"Asset with id `{asset_id}` not found")
 
-    db.delete(db_asset)
-    db.commit()
-    return db_asset
+        response = _serialize(library, db_asset)
+        links = _promote_links(catalog, library, db, [local_id])
+        db.execute(delete(models.AssetTag).where(models.AssetTag.asset_id == local_id))
+        db.execute(delete(models.AssetMember).where(models.AssetMember.asset_id == local_id))
+        _delete_usage(db, [local_id])
+        db.delete(db_asset)
+        db.commit()
+        _update_links(catalog, links)
+        similarity.index.invalidate()
+        return response
+
+
+@router.post("/admin/fingerprint", response_model=Dict[str, int])
+def fingerprint_assets(
+    full: bool = Query(
+        fingerprint.FULL_HASH, description="Also compute full-file hashes"),
+    catalog: Catalog = Depends(libraries.get_catalog)
+):
+    """Fingerprint assets cataloged without one; returns the count per library."""
+    def _backfill(library: Library, db: Session) -> int:
+        missing = db.query(models.Asset).filter(models.Asset.fingerprint.is_(None)).all()
+        hashes = fingerprint.fingerprint_many([asset.directory_path for asset in missing], full)
+        updated = 0
+        for db_asset, (quick, content_hash) in zip(missing, hashes):
+            if quick:
+                db_asset.fingerprint = quick
+                db_asset.content_hash = content_hash
+                updated += 1
+        db.commit()
+        return updated
+
+    counts = catalog.map(_backfill)
+    return {library.name: n for library, n in zip(catalog.libraries, counts)}
+
+
+@router.post("/admin/analyze", response_model=Dict[str, int])
+def analyze_assets(catalog: Catalog = Depends(libraries.get_catalog)):
+    """
+    Compute image descriptors for assets that have none or were analyzed by
+    an older version; returns the count per library.
+    """
+    def _backfill(library: Library, db: Session) -> int:
+        stale = db.query(models.Asset).filter(or_(
+            models.Asset.analysis_version.is_(None),
+            models.Asset.analysis_version < analysis.ANALYSIS_VERSION)).all()
+        results = analysis.analyze_many([db_asset.directory_path for db_asset in stale])
+        updated = 0
+        for db_asset, descriptors in zip(stale, results):
+            for column, value in descriptors.items():
+                setattr(db_asset, column, value)
+            updated += bool(descriptors)
+        db.commit()
+        similarity.index.invalidate()
+        return updated
+
+    counts = catalog.map(_backfill)
+    return {library.name: n for library, n in zip(catalog.libraries, counts)}
+
+
+@router.post("/admin/sidecars", response_model=Dict[str, int])
+def sync_sidecars(catalog: Catalog = Depends(libraries.get_catalog)):
+    """
+    Read the metadata sidecars next to cataloged assets; returns the number
+    of assets updated per library.
+
+    Sidecars that have not changed since the last sync are not parsed again.
+    """
+    if not sidecar.available():
+        raise HTTPException(status_code=503, detail="Reading sidecars needs PyYAML")
+    counts = catalog.map(lambda library, db: _sync_sidecars(db))
+    return {library.name: n for library, n in zip(catalog.libraries, counts)}
 
 
 @router.delete("/admin/clear-database",
                status_code=status.HTTP_200_OK,
                response_model=Dict[str, str])
-def clear_database(db: Session = Depends(database.get_db)):
-    try:
-        table_names = [
-            table.name for table in models.Base.metadata.sorted_tables]
-        for table_name in reversed(table_names):
-            db.execute(text(f"DELETE FROM {table_name}"))
+def clear_database(catalog: Catalog = Depends(libraries.get_catalog)):
+    table_names = [
+        table.name for table in models.Base.metadata.sorted_tables]
 
-        db.commit()
+    def _clear(library: Library, db: Session) -> None:
+        try:
+            for table_name in reversed(table_names):
+                db.execute(text(f"DELETE FROM {table_name}"))
+            db.commit()
+            similarity.index.invalidate()
+        except Exception:
+            db.rollback()  # Rollback if any errors
+            raise
 
+    try:
+        catalog.map(_clear)
         return {"message": "Database cleared successfully."}
     except Exception as e:
-        db.rollback()  # Rollback if any errors
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to clear database: {e}"
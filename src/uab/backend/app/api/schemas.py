@@ -1,7 +1,7 @@
 """Pydantic models for API request/response."""
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 
 class AssetBase(BaseModel):
@@ -9,11 +9,101 @@ class AssetBase(BaseModel):
     description: Optional[str] = None
     directory_path: str
     preview_image_file_path: Optional[str] = None
+    # Library the asset is cataloged in. When omitted on create, the library
+    # is picked from `directory_path`.
+    library: Optional[str] = None
+
+
+class AssetMember(BaseModel):
+    path: str
+    # PBR channel, UDIM tile and frame number parsed from the file name
+    channel: Optional[str] = None
+    udim: Optional[int] = None
+    frame: Optional[int] = None
+
+
+class AssetCreate(AssetBase):
+    # Files of a texture set, UDIM tiles or frame sequence cataloged as one
+    # asset; `directory_path` is the member its preview is made from
+    members: Optional[List[AssetMember]] = None
 
 
 class AssetResponse(AssetBase):
     id: int
+    # Luminance statistics computed at ingest; None until analyzed
+    luminance_log_average: Optional[float] = None
+    luminance_p50: Optional[float] = None
+    luminance_p95: Optional[float] = None
+    luminance_p99: Optional[float] = None
+    luminance_max: Optional[float] = None
+    sun_intensity: Optional[float] = None
+    sun_azimuth: Optional[float] = None
+    sun_elevation: Optional[float] = None
 
 
     class Config:
         orm_mode = True # For SQLAlchemy models
+
+
+class SimilarAsset(AssetResponse):
+    # 0 for identical descriptors, up to 1
+    distance: float
+
+
+class AssetCount(BaseModel):
+    count: int
+    libraries: Dict[str, int]
+
+
+# What to do when an imported file has the same content as a cataloged one:
+# insert it anyway, insert it as a link to the original, or skip it.
+DuplicatePolicy = Literal["insert", "link", "skip"]
+
+
+class AssetImport(BaseModel):
+    assets: List[AssetCreate]
+    on_duplicate: DuplicatePolicy = "insert"
+
+
+class ImportResult(BaseModel):
+    created: int
+    linked: int
+    skipped: int
+    # The new asset, or the existing one for skipped duplicates, per request
+    assets: List[AssetResponse]
+
+
+class AssetSync(BaseModel):
+    # Current state of new or changed files and file sets
+    upserts: List[AssetCreate] = []
+    # Paths of removed files
+    deletes: List[str] = []
+    on_duplicate: DuplicatePolicy = "insert"
+
+
+class SyncResult(BaseModel):
+    created: int
+    updated: int
+    deleted: int
+
+
+# `viewed` and `spawned` count as uses for Recent; the others set or clear
+# the asset as one of the user's favorites
+UsageEventType = Literal["viewed", "spawned", "favorited", "unfavorited"]
+
+
+class UsageEventIn(BaseModel):
+    asset_id: int
+    user: str
+    event: UsageEventType
+    # Seconds since the epoch
+    timestamp: float
+
+
+class UsageBatch(BaseModel):
+    events: List[UsageEventIn]
+
+
+class DuplicateGroup(BaseModel):
+    fingerprint: str
+    assets: List[AssetResponse]
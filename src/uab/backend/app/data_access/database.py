@@ -1,17 +1,121 @@
 """Handles database interactions."""
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "assets.db")
+DB_PATH = os.environ.get("UAB_DB_PATH", os.path.join(BASE_DIR, "assets.db"))
 SQLITE_DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-engine = create_engine(SQLITE_DATABASE_URL, connect_args={"check_same_thread": False})
+# Connection tuning. Every value can be overridden through the environment.
+# WAL lets searches keep reading while an import is committing, and
+# synchronous=NORMAL is durable enough in WAL mode while avoiding an fsync
+# per commit. A negative cache_size is expressed in KiB.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("UAB_DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("UAB_DB_SYNCHRONOUS", "NORMAL"),
+    "cache_size": int(os.environ.get("UAB_DB_CACHE_SIZE", -64000)),
+    "mmap_size": int(os.environ.get("UAB_DB_MMAP_SIZE", 256 * 1024 * 1024)),
+    "temp_store": os.environ.get("UAB_DB_TEMP_STORE", "MEMORY"),
+    "busy_timeout": int(os.environ.get("UAB_DB_BUSY_TIMEOUT_MS", 5000)),
+}
+POOL_SIZE = int(os.environ.get("UAB_DB_POOL_SIZE", 8))
+POOL_MAX_OVERFLOW = int(os.environ.get("UAB_DB_POOL_MAX_OVERFLOW", 8))
+POOL_TIMEOUT = float(os.environ.get("UAB_DB_POOL_TIMEOUT", 30))
+
+
+def create_sqlite_engine(
+    db_path: str,
+    pragmas: dict | None = None,
+    pool_size: int = POOL_SIZE,
+    max_overflow: int = POOL_MAX_OVERFLOW,
+    pool_timeout: float = POOL_TIMEOUT,
+):
+    """Create an engine for the SQLite file at `db_path` with tuned pragmas.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        pragmas: Pragmas applied to every new connection. Defaults to
+            `SQLITE_PRAGMAS`; pass an empty dict for SQLite's defaults.
+        pool_size: Number of connections kept open in the pool.
+        max_overflow: Extra connections allowed under burst load.
+        pool_timeout: Seconds to wait for a free connection.
+    """
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+    )
+    _listen_for_pragmas(engine, SQLITE_PRAGMAS if pragmas is None else pragmas)
+    return engine
+
+
+def create_async_sqlite_engine(
+    db_path: str,
+    pragmas: dict | None = None,
+    pool_size: int = POOL_SIZE,
+    max_overflow: int = POOL_MAX_OVERFLOW,
+    pool_timeout: float = POOL_TIMEOUT,
+):
+    """Async (aiosqlite) counterpart of `create_sqlite_engine`.
+
+    Requires the optional `aiosqlite` package.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+    )
+    _listen_for_pragmas(engine.sync_engine, SQLITE_PRAGMAS if pragmas is None else pragmas)
+    return engine
+
+
+def _listen_for_pragmas(engine, pragmas: dict) -> None:
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def add_missing_columns(engine, metadata) -> None:
+    """Add columns that the models gained after a database was created.
+
+    `create_all` only creates missing tables. SQLite can add nullable columns
+    in place, which covers new optional fields; their indexes are created too.
+    """
+    inspector = inspect(engine)
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        if not missing:
+            continue
+        with engine.begin() as conn:
+            for column in missing:
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                    f"{column.type.compile(engine.dialect)}"))
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+engine = create_sqlite_engine(DB_PATH)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# The async engine is created on first use so that aiosqlite stays optional.
+_async_session_local = None
+
 def get_db():
     """Get a database session."""
     db = SessionLocal()
@@ -19,3 +123,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_async_session_local():
+    """Async session factory for `DB_PATH`, created on first use."""
+    global _async_session_local
+    if _async_session_local is None:
+        _async_session_local = async_sessionmaker(
+            create_async_sqlite_engine(DB_PATH), autoflush=False, expire_on_commit=False)
+    return _async_session_local
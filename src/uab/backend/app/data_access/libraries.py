@@ -0,0 +1,183 @@
+"""Asset libraries, each stored in its own SQLite shard.
+
+A library is a root directory on disk with its own catalog database. The
+`Catalog` federates queries across every configured library: per-library
+queries run in parallel and the route handlers merge the results.
+
+Libraries are read from the JSON file named by `UAB_LIBRARIES_CONFIG`
+(default `~/.uab/libraries.json`):
+
+    {
+        "libraries": [
+            {"name": "env", "root": "/mnt/library/env"},
+            {"name": "textures", "root": "/mnt/library/tex",
+             "db_path": "/fast_disk/uab/textures.db"}
+        ]
+    }
+
+`db_path` defaults to `<root>/.uab/assets.db`. Without a config file there is
+a single library backed by `database.DB_PATH`.
+
+Asset ids are unique across libraries: the library index is stored in the
+bits above `LOCAL_ID_BITS`, so ids in the first library are unchanged.
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from uab.core.paths import uab_home
+from . import database
+
+T = TypeVar("T")
+
+LOCAL_ID_BITS = 40
+LIBRARIES_CONFIG = os.environ.get(
+    "UAB_LIBRARIES_CONFIG", str(uab_home() / "libraries.json"))
+
+
+class Library:
+    """One library root and the SQLite shard that catalogs it."""
+
+    def __init__(self, index: int, name: str, db_path: str, root: Optional[str] = None, engine=None):
+        self.index = index
+        self.name = name
+        self.root = os.path.normpath(root) if root else None
+        self.db_path = db_path
+        if engine is None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            engine = database.create_sqlite_engine(db_path)
+        self.engine = engine
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self._async_session_local = None
+
+    @property
+    def AsyncSessionLocal(self) -> async_sessionmaker:
+        """Async session factory for this library, created on first use."""
+        if self._async_session_local is None:
+            if self.engine is database.engine:
+                self._async_session_local = database.get_async_session_local()
+            else:
+                self._async_session_local = async_sessionmaker(
+                    database.create_async_sqlite_engine(self.db_path),
+                    autoflush=False, expire_on_commit=False)
+        return self._async_session_local
+
+    def global_id(self, local_id: int) -> int:
+        return (self.index << LOCAL_ID_BITS) | local_id
+
+    def contains(self, path: str) -> bool:
+        if not self.root or not path:
+            return False
+        path = os.path.normpath(path)
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def __repr__(self):
+        return f"<Library(name='{self.name}', db_path='{self.db_path}')>"
+
+
+class Catalog:
+    """Federates queries across all libraries."""
+
+    def __init__(self, libraries: list[Library]):
+        if not libraries:
+            raise ValueError("A catalog needs at least one library.")
+        self.libraries = libraries
+        self._by_name = {library.name: library for library in libraries}
+        self._executor = (
+            ThreadPoolExecutor(max_workers=len(libraries), thread_name_prefix="uab-shard")
+            if len(libraries) > 1 else None
+        )
+
+    @property
+    def default(self) -> Library:
+        return self.libraries[0]
+
+    def create_all(self) -> None:
+        for library in self.libraries:
+            database.Base.metadata.create_all(bind=library.engine)
+            database.add_missing_columns(library.engine, database.Base.metadata)
+
+    def get(self, name: str) -> Library:
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise KeyError(f"Unknown library `{name}`") from None
+
+    def resolve_id(self, asset_id: int) -> tuple[Optional[Library], int]:
+        """Split a global asset id into its library and local id."""
+        index = asset_id >> LOCAL_ID_BITS
+        local_id = asset_id & ((1 << LOCAL_ID_BITS) - 1)
+        library = self.libraries[index] if 0 <= index < len(self.libraries) else None
+        return library, local_id
+
+    def library_for_path(self, path: str) -> Library:
+        """Pick the library whose root contains `path` (deepest root wins)."""
+        matches = [library for library in self.libraries if library.contains(path)]
+        if not matches:
+            return self.default
+        return max(matches, key=lambda library: len(library.root))
+
+    def map(self, fn: Callable[[Library, Session], T]) -> list[T]:
+        """Run `fn(library, session)` on every library, in parallel.
+
+        Results come back in library order. Each call gets its own session,
+        which is closed once `fn` returns.
+        """
+        def _run(library: Library) -> T:
+            with library.SessionLocal() as db:
+                return fn(library, db)
+
+        if self._executor is None:
+            return [_run(library) for library in self.libraries]
+        futures = [
+            self._executor.submit(contextvars.copy_context().run, _run, library)
+            for library in self.libraries
+        ]
+        return [future.result() for future in futures]
+
+    async def amap(self, fn: Callable[[Library, AsyncSession], Awaitable[T]]) -> list[T]:
+        """Async counterpart of `map`, running `fn` on every library concurrently."""
+        async def _run(library: Library) -> T:
+            async with library.AsyncSessionLocal() as db:
+                return await fn(library, db)
+
+        return list(await asyncio.gather(*(_run(library) for library in self.libraries)))
+
+
+def load_libraries(config_path: str = LIBRARIES_CONFIG) -> list[Library]:
+    """Read the library config, falling back to the single default library."""
+    if not os.path.isfile(config_path):
+        return [Library(0, "default", database.DB_PATH, engine=database.engine)]
+
+    with open(config_path) as f:
+        entries = json.load(f).get("libraries", [])
+
+    libraries = []
+    for index, entry in enumerate(entries):
+        root = entry.get("root")
+        db_path = entry.get("db_path")
+        if not db_path:
+            if not root:
+                raise ValueError(
+                    f"Library `{entry.get('name', index)}` needs a `root` or a `db_path`.")
+            db_path = os.path.join(root, ".uab", "assets.db")
+        libraries.append(Library(
+            index, entry.get("name") or f"library_{index}", os.path.expanduser(db_path),
+            root=os.path.expanduser(root) if root else None))
+    return libraries
+
+
+catalog = Catalog(load_libraries())
+
+
+def get_catalog() -> Catalog:
+    """Get the catalog of all configured libraries."""
+    return catalog
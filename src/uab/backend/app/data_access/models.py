@@ -1,7 +1,7 @@
 """SQLAlchemy models."""
 
 
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, LargeBinary, String, Text
 from .database import Base
 
 
@@ -19,6 +19,37 @@ class Asset(Base):
     # VisualAsset Columns
     preview_image_file_path = Column(String, nullable=True)
 
+    # Content fingerprints used to detect duplicates (see `fingerprint.py`)
+    fingerprint = Column(String, nullable=True, index=True)
+    content_hash = Column(String, nullable=True)
+    # Catalog-wide id of the original when imported as a link to a duplicate
+    duplicate_of = Column(Integer, nullable=True)
+
+    # Image descriptors computed at ingest (see `analysis.py`)
+    analysis_version = Column(Integer, nullable=True)
+    phash = Column(Integer, nullable=True)
+    color_histogram = Column(LargeBinary, nullable=True)
+    luminance_log_average = Column(Float, nullable=True, index=True)
+    luminance_p50 = Column(Float, nullable=True)
+    luminance_p95 = Column(Float, nullable=True)
+    luminance_p99 = Column(Float, nullable=True)
+    luminance_max = Column(Float, nullable=True)
+    sun_intensity = Column(Float, nullable=True)
+    sun_azimuth = Column(Float, nullable=True)
+    sun_elevation = Column(Float, nullable=True)
+    # Colour buckets of the palette, most common first
+    dominant_color_1 = Column(Integer, nullable=True, index=True)
+    dominant_color_2 = Column(Integer, nullable=True, index=True)
+    dominant_color_3 = Column(Integer, nullable=True, index=True)
+
+    # Metadata from the asset's sidecar (see `sidecar.py`). The stamp is
+    # `<mtime_ns>:<size>` of the sidecar when it was last parsed.
+    author = Column(String, nullable=True, index=True)
+    date_created = Column(String, nullable=True)
+    date_added = Column(String, nullable=True)
+    sidecar_path = Column(String, nullable=True)
+    sidecar_stamp = Column(String, nullable=True)
+
     # Enable STI
     __mapper_args__ = {
         "polymorphic_on": type,
@@ -28,6 +59,68 @@ class Asset(Base):
     def __repr__(self):
         return f"<Asset(id={self.id}, name='{self.name}', type='{self.type}')>"
 
+class AssetTag(Base):
+    __tablename__ = "asset_tags"
+
+    asset_id = Column(Integer, ForeignKey("assets.id"), primary_key=True)
+    tag = Column(String, primary_key=True, index=True)
+
+    def __repr__(self):
+        return f"<AssetTag(asset_id={self.asset_id}, tag='{self.tag}')>"
+
+class AssetMember(Base):
+    """A file of an asset cataloged as a set (see `uab.core.grouping`):
+    a channel of a texture set, a UDIM tile or a frame of a sequence."""
+    __tablename__ = "asset_members"
+
+    asset_id = Column(Integer, ForeignKey("assets.id"), primary_key=True)
+    path = Column(String, primary_key=True)
+    channel = Column(String, nullable=True)
+    udim = Column(Integer, nullable=True)
+    frame = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<AssetMember(asset_id={self.asset_id}, path='{self.path}')>"
+
+class UsageEvent(Base):
+    """A use of an asset by a user: `viewed`, `spawned`, `favorited` or
+    `unfavorited`. Append-only; queries go through `AssetUsage`."""
+    __tablename__ = "usage_events"
+
+    id = Column(Integer, primary_key=True)
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False, index=True)
+    user = Column(String, nullable=False)
+    event = Column(String, nullable=False)
+    # Seconds since the epoch, when the event happened on the client
+    timestamp = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<UsageEvent(asset_id={self.asset_id}, user='{self.user}', event='{self.event}')>"
+
+class AssetUsage(Base):
+    """Per-user rollup of `UsageEvent`s, updated as events are recorded.
+
+    The indexes cover the Recent and Favorites queries, so listing them
+    reads one index range whatever the number of events.
+    """
+    __tablename__ = "asset_usage"
+
+    user = Column(String, primary_key=True)
+    asset_id = Column(Integer, ForeignKey("assets.id"), primary_key=True)
+    # Last view or spawn; None if the asset was only favorited
+    last_used = Column(Float, nullable=True)
+    use_count = Column(Integer, nullable=False, default=0)
+    # None unless the asset is a favorite
+    favorited_at = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_asset_usage_recent", "user", "last_used", "asset_id"),
+        Index("ix_asset_usage_favorites", "user", "favorited_at", "asset_id"),
+    )
+
+    def __repr__(self):
+        return f"<AssetUsage(asset_id={self.asset_id}, user='{self.user}', use_count={self.use_count})>"
+
 class VisualAsset(Asset):
     # Type for STI
     __mapper_args__ = {
@@ -0,0 +1,250 @@
+"""Request and database instrumentation exposed in Prometheus text format.
+
+`MetricsMiddleware` records, per route template:
+
+- request latency, including the time spent streaming the body,
+- response body size,
+- the number of SQL statements executed, failed ones included, and the time
+  spent in them.
+
+SQL statements are attributed to the request that issued them through a
+context variable, which follows the request into FastAPI's threadpool and
+into `Catalog.map` workers. The metrics are served at `GET /metrics`.
+
+Set `UAB_METRICS_SLOW_REQUESTS=N` to keep the N slowest requests together
+with the SQL they ran. Each request that enters that set is printed, and the
+set is available as JSON at `GET /metrics/slow`.
+"""
+
+import bisect
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_REQUESTS = int(os.environ.get("UAB_METRICS_SLOW_REQUESTS", 0))
+# Statements kept per slow request, so one pathological request cannot hold
+# an unbounded amount of SQL text.
+SLOW_REQUEST_MAX_STATEMENTS = 50
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))  # 256 B .. 64 MiB
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with one series per label set."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            items = [(labels, (list(counts), total, n)) for labels, (counts, total, n) in items]
+        for labels, (counts, total, n) in items:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {n}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "uab_http_request_duration_seconds", "Time to serve a request, including the body.",
+    ("method", "route", "status"), LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram(
+    "uab_http_response_size_bytes", "Response body size.",
+    ("method", "route"), SIZE_BUCKETS)
+DB_QUERIES = Histogram(
+    "uab_db_queries_per_request", "SQL statements executed per request.",
+    ("method", "route"), QUERY_COUNT_BUCKETS)
+DB_TIME = Histogram(
+    "uab_db_time_seconds", "Time spent executing SQL per request.",
+    ("method", "route"), LATENCY_BUCKETS)
+HISTOGRAMS = (REQUEST_DURATION, RESPONSE_SIZE, DB_QUERIES, DB_TIME)
+
+
+class RequestStats:
+    """Database activity of the request being served."""
+
+    __slots__ = ("queries", "db_time", "statements", "_lock")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: Optional[list] = [] if SLOW_REQUESTS else None
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        # Catalog.map can run statements for one request on several threads.
+        with self._lock:
+            self.queries += 1
+            self.db_time += elapsed
+            if self.statements is not None and len(self.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+                self.statements.append({"sql": statement, "ms": round(elapsed * 1000, 3)})
+
+
+_current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "uab_current_request", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info.setdefault("uab_query_start", []).append((statement, time.perf_counter()))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("uab_query_start")
+    if starts:
+        _, start = starts.pop()
+        stats = _current_request.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - start)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for a statement that raised, so its
+    # start would otherwise stay on the pooled connection. Errors raised while
+    # fetching come after that pop, hence the statement check.
+    conn = exception_context.connection
+    starts = conn.info.get("uab_query_start") if conn is not None else None
+    if not starts or starts[-1][0] != exception_context.statement:
+        return
+    _, start = starts.pop()
+    stats = _current_request.get()
+    if stats is not None:
+        stats.record(exception_context.statement, time.perf_counter() - start)
+
+
+class SlowRequestLog:
+    """The N slowest requests seen so far, with their SQL."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._heap: list = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def offer(self, duration: float, method: str, path: str, route: str, stats: RequestStats) -> None:
+        entry = {
+            "duration_ms": round(duration * 1000, 3),
+            "method": method,
+            "path": path,
+            "route": route,
+            "queries": stats.queries,
+            "db_ms": round(stats.db_time * 1000, 3),
+            "sql": stats.statements,
+        }
+        with self._lock:
+            item = (duration, next(self._counter), entry)
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, item)
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+            else:
+                return
+        print(f"Slow request: {method} {path} took {entry['duration_ms']} ms "
+              f"({stats.queries} queries, {entry['db_ms']} ms in SQL)")
+        for statement in stats.statements or []:
+            print(f"    [{statement['ms']} ms] {statement['sql']}")
+
+    def entries(self) -> list[dict]:
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap, reverse=True)]
+
+
+slow_requests = SlowRequestLog(SLOW_REQUESTS) if SLOW_REQUESTS else None
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed bodies are timed to their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def _send(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            duration = time.perf_counter() - start
+            _current_request.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            REQUEST_DURATION.observe((method, route, str(status_code)), duration)
+            RESPONSE_SIZE.observe((method, route), size)
+            DB_QUERIES.observe((method, route), stats.queries)
+            DB_TIME.observe((method, route), stats.db_time)
+            if slow_requests is not None:
+                slow_requests.offer(duration, method, scope["path"], route, stats)
+
+
+router = APIRouter(prefix="/metrics")
+
+
+@router.get("", response_class=PlainTextResponse)
+def get_metrics():
+    """All metrics in Prometheus text exposition format."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
+@router.get("/slow")
+def get_slow_requests():
+    """The slowest requests with their SQL, when `UAB_METRICS_SLOW_REQUESTS` is set."""
+    return slow_requests.entries() if slow_requests is not None else []
@@ -0,0 +1,107 @@
+"""Metadata sidecars shipped next to assets.
+
+A sidecar is a YAML file following `backend/meta/meta_template.yaml`, named
+after the asset: `env.hdr` is described by `env.yaml`, `env.yml` or
+`env.hdr.yaml`, in that order of preference.
+
+Sidecars are identified by a stamp (`<mtime_ns>:<size>`) stored on the asset
+when they are parsed, so a re-sync only parses the files whose stamp
+changed. Discovery lists each asset directory once instead of probing every
+candidate name. Parsing YAML holds the GIL, so large batches are parsed in a
+process pool. Needs PyYAML; without it sidecars are ignored.
+"""
+
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Optional
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+SUFFIXES = (".yaml", ".yml")
+FIELDS = ("name", "description", "author", "date_created", "date_added")
+SIDECARS_ON_IMPORT = os.environ.get("UAB_SIDECARS_ON_IMPORT", "1") == "1"
+SIDECAR_WORKERS = int(os.environ.get("UAB_SIDECAR_WORKERS", min(8, os.cpu_count() or 1)))
+# Below this many files, starting worker processes costs more than it saves
+POOL_THRESHOLD = 256
+
+
+def available() -> bool:
+    return yaml is not None
+
+
+def _candidates(asset_path: str) -> tuple[str, ...]:
+    name = os.path.basename(asset_path)
+    stem = os.path.splitext(name)[0]
+    return tuple(stem + suffix for suffix in SUFFIXES) + (name + SUFFIXES[0],)
+
+
+def find_sidecars(asset_paths: list[str]) -> list[Optional[tuple[str, str]]]:
+    """The sidecar of each asset as `(path, stamp)`, or None if it has none."""
+    by_directory = defaultdict(list)
+    for i, asset_path in enumerate(asset_paths):
+        if asset_path:
+            by_directory[os.path.dirname(asset_path)].append(i)
+
+    found = [None] * len(asset_paths)
+    for directory, indices in by_directory.items():
+        try:
+            with os.scandir(directory or ".") as entries:
+                sidecars = {entry.name: entry for entry in entries
+                            if entry.name.endswith(SUFFIXES) and entry.is_file()}
+        except OSError:
+            continue
+        for i in indices:
+            for candidate in _candidates(asset_paths[i]):
+                entry = sidecars.get(candidate)
+                if entry is not None:
+                    stat = entry.stat()
+                    found[i] = (entry.path, f"{stat.st_mtime_ns}:{stat.st_size}")
+                    break
+    return found
+
+
+def _text(value) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def parse_sidecar(path: str) -> Optional[dict]:
+    """The fields of a sidecar plus a `tags` list, or None if it cannot be read.
+
+    Empty template fields come back as None.
+    """
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        with open(path, "rb") as f:
+            data = yaml.load(f, Loader=loader)
+    except (OSError, yaml.YAMLError) as e:
+        print(f"Cannot read sidecar {path}: {e}")
+        return None
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        print(f"Cannot read sidecar {path}: expected a mapping")
+        return None
+
+    tags = data.get("tags") or []
+    if not isinstance(tags, list):
+        tags = str(tags).split(",")
+    fields = {field: _text(data.get(field)) for field in FIELDS}
+    fields["tags"] = sorted({tag.lower() for tag in map(_text, tags) if tag})
+    return fields
+
+
+def parse_many(paths: list[str], workers: int = SIDECAR_WORKERS) -> list[Optional[dict]]:
+    """`parse_sidecar` for many files, in worker processes for large batches."""
+    if workers <= 1 or len(paths) < POOL_THRESHOLD:
+        return [parse_sidecar(path) for path in paths]
+    # Spawned rather than forked: the server process runs threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+        return list(executor.map(parse_sidecar, paths, chunksize=64))
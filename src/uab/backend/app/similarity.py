@@ -0,0 +1,105 @@
+"""In-memory nearest-neighbour index over the perceptual descriptors.
+
+All descriptors of the catalog are held in NumPy arrays, so a query is one
+vectorized pass over the library: a Hamming distance between pHashes and an
+L2 distance between colour histograms, blended by `PHASH_WEIGHT`. The index
+is loaded on first use and reloaded after a write that adds, changes or
+removes descriptors; those routes call `invalidate` after committing.
+"""
+
+import math
+import threading
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .analysis import HISTOGRAM_SIZE
+from .data_access import models
+from .data_access.libraries import Catalog, Library, get_catalog
+
+# Share of the pHash in the blended distance; the rest is the histogram.
+PHASH_WEIGHT = 0.5
+# Largest L2 distance between two normalized histograms
+_MAX_HISTOGRAM_DISTANCE = math.sqrt(2)
+
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return _BYTE_POPCOUNT[values.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+
+class SimilarityIndex:
+    """pHash and histogram arrays for every analyzed asset in a catalog."""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._stale = True
+        self.ids = np.empty(0, dtype=np.int64)
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.histograms = np.empty((0, HISTOGRAM_SIZE), dtype=np.float32)
+        self.squared_norms = np.empty(0, dtype=np.float32)
+
+    def invalidate(self) -> None:
+        self._stale = True
+
+    def _load(self) -> None:
+        def _fetch(library: Library, db: Session) -> list[tuple]:
+            query = select(models.Asset.id, models.Asset.phash, models.Asset.color_histogram).where(
+                models.Asset.phash.is_not(None), models.Asset.color_histogram.is_not(None))
+            return [(library.global_id(local_id), phash, histogram)
+                    for local_id, phash, histogram in db.execute(query)]
+
+        # Cleared before reading, so a write during the load marks it stale again
+        self._stale = False
+        rows = [row for rows in self.catalog.map(_fetch) for row in rows
+                if len(row[2]) == HISTOGRAM_SIZE * 4]
+        self.ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        self.hashes = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows)).view(np.uint64)
+        self.histograms = np.frombuffer(
+            b"".join(row[2] for row in rows), dtype=np.float32).reshape(len(rows), HISTOGRAM_SIZE)
+        self.squared_norms = np.einsum("ij,ij->i", self.histograms, self.histograms)
+
+    def nearest(self, asset_id: int, k: int) -> list[tuple[int, float]]:
+        """The `k` assets closest to `asset_id` as (id, distance), closest first.
+
+        Distances run from 0 (identical descriptors) to 1. Raises KeyError if
+        `asset_id` has no descriptors.
+        """
+        with self._lock:
+            if self._stale:
+                self._load()
+            ids, hashes, histograms, squared_norms = (
+                self.ids, self.hashes, self.histograms, self.squared_norms)
+
+        matches = np.flatnonzero(ids == asset_id)
+        if not len(matches):
+            raise KeyError(asset_id)
+        position = matches[0]
+
+        hamming = _popcount(hashes ^ hashes[position]).astype(np.float32) / 64
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, a matrix-vector product
+        # instead of a library-sized temporary
+        squared = squared_norms + squared_norms[position] - 2 * (histograms @ histograms[position])
+        l2 = np.sqrt(np.maximum(squared, 0)) / _MAX_HISTOGRAM_DISTANCE
+        distances = PHASH_WEIGHT * hamming + (1 - PHASH_WEIGHT) * l2
+        distances[position] = np.inf
+
+        k = min(k, len(ids) - 1)
+        if k <= 0:
+            return []
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [(int(ids[i]), float(distances[i])) for i in nearest]
+
+
+index = SimilarityIndex(get_catalog())
+
+
+def get_similarity_index() -> SimilarityIndex:
+    return index
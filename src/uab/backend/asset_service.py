@@ -1,23 +1,94 @@
+import atexit
+import json
+import os
 import pathlib as pl
+import threading
 import requests
 
+from uab.backend.snapshot import read_snapshot, write_snapshot
+from uab.backend.transport import create_session
+from uab.backend.usage import UsageRecorder
+from uab.backend.watcher import LibraryWatcher
+from uab.core.paths import cache_dir
+
+# The catalog is consumed as plain dicts, so skip the server's per-row
+# validation (see `app/api/encoding.py`).
+LIST_HEADERS = {"Accept": "application/vnd.uab.fast+json, application/json;q=0.5"}
+# What imports do with files already in the catalog: insert, link or skip
+IMPORT_DUPLICATES = os.environ.get("UAB_IMPORT_DUPLICATES", "link")
+# Assets listed by the Recent view
+RECENT_LIMIT = 100
+
 
 class AssetService:
     def __init__(self, server_url: str, asset_directory_path: str):
         self.url = server_url
+        # Keep-alive sessions, one per thread (see `session`)
+        self._local = threading.local()
         self.asset_directory_path = pl.Path(asset_directory_path)
+        self.snapshot_path = cache_dir("catalog") / "catalog.snap"
+        self._watcher = None
+        self._on_synced = None
+        self.usage = UsageRecorder(self._send_usage)
+        atexit.register(self.usage.close)
+        # Catalog-wide ids of the user's favorites, once loaded
+        self._favorite_ids = None
+
+    @property
+    def session(self) -> requests.Session:
+        """This thread's session; also handles `http+unix://` daemon URLs.
+
+        The GUI, the presenter's fetch threads, the watcher and the usage
+        thread all send requests, and a `requests.Session` is not safe to
+        share between threads.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = create_session()
+        return session
 
     def get_assets(self):
         try:
-            response = requests.get(self.url + "/assets")
+            response = self.session.get(self.url + "/assets/", headers=LIST_HEADERS)
             response.raise_for_status()
-            return response.json()
+            assets = response.json()
+            self._write_snapshot(assets)
+            return assets
         except Exception as e:
             print(e)
 
+    def get_cached_assets(self):
+        """Return the catalog from the last successful `get_assets` call.
+
+        Lets the GUI draw immediately while the server is still starting.
+        Returns an empty list when nothing has been cached yet.
+        """
+        return read_snapshot(self.snapshot_path)
+
+    def _write_snapshot(self, assets: list):
+        try:
+            write_snapshot(self.snapshot_path, assets)
+        except OSError as e:
+            print(f"Error writing catalog snapshot: {e}")
+
+    def iter_assets(self):
+        """Yield every asset in the catalog as it arrives from the server.
+
+        Reads the NDJSON stream from `/assets/stream`, so callers can start
+        processing before the whole catalog has been sent.
+        """
+        try:
+            with self.session.get(self.url + "/assets/stream", stream=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+        except requests.exceptions.RequestException as e:
+            print(f"Error streaming assets: {e}")
+
     def get_asset_by_id(self, asset_id: int):
         try:
-            response = requests.get(self.url + f"/assets/{asset_id}")
+            response = self.session.get(self.url + f"/assets/{asset_id}")
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -25,29 +96,141 @@ class AssetService:
 
     def search_assets(self, text: str):
         try:
-            response = requests.get(self.url + f"/assets/search?name={text}")
+            response = self.session.get(
+                self.url + f"/assets/search?name={text}", headers=LIST_HEADERS)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error searching assets: {e}")
 
+    def record_usage(self, asset_id: int, event: str):
+        """Record that the asset was `viewed` or `spawned`; sent in the background."""
+        self.usage.record(asset_id, event)
+
+    def _send_usage(self, events: list) -> bool:
+        try:
+            response = self.session.post(self.url + "/assets/usage", json={"events": events})
+            response.raise_for_status()
+            return True
+        except requests.exceptions.RequestException as e:
+            print(f"Error recording {len(events)} usage events: {e}")
+            return False
+
+    def get_recent_assets(self, limit: int = RECENT_LIMIT):
+        """The user's most recently viewed or spawned assets, latest first."""
+        return self._get_usage_view("/assets/recent", {"limit": limit})
+
+    def get_favorite_assets(self):
+        """The user's favorite assets, most recently favorited first."""
+        assets = self._get_usage_view("/assets/favorites", {})
+        if assets is not None:
+            self._favorite_ids = {asset["id"] for asset in assets}
+        return assets
+
+    def _get_usage_view(self, path: str, params: dict):
+        # Buffered events first, so the view includes the latest clicks
+        self.usage.flush()
+        try:
+            response = self.session.get(
+                self.url + path, params={"user": self.usage.user, **params}, headers=LIST_HEADERS)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error getting {path}: {e}")
+
+    def is_favorite(self, asset_id: int) -> bool:
+        """Whether the asset is a favorite; False until `get_favorite_assets` ran."""
+        return self._favorite_ids is not None and asset_id in self._favorite_ids
+
+    def set_favorite(self, asset_id: int, favorite: bool):
+        self.usage.record(asset_id, "favorited" if favorite else "unfavorited")
+        if self._favorite_ids is not None:
+            if favorite:
+                self._favorite_ids.add(asset_id)
+            else:
+                self._favorite_ids.discard(asset_id)
+
     def set_asset_directory(self, directory_path: str):
         """Update the asset directory and recreate the sync service."""
         self.asset_directory_path = pl.Path(directory_path)
+        if self._watcher is not None:
+            self.watch(self._on_synced)
+
+    def watch(self, on_synced=None):
+        """Keep the catalog in sync with the asset directory until `stop_watching`.
+
+        Changed files are sent to the server in batches (see
+        `uab.backend.watcher`). `on_synced` is called from the watcher's
+        thread with the server's counts after each applied batch.
+        """
+        self.stop_watching()
+        self._on_synced = on_synced
+        if not self.asset_directory_path.is_dir():
+            print(f"Not watching {self.asset_directory_path}: no such directory")
+            return
+        self._watcher = LibraryWatcher(str(self.asset_directory_path), self._apply_changes)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _apply_changes(self, file_sets: list, singles: list, deleted: list) -> bool:
+        upserts = ([self.create_asset_req_body_from_set(file_set) for file_set in file_sets]
+                   + [self.create_asset_req_body_from_path(path) for path in singles])
+        result = self.sync_assets(upserts, deleted)
+        if result is None:
+            return False
+        if self._on_synced is not None and any(result.values()):
+            self._on_synced(result)
+        return True
+
+    def sync_assets(self, upserts: list, deletes: list, on_duplicate: str = IMPORT_DUPLICATES):
+        """Apply new, changed and removed files to the catalog in one request.
+
+        Returns the server's counts of created, updated and deleted assets,
+        or None on error.
+        """
+        try:
+            response = self.session.post(
+                self.url + "/assets/sync",
+                json={"upserts": upserts, "deletes": deletes, "on_duplicate": on_duplicate})
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error syncing {len(upserts)} changed and {len(deletes)} removed files: {e}")
 
-    def add_asset_to_db(self, asset_request_body: dict):
+    def add_asset_to_db(self, asset_request_body: dict, on_duplicate: str = IMPORT_DUPLICATES):
         asset_name = asset_request_body.get('name', 'unknown')
         asset_path = asset_request_body.get('directory_path', '')
         try:
-            response = requests.post(
-                self.url + "/assets", json=asset_request_body)
+            response = self.session.post(
+                self.url + "/assets/", json=asset_request_body,
+                params={"on_duplicate": on_duplicate})
             response.raise_for_status()  # Raise an exception for bad status codes
+            return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error posting asset {asset_name} at {asset_path}: {e}")
 
+    def import_assets(self, asset_request_bodies: list, on_duplicate: str = IMPORT_DUPLICATES):
+        """Catalog many assets in one request.
+
+        Returns the server's counts of created, linked and skipped assets,
+        or None on error.
+        """
+        try:
+            response = self.session.post(
+                self.url + "/assets/import",
+                json={"assets": asset_request_bodies, "on_duplicate": on_duplicate})
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"Error importing {len(asset_request_bodies)} assets: {e}")
+
     def remove_asset_from_db(self, asset_id: int):
         try:
-            response = requests.delete(self.url + f"/assets/{asset_id}")
+            response = self.session.delete(self.url + f"/assets/{asset_id}")
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
             print(f"Error deleting asset with id {asset_id}: {e}")
@@ -58,3 +241,12 @@ class AssetService:
             'name': pl.Path(asset_path).name,
             'directory_path': asset_path
         }
+
+    @staticmethod
+    def create_asset_req_body_from_set(file_set: dict):
+        """Request body cataloging a `grouping.group_files` set as one asset."""
+        return {
+            'name': file_set['name'],
+            'directory_path': file_set['representative'],
+            'members': file_set['members'],
+        }
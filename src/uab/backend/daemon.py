@@ -0,0 +1,275 @@
+"""Standalone backend daemon shared by every UAB client on the machine.
+
+The first client to need the backend spawns this module as a detached
+process; later clients (other Houdini sessions or panes, the desktop app)
+find it through a state file under `~/.uab/daemon` and reuse it, so the
+catalog's SQLite caches and the similarity index stay warm across DCC
+sessions. Preview and thumbnail caches live in each GUI process and are not
+shared. The daemon holds a
+lock for its address while it runs and exits after `UAB_DAEMON_IDLE_TIMEOUT`
+seconds without requests. Connected clients send a heartbeat, so that only
+happens once they are all gone.
+
+    python -m uab.backend.daemon --port 8750
+    python -m uab.backend.daemon --uds ~/.uab/daemon/uab.sock
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on the port bind failing instead
+    fcntl = None
+
+from uab.core.paths import uab_home
+
+HOST = "127.0.0.1"
+DAEMON_PORT = int(os.environ.get("UAB_DAEMON_PORT", "8750"))
+# When set, the daemon listens on this Unix domain socket instead of TCP
+DAEMON_SOCKET = os.environ.get("UAB_DAEMON_SOCKET") or None
+IDLE_TIMEOUT = float(os.environ.get("UAB_DAEMON_IDLE_TIMEOUT", "3600"))
+# Seconds between client heartbeats, well below IDLE_TIMEOUT
+HEARTBEAT_INTERVAL = min(60.0, IDLE_TIMEOUT / 3) if IDLE_TIMEOUT > 0 else 60.0
+SPAWN_TIMEOUT = 60.0
+
+
+def state_dir() -> Path:
+    path = uab_home() / "daemon"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _address_key(port: int, uds: str | None) -> str:
+    if uds:
+        return "uds-" + hashlib.sha1(os.path.abspath(uds).encode()).hexdigest()[:12]
+    return f"tcp-{port}"
+
+
+def _paths(port: int, uds: str | None) -> dict[str, Path]:
+    key = _address_key(port, uds)
+    directory = state_dir()
+    return {
+        "lock": directory / f"{key}.lock",
+        "state": directory / f"{key}.json",
+        "log": directory / f"{key}.log",
+    }
+
+
+def daemon_url(port: int = DAEMON_PORT, uds: str | None = DAEMON_SOCKET) -> str:
+    if uds:
+        from uab.backend.transport import unix_socket_url
+        return unix_socket_url(os.path.abspath(uds))
+    return f"http://{HOST}:{port}"
+
+
+def _acquire_lock(path: Path):
+    """Take the daemon lock for an address, or return None if it is held."""
+    f = open(path, "a+")
+    if fcntl is None:
+        return f
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+# -- Client side ---------------------------------------------------------------
+
+def discover(port: int = DAEMON_PORT, uds: str | None = DAEMON_SOCKET, timeout: float = 1.0) -> str | None:
+    """Return the URL of a live daemon for this address, or None."""
+    try:
+        state = json.loads(_paths(port, uds)["state"].read_text())
+    except (OSError, ValueError):
+        return None
+
+    from uab.backend.transport import create_session
+
+    try:
+        with create_session() as session:
+            response = session.get(state["url"] + "/health", timeout=timeout)
+            response.raise_for_status()
+            health = response.json()
+    except Exception:
+        return None
+    # Something else may have taken over the port after a crash
+    if health.get("pid") != state.get("pid"):
+        return None
+    return state["url"]
+
+
+def find_python() -> str:
+    """A plain Python interpreter to run the daemon with.
+
+    Inside a DCC `sys.executable` is the DCC binary (e.g. `houdini`), which
+    cannot run `-m`, so look for the interpreter it embeds instead.
+
+    Raises:
+        RuntimeError: If `UAB_DAEMON_PYTHON` is unset and none is found.
+    """
+    configured = os.environ.get("UAB_DAEMON_PYTHON")
+    if configured:
+        return configured
+    for candidate in (getattr(sys, "_base_executable", None), sys.executable):
+        if candidate and os.path.basename(candidate).lower().startswith("python"):
+            return candidate
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    names = (f"python{version}", f"python{sys.version_info.major}", "python", "python.exe")
+    directories = (os.path.join(sys.exec_prefix, "bin"), sys.exec_prefix, os.path.dirname(sys.executable))
+    for directory in directories:
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return path
+    raise RuntimeError(
+        f"No Python interpreter found to run the backend daemon ({sys.executable} is not one); "
+        f"set UAB_DAEMON_PYTHON to a Python {version} with uab installed")
+
+
+def ensure_daemon(port: int = DAEMON_PORT, uds: str | None = DAEMON_SOCKET, timeout: float = SPAWN_TIMEOUT) -> str:
+    """Return the URL of a running daemon, spawning one if there is none.
+
+    Raises RuntimeError if no interpreter is found for it (see `find_python`)
+    or a spawned daemon does not come up within `timeout`.
+    """
+    url = discover(port, uds)
+    if url:
+        return url
+
+    paths = _paths(port, uds)
+    python = find_python()
+    command = [python, "-m", "uab.backend.daemon"]
+    command += ["--uds", os.path.abspath(uds)] if uds else ["--port", str(port)]
+    print(f"Starting backend daemon: {' '.join(command)}")
+    with open(paths["log"], "ab") as log:
+        # A new session, so closing the DCC that spawned it does not kill it.
+        # If two clients race, the loser's daemon exits on the lock.
+        process = subprocess.Popen(
+            command, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            start_new_session=True)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        url = discover(port, uds)
+        if url:
+            return url
+        if process.poll() not in (None, 0):
+            break
+        time.sleep(0.1)
+    raise RuntimeError(f"Backend daemon did not start, see {paths['log']}")
+
+
+def heartbeat(url: str) -> bool:
+    """Tell the daemon a client is still connected."""
+    from uab.backend.transport import create_session
+
+    try:
+        with create_session() as session:
+            session.get(url + "/health", timeout=5).raise_for_status()
+        return True
+    except Exception as e:
+        print(f"Backend daemon heartbeat failed: {e}")
+        return False
+
+
+# -- Daemon side -----------------------------------------------------------------
+
+class _ActivityTracker:
+    """ASGI wrapper recording when the last HTTP request finished."""
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+        self.last_active = time.monotonic()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            self.last_active = time.monotonic()
+
+    def idle_for(self) -> float:
+        return 0.0 if self.in_flight else time.monotonic() - self.last_active
+
+
+def _remove_state(path: Path):
+    try:
+        if json.loads(path.read_text()).get("pid") == os.getpid():
+            path.unlink()
+    except (OSError, ValueError):
+        pass
+
+
+def serve(port: int = DAEMON_PORT, uds: str | None = DAEMON_SOCKET, idle_timeout: float = IDLE_TIMEOUT) -> int:
+    paths = _paths(port, uds)
+    lock = _acquire_lock(paths["lock"])
+    if lock is None:
+        print(f"A backend daemon is already running for {daemon_url(port, uds)}")
+        return 0
+
+    import uvicorn
+    from uab.backend.server import app
+
+    url = daemon_url(port, uds)
+    tracker = _ActivityTracker(app)
+
+    class _DaemonServer(uvicorn.Server):
+        async def startup(self, sockets=None):
+            await super().startup(sockets=sockets)
+            if self.started:
+                # Published only once the socket accepts connections
+                state = {"url": url, "pid": os.getpid(), "started": time.time()}
+                tmp_path = paths["state"].with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(state))
+                os.replace(tmp_path, paths["state"])
+                print(f"Backend daemon ready at {url}", flush=True)
+
+        async def on_tick(self, counter):
+            # Ticks come every 0.1 s; check for idleness about once a second
+            if idle_timeout > 0 and counter % 10 == 0 and tracker.idle_for() > idle_timeout:
+                print(f"Idle for {idle_timeout:.0f}s, shutting down", flush=True)
+                return True
+            return await super().on_tick(counter)
+
+        async def shutdown(self, sockets=None):
+            # Done here rather than after `run`: uvicorn re-raises SIGTERM
+            # once the server has stopped, which ends the process
+            _remove_state(paths["state"])
+            await super().shutdown(sockets=sockets)
+
+    if uds:
+        config = uvicorn.Config(tracker, uds=os.path.abspath(uds), log_level="warning")
+    else:
+        config = uvicorn.Config(tracker, host=HOST, port=port, log_level="warning")
+    try:
+        _DaemonServer(config).run()
+    finally:
+        _remove_state(paths["state"])
+        lock.close()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=DAEMON_PORT)
+    parser.add_argument("--uds", default=DAEMON_SOCKET, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="seconds without requests before exiting; 0 disables")
+    args = parser.parse_args(argv)
+    return serve(args.port, args.uds, args.idle_timeout)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
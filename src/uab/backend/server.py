@@ -1,12 +1,14 @@
 """Entry point for the backend."""
 
 
+import os
 from fastapi import FastAPI
-from uab.backend.app.data_access.database import engine, Base
+from uab.backend.app.data_access.libraries import catalog
 from uab.backend.app.api.routes import router
+from uab.backend.app import metrics
 
 
-Base.metadata.create_all(bind=engine)
+catalog.create_all()
 
 app = FastAPI(
     title="Universal Asset Browser",
@@ -14,6 +16,27 @@ app = FastAPI(
     version="0.0.1",
 )
 
-print(f"Connecting to DB at {engine.url}")
+for library in catalog.libraries:
+    print(f"Connecting to library `{library.name}` at {library.engine.url}")
+
+# "sync" serves the CRUD and search routes from FastAPI's threadpool, "async"
+# from async handlers on aiosqlite. Routes without an async version are
+# served by the sync router in both modes.
+API_MODE = os.environ.get("UAB_API_MODE", "sync")
+if API_MODE == "async":
+    from uab.backend.app.api.async_routes import router as async_router
+    app.include_router(async_router)
+elif API_MODE != "sync":
+    raise ValueError(f"Invalid UAB_API_MODE: {API_MODE}")
 
 app.include_router(router)
+
+
+@app.get("/health")
+def health():
+    """Liveness probe, also used by clients to identify a running daemon."""
+    return {"status": "ok", "pid": os.getpid(), "version": app.version}
+
+
+app.add_middleware(metrics.MetricsMiddleware)
+app.include_router(metrics.router)
@@ -0,0 +1,148 @@
+"""Compact binary snapshot of the catalog, read at startup before the server.
+
+Layout (little endian):
+
+    header   8s magic, I version, I count, Q offset of the string blob
+    records  count x (q id, I offset and I length per field in FIELDS,
+             then d per field in FLOAT_FIELDS)
+    strings  UTF-8 blob
+
+A length of `NULL` marks a None string, NaN a None number. The file is
+memory-mapped and read as a `Snapshot`, a sequence that decodes a record
+only when it is indexed. Opening one costs the same for 100 or 100,000
+assets, so the browser can draw the first screen before the rest of the
+catalog has been looked at.
+
+A `Snapshot` keeps its file mapped until it is garbage collected. Writers
+replace the file by renaming, which leaves a mapped copy intact on POSIX;
+on Windows the rename fails while a `Snapshot` of the file is alive.
+"""
+
+import math
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+from pathlib import Path
+
+MAGIC = b"UABSNAP\0"
+VERSION = 2
+# Fields stored per asset, besides the id. Changing them needs a new
+# VERSION; snapshots with another version are ignored.
+FIELDS = ("library", "name", "description", "directory_path", "preview_image_file_path")
+FLOAT_FIELDS = (
+    "luminance_log_average", "luminance_p50", "luminance_p95", "luminance_p99", "luminance_max",
+    "sun_intensity", "sun_azimuth", "sun_elevation",
+)
+
+_HEADER = struct.Struct("<8sIIQ")
+_RECORD = struct.Struct("<q" + "II" * len(FIELDS) + "d" * len(FLOAT_FIELDS))
+NULL = 0xFFFFFFFF
+_FIRST_FLOAT = 1 + 2 * len(FIELDS)
+
+
+def write_snapshot(path: str | Path, assets: list[dict]) -> None:
+    """Write `assets` to `path`, replacing any previous snapshot atomically."""
+    path = Path(path)
+    records = bytearray()
+    strings = bytearray()
+    for asset in assets:
+        values = [asset.get("id") or 0]
+        for field in FIELDS:
+            value = asset.get(field)
+            if value is None:
+                values += (0, NULL)
+                continue
+            encoded = str(value).encode("utf-8")
+            values += (len(strings), len(encoded))
+            strings += encoded
+        for field in FLOAT_FIELDS:
+            value = asset.get(field)
+            values.append(math.nan if value is None else value)
+        records += _RECORD.pack(*values)
+
+    header = _HEADER.pack(MAGIC, VERSION, len(assets), _HEADER.size + len(records))
+    # Write then rename, so a concurrent reader never sees a partial file
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(records)
+        f.write(strings)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str | Path) -> Sequence[dict]:
+    """Return the assets in the snapshot at `path`, as a `Snapshot`.
+
+    Returns an empty list if there is no snapshot or it cannot be used.
+    """
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return Snapshot(mm)
+    except (OSError, ValueError, struct.error):
+        return []
+
+
+class Snapshot(Sequence):
+    """Read-only sequence of the asset dicts in a mapped snapshot.
+
+    Each access decodes the record into a new dict. Compares equal to any
+    sequence of the same dicts, e.g. the catalog the server returns.
+
+    Raises:
+        ValueError: If the map does not hold a complete snapshot of this VERSION.
+    """
+
+    def __init__(self, mm: mmap.mmap):
+        magic, version, count, strings_offset = _HEADER.unpack_from(mm)
+        if magic != MAGIC or version != VERSION or strings_offset != _HEADER.size + count * _RECORD.size \
+                or strings_offset > len(mm):
+            raise ValueError("Not a catalog snapshot of this version")
+        self._mm = mm
+        self._count = count
+        self._strings_offset = strings_offset
+        # Strings are written in record order, so the last one ends the file
+        if strings_offset + self._strings_size() != len(mm):
+            raise ValueError("Truncated catalog snapshot")
+
+    def _strings_size(self) -> int:
+        for index in range(self._count - 1, -1, -1):
+            values = _RECORD.unpack_from(self._mm, _HEADER.size + index * _RECORD.size)
+            ends = [offset + length for offset, length in zip(values[1:_FIRST_FLOAT:2], values[2:_FIRST_FLOAT:2])
+                    if length != NULL]
+            if ends:
+                return max(ends)
+        return 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Snapshot index out of range")
+        values = _RECORD.unpack_from(self._mm, _HEADER.size + index * _RECORD.size)
+        asset = {"id": values[0]}
+        for i, field in enumerate(FIELDS):
+            offset, length = values[1 + 2 * i], values[2 + 2 * i]
+            if length == NULL:
+                asset[field] = None
+            else:
+                start = self._strings_offset + offset
+                asset[field] = str(self._mm[start:start + length], "utf-8")
+        for field, value in zip(FLOAT_FIELDS, values[_FIRST_FLOAT:]):
+            asset[field] = None if value != value else value
+        return asset
+
+    def __eq__(self, other) -> bool:
+        if other is self:
+            return True
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(other) == self._count and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
@@ -0,0 +1,77 @@
+"""HTTP sessions for talking to the backend over TCP or a Unix domain socket.
+
+A backend listening on a Unix socket is addressed as
+`http+unix://<percent-encoded socket path>`, e.g.
+`http+unix://%2Ftmp%2Fuab.sock/assets`. `unix_socket_url` builds such URLs.
+"""
+
+import socket
+from urllib.parse import quote, unquote, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+
+UNIX_SCHEME = "http+unix"
+
+
+def unix_socket_url(socket_path: str) -> str:
+    return f"{UNIX_SCHEME}://{quote(str(socket_path), safe='')}"
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, socket_path: str, **kwargs):
+        super().__init__("localhost", **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # urllib3 passes a sentinel rather than a number when no timeout is set
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+
+class _UnixHTTPConnectionPool(HTTPConnectionPool):
+    def __init__(self, socket_path: str, **kwargs):
+        super().__init__("localhost", **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self):
+        return _UnixHTTPConnection(self.socket_path, timeout=self.timeout.connect_timeout)
+
+
+class UnixSocketAdapter(HTTPAdapter):
+    """Requests transport adapter for `http+unix://` URLs."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._pools: dict[str, _UnixHTTPConnectionPool] = {}
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self.get_connection(request.url, proxies)
+
+    def get_connection(self, url, proxies=None):
+        socket_path = unquote(urlparse(url).netloc)
+        pool = self._pools.get(socket_path)
+        if pool is None:
+            pool = self._pools[socket_path] = _UnixHTTPConnectionPool(socket_path)
+        return pool
+
+    def request_url(self, request, proxies):
+        return request.path_url
+
+    def close(self):
+        for pool in self._pools.values():
+            pool.close()
+        self._pools.clear()
+        super().close()
+
+
+def create_session() -> requests.Session:
+    """A keep-alive session that understands both `http://` and `http+unix://`."""
+    session = requests.Session()
+    session.mount(f"{UNIX_SCHEME}://", UnixSocketAdapter())
+    return session
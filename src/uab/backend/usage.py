@@ -0,0 +1,91 @@
+"""Client-side buffering of asset usage events.
+
+Views, spawns and favorite changes are recorded from GUI handlers, so
+`UsageRecorder.record` only appends to a buffer. A background thread sends
+the buffer to the server's `/assets/usage` in one request every
+`UAB_USAGE_FLUSH_SECONDS`, or sooner once `MAX_BATCH` events are waiting.
+Batches that fail to send are kept, up to `MAX_BUFFERED` events, and sent
+with the next one.
+"""
+
+import getpass
+import os
+import threading
+import time
+from typing import Callable
+
+FLUSH_INTERVAL = float(os.environ.get("UAB_USAGE_FLUSH_SECONDS", "2"))
+MAX_BATCH = 500
+MAX_BUFFERED = 10_000
+
+
+def current_user() -> str:
+    """The user usage is recorded for: `UAB_USER`, else the login name."""
+    user = os.environ.get("UAB_USER")
+    if user:
+        return user
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return "default"
+
+
+class UsageRecorder:
+    """Buffers usage events and hands them to `send` in batches.
+
+    `send` gets a list of event dicts and returns False if they could not
+    be delivered.
+    """
+
+    def __init__(self, send: Callable[[list[dict]], bool], user: str = None,
+                 interval: float = FLUSH_INTERVAL):
+        self.send = send
+        self.user = user or current_user()
+        self.interval = interval
+        self._buffer: list[dict] = []
+        self._lock = threading.Lock()
+        # Held while a batch is sent, so batches arrive in order
+        self._send_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, asset_id: int, event: str) -> None:
+        """Queue an event; never blocks on the server."""
+        with self._lock:
+            self._buffer.append(
+                {"asset_id": asset_id, "user": self.user, "event": event, "timestamp": time.time()})
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="uab-usage", daemon=True)
+                self._thread.start()
+            if len(self._buffer) >= MAX_BATCH:
+                self._wake.set()
+
+    def flush(self) -> bool:
+        """Send everything buffered now; returns False if it could not be sent."""
+        with self._send_lock:
+            with self._lock:
+                events, self._buffer = self._buffer, []
+            if not events:
+                return True
+            if self.send(events):
+                return True
+            with self._lock:
+                # Keep the newest events if the server stays unreachable
+                self._buffer = (events + self._buffer)[-MAX_BUFFERED:]
+            return False
+
+    def close(self) -> None:
+        """Stop the background thread and send what is left."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.flush()
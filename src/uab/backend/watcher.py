@@ -0,0 +1,428 @@
+"""Keeps the catalog in sync with a library directory while the app runs.
+
+`LibraryWatcher` follows a directory tree and reports added, changed and
+removed image files, so the catalog does not need periodic full rescans.
+
+- On Linux it uses inotify (through libc, no extra dependency). inotify
+  does not see changes made by other machines on network mounts, so NFS,
+  SMB, FUSE and similar filesystems are polled instead, as on other
+  platforms. A poll only lists the directories whose modification time
+  changed; in-place edits are caught by a full stat pass every
+  `FULL_SCAN_POLLS` polls.
+- Events are coalesced per file. A burst, such as a copy of a whole
+  texture set, is applied as one batch once the tree has been quiet for
+  `UAB_WATCH_SETTLE_SECONDS`, or after `MAX_BATCH_DELAY` seconds at most.
+- A file is only applied once its size and modification time stayed the
+  same for a settle interval, so partially written files are not read.
+- Changed files are regrouped with their directory siblings (see
+  `uab.core.grouping`), so a new UDIM tile updates its set instead of
+  becoming an asset of its own.
+
+The watcher calls `apply(file_sets, singles, deleted)` from its own thread;
+`AssetService.watch` sends that to the server's `/assets/sync` in one
+request. Hidden files and directories (e.g. `.uab`) are ignored. Changes
+made while the app was closed are not picked up.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from uab.core import decoders, grouping
+
+WATCH_MODE = os.environ.get("UAB_WATCH", "auto")
+POLL_INTERVAL = float(os.environ.get("UAB_WATCH_POLL_SECONDS", "5"))
+SETTLE_SECONDS = float(os.environ.get("UAB_WATCH_SETTLE_SECONDS", "2"))
+# Longest a change waits while a burst of events goes on
+MAX_BATCH_DELAY = 30.0
+FULL_SCAN_POLLS = 12
+# Filesystems where inotify misses remote changes; "fuse.*" types count too
+NETWORK_FILESYSTEMS = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs", "ceph", "glusterfs", "lustre", "davfs",
+}
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE
+               | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+_EVENT = struct.Struct("iIII")
+
+# Called with (file sets, single paths, deleted paths); returns False to retry later
+ApplyChanges = Callable[[list[dict], list[str], list[str]], bool]
+
+
+def _relevant(name: str) -> bool:
+    return not name.startswith(".") and decoders.is_supported(name)
+
+
+def _signature(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def filesystem_type(path: str) -> str:
+    """Type of the filesystem `path` is on, from /proc/self/mounts; empty if unknown."""
+    path = os.path.realpath(path)
+    mount_point, fs_type = "", ""
+    try:
+        with open("/proc/self/mounts") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                point = fields[1].replace("\\040", " ")
+                if (path == point or path.startswith(point.rstrip("/") + "/")) and len(point) >= len(mount_point):
+                    mount_point, fs_type = point, fields[2]
+    except OSError:
+        pass
+    return fs_type
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def resolve_mode(root: str, mode: str = WATCH_MODE) -> str:
+    """"inotify", "poll" or "off" for watching `root` in `mode`."""
+    if mode != "auto":
+        return mode
+    fs_type = filesystem_type(root)
+    if _load_inotify() is None or fs_type in NETWORK_FILESYSTEMS or fs_type.startswith("fuse"):
+        return "poll"
+    return "inotify"
+
+
+class LibraryWatcher:
+    """Reports file changes under `root` in batches; see the module docstring."""
+
+    def __init__(self, root: str, apply: ApplyChanges, mode: str = WATCH_MODE,
+                 settle: float = SETTLE_SECONDS, poll_interval: float = POLL_INTERVAL):
+        self.root = os.path.normpath(str(root))
+        self.apply = apply
+        self.mode = resolve_mode(self.root, mode)
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._condition = threading.Condition()
+        # path -> (time of the last event, signature at the last event or check)
+        self._pending: dict[str, tuple[float, Optional[tuple]]] = {}
+        self._last_event = 0.0
+        self._batch_started = 0.0
+        # Relevant files under root, by directory. Only the watching thread
+        # changes it, under `_files_lock`; the flush thread copies under it.
+        self._files: dict[str, set[str]] = {}
+        self._files_lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if self.mode == "off" or self._threads:
+            return
+        target = self._watch_inotify if self.mode == "inotify" else self._watch_poll
+        self._threads = [
+            threading.Thread(target=target, name="uab-watch", daemon=True),
+            threading.Thread(target=self._flush_loop, name="uab-watch-flush", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=5)
+        self._threads = []
+
+    # Events
+
+    def _changed(self, paths) -> None:
+        if not paths:
+            return
+        now = time.monotonic()
+        with self._condition:
+            for path in paths:
+                self._pending[path] = (now, _signature(path))
+            if not self._batch_started:
+                self._batch_started = now
+            self._last_event = now
+            self._condition.notify_all()
+
+    def _scan_directory(self, directory: str) -> tuple[set[str], list[str]]:
+        """Relevant files and visible subdirectories of `directory`."""
+        files, directories = set(), []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith("."):
+                                directories.append(entry.path)
+                        elif _relevant(entry.name) and entry.is_file():
+                            files.add(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files, directories
+
+    def _walk(self, directory: str, on_directory: Callable[[str], None] = None) -> list[str]:
+        """Record the files under `directory`; returns them."""
+        found, stack = [], [directory]
+        while stack:
+            current = stack.pop()
+            files, directories = self._scan_directory(current)
+            with self._files_lock:
+                self._files[current] = files
+            found.extend(files)
+            if on_directory is not None:
+                on_directory(current)
+            stack.extend(directories)
+        return found
+
+    def _forget_tree(self, directory: str) -> list[str]:
+        """Stop tracking `directory` and its subdirectories; returns their files."""
+        prefix = directory + os.sep
+        with self._files_lock:
+            removed = [d for d in self._files if d == directory or d.startswith(prefix)]
+            return [path for d in removed for path in self._files.pop(d)]
+
+    # inotify
+
+    def _watch_inotify(self) -> None:
+        libc = _load_inotify()
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            print(f"Cannot start inotify ({os.strerror(ctypes.get_errno())}); polling {self.root}")
+            self._watch_poll()
+            return
+        watches: dict[int, str] = {}
+
+        def add_watch(directory: str) -> None:
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, "inotify watch limit reached (fs.inotify.max_user_watches)")
+                return
+            watches[wd] = directory
+
+        try:
+            try:
+                self._walk(self.root, add_watch)
+            except OSError as e:
+                print(f"Cannot watch {self.root} with inotify ({e.strerror}); polling instead")
+                os.close(fd)
+                self._watch_poll()
+                return
+            buffer = b""
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    buffer += os.read(fd, 1 << 16)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                changed = []
+                while offset + _EVENT.size <= len(buffer):
+                    wd, mask, _cookie, length = _EVENT.unpack_from(buffer, offset)
+                    end = offset + _EVENT.size + length
+                    if end > len(buffer):
+                        break
+                    name = os.fsdecode(buffer[offset + _EVENT.size:end].rstrip(b"\0"))
+                    offset = end
+                    try:
+                        changed += self._on_inotify_event(watches.get(wd), mask, name, add_watch)
+                    except OSError as e:
+                        print(f"Cannot watch new directory ({e.strerror}); some changes may be missed")
+                    if mask & _IN_IGNORED:
+                        watches.pop(wd, None)
+                    if mask & _IN_Q_OVERFLOW:
+                        changed += self._rescan(add_watch)
+                buffer = buffer[offset:]
+                self._changed(changed)
+        finally:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _on_inotify_event(self, directory: Optional[str], mask: int, name: str, add_watch) -> list[str]:
+        if directory is None or not name:
+            return []
+        path = os.path.join(directory, name)
+        if mask & _IN_ISDIR:
+            if name.startswith("."):
+                return []
+            if mask & (_IN_CREATE | _IN_MOVED_TO):
+                # Files may have landed before the watch was added
+                return self._walk(path, add_watch)
+            if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                return self._forget_tree(path)
+            return []
+        if not _relevant(name):
+            return []
+        with self._files_lock:
+            files = self._files.setdefault(directory, set())
+            if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                files.discard(path)
+            else:
+                files.add(path)
+        return [path]
+
+    def _rescan(self, add_watch=None) -> list[str]:
+        """Diff the whole tree against the tracked files, e.g. after lost events."""
+        with self._files_lock:
+            before = {path for files in self._files.values() for path in files}
+            self._files.clear()
+        after = set(self._walk(self.root, add_watch))
+        # Unchanged files are compared by signature when flushed, so report all
+        # additions and removals and let the server sort out the rest
+        return sorted(before ^ after)
+
+    # Polling
+
+    def _watch_poll(self) -> None:
+        self._walk(self.root)
+        directories = {d: _signature(d) for d in self._files}
+        signatures = {path: _signature(path) for files in self._files.values() for path in files}
+        polls = 0
+        while not self._stop.wait(self.poll_interval):
+            polls += 1
+            full = polls % FULL_SCAN_POLLS == 0
+            changed = []
+            for directory in list(directories):
+                if directory not in self._files:
+                    continue
+                signature = _signature(directory)
+                if signature is None:
+                    # Removed along with everything below it
+                    for path in self._forget_tree(directory):
+                        signatures.pop(path, None)
+                        changed.append(path)
+                    for d in [d for d in directories if d == directory or d.startswith(directory + os.sep)]:
+                        del directories[d]
+                    continue
+                if signature == directories[directory] and not full:
+                    continue
+                directories[directory] = signature
+                files, subdirectories = self._scan_directory(directory)
+                with self._files_lock:
+                    previous = self._files.get(directory, set())
+                    self._files[directory] = files
+                changed.extend(previous - files)
+                for path in previous - files:
+                    signatures.pop(path, None)
+                for path in files:
+                    file_signature = _signature(path)
+                    if signatures.get(path) != file_signature:
+                        signatures[path] = file_signature
+                        changed.append(path)
+                for subdirectory in subdirectories:
+                    if subdirectory not in directories:
+                        for path in self._walk(subdirectory):
+                            signatures[path] = _signature(path)
+                            changed.append(path)
+                        for d in self._files:
+                            directories.setdefault(d, _signature(d))
+            self._changed(changed)
+
+    # Flushing
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            with self._condition:
+                while not self._pending and not self._stop.is_set():
+                    self._condition.wait()
+                if self._stop.is_set():
+                    return
+                now = time.monotonic()
+                quiet = now - self._last_event >= self.settle
+                overdue = now - self._batch_started >= MAX_BATCH_DELAY
+                if not (quiet or overdue):
+                    self._condition.wait(self.settle - (now - self._last_event))
+                    continue
+                ready = self._take_settled(now)
+                if not self._pending:
+                    self._batch_started = 0.0
+            if ready:
+                try:
+                    self._flush(ready)
+                except Exception as e:
+                    # Keep the thread alive, or syncing stops for the session
+                    print(f"Error syncing {len(ready)} changed files: {e!r}")
+                    self._changed(ready)
+                    self._stop.wait(self.settle)
+            else:
+                self._stop.wait(self.settle)
+
+    def _take_settled(self, now: float) -> list[str]:
+        """Remove and return the pending paths whose file stopped changing."""
+        ready = []
+        for path, (event_time, seen) in list(self._pending.items()):
+            if now - event_time < self.settle and now - self._batch_started < MAX_BATCH_DELAY:
+                continue
+            signature = _signature(path)
+            if signature is not None and signature != seen:
+                # Still being written: look again later
+                self._pending[path] = (now, signature)
+                continue
+            del self._pending[path]
+            ready.append(path)
+        return ready
+
+    def _flush(self, paths: list[str]) -> None:
+        deleted = [path for path in paths if not os.path.isfile(path)]
+        present = set(paths) - set(deleted)
+        keys = {grouping.set_key(path) for path in paths} - {None}
+
+        file_sets, singles = [], []
+        for directory in sorted({os.path.dirname(path) for path in paths}):
+            # Copied, as the watching thread keeps updating it
+            with self._files_lock:
+                files = sorted(self._files.get(directory, ()))
+            if not files:
+                continue
+            sets, directory_singles = grouping.group_files(files)
+            file_sets += [
+                file_set for file_set in sets
+                if grouping.set_key(file_set["representative"]) in keys
+                or any(member["path"] in present for member in file_set["members"])]
+            singles += [path for path in directory_singles if path in present or grouping.set_key(path) in keys]
+
+        if not (file_sets or singles or deleted):
+            return
+        if not self.apply(file_sets, singles, deleted):
+            # The server is unreachable: keep the changes for the next batch
+            self._changed(paths)
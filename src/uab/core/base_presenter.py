@@ -1,21 +1,46 @@
+from PySide6.QtCore import Signal
 from PySide6.QtWidgets import QWidget
 import os
-from typing import List
+import threading
+import time
+from typing import Optional
 
+from uab.core import decoders, grouping, tracing
+from uab.core.paths import uab_home
 from uab.frontend.thumbnail import Thumbnail
 from uab.backend.asset_service import AssetService
 
 
 class Presenter(QWidget):
-    def __init__(self, view):
+    # Emitted from the background catalog fetch with (generation, assets);
+    # delivered on the GUI thread
+    catalog_fetched = Signal(int, object)
+    # Emitted from the library watcher with the server's sync counts
+    catalog_synced = Signal(object)
+    # Emitted from a background fetch with (filter, assets) for the usage views
+    usage_view_fetched = Signal(str, object)
+    # Filters listing assets from the user's usage instead of the catalog
+    USAGE_VIEWS = ("Recent", "Favorites")
+
+    def __init__(self, view, server=None):
+        """
+        Args:
+            view: The MainWidget this presenter drives.
+            server: Optional `runner.BackgroundServer` that may still be
+                booting. Until it is ready the browser shows the catalog
+                snapshot from the last session.
+        """
         super().__init__()
-        LOCAL_ASSETS_DIR = "/Users/dev/Assets"
-        SERVER_URL = "http://127.0.0.1:8000"
+        LOCAL_ASSETS_DIR = os.environ.get("UAB_ASSETS_DIR", "/Users/dev/Assets")
+        SERVER_URL = server.url if server is not None else "http://127.0.0.1:8000"
         self.asset_service = AssetService(SERVER_URL, LOCAL_ASSETS_DIR)
+        self.server = server
         self.ROOT_ASSET_DIRECTORY = "Assets"
         self.assets = []
-        self.thumbnails = []
         self.current_asset = None
+        # Bumped on every redraw, so a stale background fetch is dropped
+        self._catalog_generation = 0
+        self._filter = "All Assets"
 
         self.widget = view
         self.win = None
@@ -25,7 +50,13 @@ class Presenter(QWidget):
             ["Karma", "Mantra", "Renderman", "Redshift", "Arnold", "V-Ray"])
 
         self.bind_events()
-        self._refresh_gui()
+        # Draw the snapshot straight away, then reconcile with the server
+        self._draw_assets(self.asset_service.get_cached_assets())
+        self.catalog_fetched.connect(self._on_catalog_fetched)
+        self.catalog_synced.connect(self._on_catalog_synced)
+        self.usage_view_fetched.connect(self._on_usage_view_fetched)
+        threading.Thread(
+            target=self._fetch_catalog, args=(self._catalog_generation, self.assets, True), daemon=True).start()
 
     def bind_events(self):
         self.widget.search_text_changed.connect(self.on_search_changed)
@@ -33,8 +64,13 @@ class Presenter(QWidget):
         self.widget.import_clicked.connect(self.on_import_asset)
         self.widget.renderer_changed.connect(self.on_renderer_changed)
         self.widget.delete_asset_clicked.connect(self.on_delete_asset)
+        self.widget.dump_trace_requested.connect(self.on_dump_trace)
+        self.widget.favorite_toggled.connect(self.on_favorite_toggled)
+        self.widget.asset_clicked.connect(self.on_asset_thumbnail_clicked)
+        self.widget.asset_double_clicked.connect(self.on_asset_thumbnail_double_clicked)
+        self.widget.asset_instantiate_requested.connect(self.on_asset_instantiate_requested)
 
-    def spawn_asset(self, asset: dict):
+    def spawn_asset(self, asset: dict, proxy_level: str | None = None):
         # Implemented in derived classes
         pass
 
@@ -45,22 +81,39 @@ class Presenter(QWidget):
 
         if os.path.isdir(asset_path):
             print(f"Importing assets from directory: {asset_path}")
-            imported_count = 0
+            paths = []
             skipped_count = 0
-            print(os.listdir(asset_path))
-            for filename in os.listdir(asset_path):
-                file_path = os.path.join(asset_path, filename)
-                # TODO: add support for other file types
-                if os.path.isfile(file_path) and filename.lower().endswith('.hdr'):
-                    asset = self.asset_service.create_asset_req_body_from_path(
-                        file_path)
-                    self.asset_service.add_asset_to_db(asset)
-                    imported_count += 1
-                else:
-                    skipped_count += 1
+            with os.scandir(asset_path) as entries:
+                for entry in entries:
+                    if entry.is_file() and decoders.is_supported(entry.name):
+                        paths.append(entry.path)
+                    else:
+                        skipped_count += 1
+            # Texture sets, UDIM tiles and sequences become one asset each
+            file_sets, singles = grouping.group_files(sorted(paths))
+            assets = [self.asset_service.create_asset_req_body_from_set(file_set) for file_set in file_sets]
+            assets += [self.asset_service.create_asset_req_body_from_path(path) for path in singles]
+            result = self.asset_service.import_assets(assets) if assets else {}
             self._refresh_gui()
+            if assets and result is None:
+                self.widget.show_message(
+                    f"Could not import assets from {asset_path}.", "error", 5000)
+                return
+            duplicates = ""
+            if result.get("linked") or result.get("skipped"):
+                duplicates = (f" {result.get('linked', 0)} linked and {result.get('skipped', 0)} skipped"
+                              " as duplicates of cataloged files.")
+            grouped = ""
+            if file_sets:
+                grouped = (f" {sum(len(file_set['members']) for file_set in file_sets)} files were"
+                           f" grouped into {len(file_sets)} set(s).")
+            self.widget.show_message(
+                f"Imported {result.get('created', 0)} asset(s) from directory.{grouped}{duplicates}"
+                f" Skipped {skipped_count} unsupported file(s).", "info", 3000)
+        elif not decoders.is_supported(asset_path):
             self.widget.show_message(
-                f"Imported {imported_count} .hdr asset(s) from directory. Skipped {skipped_count} non-hdr file(s).", "info", 3000)
+                f"Cannot import {os.path.basename(asset_path)}: supported formats are "
+                f"{', '.join(decoders.supported_extensions())}.", "error", 5000)
         else:
             print(f"Importing asset: {asset_path}")
             asset = self.asset_service.create_asset_req_body_from_path(
@@ -81,18 +134,32 @@ class Presenter(QWidget):
             f"Renderer changed to {renderer_text}", "info", 3000)
 
     def on_asset_thumbnail_clicked(self, asset_id: int) -> None:
-        thumbnail = self.get_thumbnail_by_id(asset_id)
         self.current_asset = self.asset_service.get_asset_by_id(asset_id)
-        self.widget.set_new_selected_thumbnail(thumbnail)
+        self.widget.select_asset(asset_id)
         self.widget.show_message(
             f"Asset clicked: {self.current_asset['name']}", "info", 3000)
 
-    def get_thumbnail_by_id(self, id: int) -> Thumbnail:
-        return next((p for p in self.thumbnails if p.asset_id == id), None)
+    def get_thumbnail_by_id(self, id: int) -> Optional[Thumbnail]:
+        """The grid cell of the asset, if it is on screen."""
+        return self.widget.browser.thumbnail(id)
+
+    def on_asset_instantiate_requested(self, asset_id: int):
+        self.asset_service.record_usage(asset_id, "spawned")
+        self.spawn_asset(self.asset_service.get_asset_by_id(asset_id))
 
     def on_asset_thumbnail_double_clicked(self, asset_id: int):
+        self.asset_service.record_usage(asset_id, "viewed")
         asset = self.asset_service.get_asset_by_id(asset_id)
-        self.widget.show_asset_detail(asset)
+        if asset is not None:
+            asset["favorite"] = self.asset_service.is_favorite(asset_id)
+        # The grid thumbnail stands in while the full preview decodes
+        thumbnail = self.get_thumbnail_by_id(asset_id)
+        self.widget.show_asset_detail(asset, thumbnail.thumbnail if thumbnail else None)
+
+    def on_favorite_toggled(self, asset_id: int, favorite: bool):
+        self.asset_service.set_favorite(asset_id, favorite)
+        if self._filter == "Favorites":
+            self._load_usage_view(self._filter)
 
     def on_back_clicked(self, widget: QWidget):
         pass
@@ -103,39 +170,81 @@ class Presenter(QWidget):
     def on_save_metadata_changes(self, asset: dict):
         pass
 
+    def _is_server_ready(self) -> bool:
+        return self.server is None or (self.server.ready.is_set() and not self.server.failed)
+
+    def _fetch_catalog(self, generation: int, drawn, watch: bool = False):
+        """Fetch the catalog and emit it, or `drawn` itself if it is unchanged.
+
+        The comparison runs here, off the GUI thread, since it decodes every
+        row of a snapshot that is drawn lazily.
+        """
+        if self.server is not None:
+            self.server.ready.wait()
+            if self.server.failed:
+                self.catalog_fetched.emit(generation, None)
+                return
+        assets = self.asset_service.get_assets()
+        self.catalog_fetched.emit(generation, drawn if assets == drawn else assets)
+        if watch:
+            # Follow changes to the library from now on
+            self.asset_service.watch(self.catalog_synced.emit)
+            # So the detail view knows which assets are favorites
+            self.asset_service.get_favorite_assets()
+
+    def _on_catalog_fetched(self, generation: int, assets):
+        if assets is None:
+            if self.server is not None and self.server.failed:
+                self.widget.show_message(
+                    "Could not start the asset server. Showing the cached catalog.", "error", 0)
+            return
+        # Skip the redraw if the GUI changed meanwhile or the snapshot was current
+        if generation != self._catalog_generation or assets is self.assets:
+            return
+        if self._filter in self.USAGE_VIEWS:
+            # Drawn when the filter is cleared
+            self.assets = assets
+            self._load_usage_view(self._filter)
+            return
+        self._draw_assets(assets)
+
+    def _on_catalog_synced(self, result: dict):
+        self.widget.show_message(
+            f"Library changed: {result['created']} new, {result['updated']} updated, "
+            f"{result['deleted']} removed assets", "info", 3000)
+        if getattr(self, "_pending_search_text", ""):
+            self._trigger_search()
+            return
+        threading.Thread(
+            target=self._fetch_catalog, args=(self._catalog_generation, self.assets), daemon=True).start()
+
+    def on_dump_trace(self):
+        if not tracing.is_enabled():
+            self.widget.show_message(
+                "Tracing is off. Set UAB_TRACE=1 or call uab.core.tracing.enable().", "warning", 5000)
+            return
+        path = tracing.dump_chrome_trace(
+            uab_home() / "traces" / f"uab_trace_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        self.widget.show_message(f"Trace written to {path}", "success", 5000)
+
+    @tracing.traced("presenter.refresh_gui")
     def _refresh_gui(self):
-        self.assets = self._load_assets()
-        self.thumbnails = self._create_thumbnails_list(self.assets)
-        self.widget.draw_thumbnails(self.thumbnails)
+        if self._filter in self.USAGE_VIEWS:
+            self.assets = self._load_assets()
+            self._load_usage_view(self._filter)
+            return
+        self._draw_assets(self._load_assets())
+
+    def _draw_assets(self, assets):
+        self._catalog_generation += 1
+        self.assets = assets
+        self.widget.draw_assets(self.assets)
 
     def _load_assets(self):
+        if not self._is_server_ready():
+            return self.asset_service.get_cached_assets()
         return self.asset_service.get_assets()
 
-    def _create_thumbnails_list(self, assets: list) -> List[Thumbnail]:
-        """
-        From a flat list of asset dicts, create a list of Thumbnail widgets.
-        """
-        thumbnails: List[Thumbnail] = []
-        if not assets:
-            return thumbnails
-
-        for asset in assets:
-            if not isinstance(asset, dict):
-                continue
-
-            asset_thumbnail = Thumbnail(
-                asset,
-                parent=None,
-            )
-            # Connect events
-            asset_thumbnail.asset_double_clicked.connect(
-                self.on_asset_thumbnail_double_clicked)
-            asset_thumbnail.asset_clicked.connect(
-                self.on_asset_thumbnail_clicked)
-            thumbnails.append(asset_thumbnail)
-
-        return thumbnails
-
     def on_search_changed(self, text: str, delay: int = 200) -> None:
         if not hasattr(self, "_search_debounce_timer"):
             from PySide6.QtCore import QTimer
@@ -149,9 +258,31 @@ class Presenter(QWidget):
     def _trigger_search(self):
         text = getattr(self, "_pending_search_text", "")
         filtered_assets = self.asset_service.search_assets(text)
-        self.widget.draw_thumbnails(
-            self._create_thumbnails_list(filtered_assets))
+        self.widget.draw_assets(filtered_assets or [])
         self.widget.show_browser()
 
     def on_filter_changed(self, text: str):
-        print(f"Filter changed: {text}")
+        previous, self._filter = self._filter, text
+        if text in self.USAGE_VIEWS:
+            self._load_usage_view(text)
+        elif previous in self.USAGE_VIEWS:
+            self._draw_assets(self.assets)
+
+    def _load_usage_view(self, view: str):
+        """Fetch the Recent or Favorites assets in the background and draw them."""
+        def _fetch():
+            if view == "Recent":
+                assets = self.asset_service.get_recent_assets()
+            else:
+                assets = self.asset_service.get_favorite_assets()
+            self.usage_view_fetched.emit(view, assets)
+
+        threading.Thread(target=_fetch, daemon=True).start()
+
+    def _on_usage_view_fetched(self, view: str, assets):
+        if view != self._filter:
+            return
+        if assets is None:
+            self.widget.show_message(f"Could not load {view}.", "error", 5000)
+            return
+        self.widget.draw_assets(assets)
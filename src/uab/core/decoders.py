@@ -0,0 +1,280 @@
+"""Image decoders by file extension.
+
+Every decoder follows the `decode_preview(path, max_size)` contract: return
+the image with its longest side at most `max_size` pixels (or at full size
+when None), BGR like OpenCV, as either
+
+- float32, scene-linear radiance, to be tone-mapped (HDR, EXR, float TIFF), or
+- uint8, display-referred and ready to show (JPEG, PNG, 8/16-bit TIFF, ...).
+
+Each decoder takes the cheapest way to a reduced image its format offers:
+JPEG is decoded at 1/2, 1/4 or 1/8 scale in the DCT (PIL `draft`), EXR and
+TIFF files use an embedded preview or reduced-resolution subfile when it is
+large enough, other formats go through `cv2.IMREAD_REDUCED_*`. Radiance
+HDR has no such shortcut and is decoded in full.
+
+Other formats can be added with `register`. Import filtering and preview
+generation both go through `is_supported` and `decode_preview`; backend
+analysis uses `decode_linear`, which skips embedded previews and linearizes
+8-bit images.
+
+EXR files are read by OpenCV with `OPENCV_IO_ENABLE_OPENEXR`, which
+`utils.load_hdr` sets in the process environment before the first EXR read
+unless it is set already.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Decoder = Callable[[Path, Optional[int]], "np.ndarray"]
+
+_decoders: dict[str, Decoder] = {}
+
+
+def register(*extensions: str) -> Callable[[Decoder], Decoder]:
+    """Decorator registering a decoder for `extensions` (e.g. ".jpg").
+
+    A later registration for the same extension replaces the earlier one.
+    """
+    def decorator(decoder: Decoder) -> Decoder:
+        for extension in extensions:
+            _decoders[extension.lower()] = decoder
+        return decoder
+    return decorator
+
+
+def decoder_for(path: str | Path) -> Decoder | None:
+    return _decoders.get(os.path.splitext(str(path))[1].lower())
+
+
+def supported_extensions() -> tuple[str, ...]:
+    return tuple(sorted(_decoders))
+
+
+def is_supported(path: str | Path) -> bool:
+    """Whether `path` has an extension a decoder is registered for."""
+    return decoder_for(path) is not None
+
+
+def decode_preview(path: str | Path, max_size: int | None = None) -> np.ndarray:
+    """Decode `path` with the decoder registered for its extension.
+
+    Raises:
+        ValueError: If no decoder handles the extension.
+        FileNotFoundError: If the file cannot be read or decoded.
+    """
+    decoder = decoder_for(path)
+    if decoder is None:
+        raise ValueError(f"Unsupported image format: {path}")
+    return decoder(Path(path), max_size)
+
+
+def decode_linear(path: str | Path, max_size: int | None = None) -> np.ndarray:
+    """Decode `path` as scene-linear float32 BGR, e.g. for analysis.
+
+    Formats with an embedded display-referred preview (EXR) are decoded in
+    full float instead. 8-bit images are taken as sRGB and linearized to
+    0..1.
+
+    Raises:
+        ValueError: If no decoder handles the extension.
+        FileNotFoundError: If the file cannot be read or decoded.
+    """
+    import numpy as np
+
+    decoder = decoder_for(path)
+    if decoder is None:
+        raise ValueError(f"Unsupported image format: {path}")
+    image = _LINEAR_DECODERS.get(decoder, decoder)(Path(path), max_size)
+    if image.dtype == np.uint8:
+        return _srgb_to_linear()[image]
+    return image
+
+
+_srgb_lut = None
+
+
+def _srgb_to_linear() -> np.ndarray:
+    """Lookup table from 8-bit sRGB code values to linear float32."""
+    global _srgb_lut
+    if _srgb_lut is None:
+        import numpy as np
+
+        v = np.arange(256, dtype=np.float64) / 255
+        _srgb_lut = np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4).astype(np.float32)
+    return _srgb_lut
+
+
+def _fit(image: np.ndarray, max_size: int | None) -> np.ndarray:
+    """Area-downscale `image` so its longest side is at most `max_size`."""
+    import cv2
+
+    if not max_size or max(image.shape[:2]) <= max_size:
+        return image
+    scale = max_size / max(image.shape[:2])
+    size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def _from_pil(image) -> np.ndarray:
+    """uint8 BGR array of a PIL image."""
+    import numpy as np
+
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return np.ascontiguousarray(np.asarray(image)[..., ::-1])
+
+
+@register(".hdr", ".pic")
+def _decode_hdr(path: Path, max_size: int | None) -> np.ndarray:
+    from uab.core.utils import load_hdr
+
+    return load_hdr(path, max_size)
+
+
+@register(".jpg", ".jpeg")
+def _decode_jpeg(path: Path, max_size: int | None) -> np.ndarray:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as image:
+            if max_size:
+                # Decodes at the smallest DCT scale still covering max_size
+                image.draft("RGB", (max_size, max_size))
+            image = ImageOps.exif_transpose(image)
+            return _fit(_from_pil(image), max_size)
+    except (OSError, UnidentifiedImageError) as e:
+        raise FileNotFoundError(f"Cannot read image {path}: {e}") from e
+
+
+_REDUCED_FLAGS = {8: "IMREAD_REDUCED_COLOR_8", 4: "IMREAD_REDUCED_COLOR_4", 2: "IMREAD_REDUCED_COLOR_2"}
+
+
+def _image_size(path: Path) -> tuple[int, int] | None:
+    """(width, height) from the file header, without decoding the pixels."""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except (OSError, UnidentifiedImageError):
+        return None
+
+
+@register(".png", ".bmp", ".tga", ".webp")
+def _decode_reduced(path: Path, max_size: int | None) -> np.ndarray:
+    """8-bit decode through OpenCV, reduced by the largest factor that still covers max_size."""
+    import cv2
+
+    flag = cv2.IMREAD_COLOR
+    size = _image_size(path) if max_size else None
+    if size:
+        for factor, name in _REDUCED_FLAGS.items():
+            if max(size) // factor >= max_size:
+                flag = getattr(cv2, name)
+                break
+    image = cv2.imread(str(path), flag)
+    if image is None:
+        raise FileNotFoundError(f"Cannot read image {path}")
+    return _fit(image, max_size)
+
+
+# TIFF tags
+_NEW_SUBFILE_TYPE = 254
+_SAMPLE_FORMAT = 339
+_SAMPLE_FORMAT_FLOAT = 3
+
+
+@register(".tif", ".tiff")
+def _decode_tiff(path: Path, max_size: int | None) -> np.ndarray:
+    """Smallest reduced-resolution subfile covering max_size, else the main image.
+
+    Float TIFFs are scene-linear and come back as float32 like HDR files.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as image:
+            sample_format = image.tag_v2.get(_SAMPLE_FORMAT, 1)
+            if isinstance(sample_format, tuple):
+                sample_format = sample_format[0]
+            if sample_format == _SAMPLE_FORMAT_FLOAT:
+                return _decode_hdr(path, max_size)
+            if max_size:
+                best = None
+                for frame in range(getattr(image, "n_frames", 1)):
+                    image.seek(frame)
+                    reduced = image.tag_v2.get(_NEW_SUBFILE_TYPE, 0) & 1
+                    if (reduced and image.mode in ("RGB", "RGBA", "L") and max(image.size) >= max_size
+                            and (best is None or max(image.size) < best[1])):
+                        best = frame, max(image.size)
+                if best is not None:
+                    image.seek(best[0])
+                    return _fit(_from_pil(image), max_size)
+    except (OSError, UnidentifiedImageError):
+        # Let OpenCV try formats PIL does not read
+        pass
+    return _decode_reduced(path, max_size)
+
+
+_EXR_MAGIC = 20000630
+_EXR_MAX_HEADER = 1 << 20
+
+
+def _read_exr_preview(path: Path) -> np.ndarray | None:
+    """The `preview` attribute of an EXR header as uint8 BGR, if it has one."""
+    import numpy as np
+
+    def read_name(f) -> bytes:
+        name = bytearray()
+        while (byte := f.read(1)) not in (b"", b"\0"):
+            name += byte
+            if len(name) > 255:
+                raise ValueError("Attribute name too long")
+        return bytes(name)
+
+    try:
+        with open(path, "rb") as f:
+            magic, _version = struct.unpack("<ii", f.read(8))
+            if magic != _EXR_MAGIC:
+                return None
+            while f.tell() < _EXR_MAX_HEADER:
+                name = read_name(f)
+                if not name:
+                    return None  # end of header
+                attr_type = read_name(f)
+                (size,) = struct.unpack("<i", f.read(4))
+                if size < 0:
+                    return None  # malformed; seeking back would loop forever
+                if name == b"preview" and attr_type == b"preview":
+                    width, height = struct.unpack("<II", f.read(8))
+                    pixels = f.read(width * height * 4)
+                    if not width or not height or len(pixels) != width * height * 4:
+                        return None
+                    rgba = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4)
+                    return np.ascontiguousarray(rgba[..., 2::-1])
+                f.seek(size, os.SEEK_CUR)
+    except (OSError, ValueError, struct.error):
+        return None
+    return None
+
+
+@register(".exr")
+def _decode_exr(path: Path, max_size: int | None) -> np.ndarray:
+    """The embedded preview when it covers max_size, else a full float decode."""
+    if max_size:
+        preview = _read_exr_preview(path)
+        if preview is not None and max(preview.shape[:2]) >= max_size:
+            return _fit(preview, max_size)
+    return _decode_hdr(path, max_size)
+
+
+# Decoders whose reduced decode may be display-referred, and their float decode
+_LINEAR_DECODERS: dict[Decoder, Decoder] = {_decode_exr: _decode_hdr}
@@ -2,9 +2,9 @@ from uab.core.base_presenter import Presenter
 
 
 class DesktopPresenter(Presenter):
-    def __init__(self, view):
-        super().__init__(view)
+    def __init__(self, view, server=None):
+        super().__init__(view, server)
 
-    def spawn_asset(self, asset: dict):
+    def spawn_asset(self, asset: dict, proxy_level: str | None = None):
         self.widget.show_message(
             f"Spawning asset on desktop is not supported.", "info", 3000)
@@ -0,0 +1,142 @@
+"""Scan-time grouping of texture sets, UDIM tiles and frame sequences.
+
+Texture libraries ship a material as many files, e.g. `wood_albedo.1001.exr`
+… `wood_roughness.1010.exr`. Cataloging one asset per file floods the catalog
+and the grid, so a directory listing is grouped before import: files whose
+names differ only in a PBR channel suffix, a UDIM tile or a frame number
+become one asset with a member list.
+
+Names are matched right to left against precompiled patterns:
+
+    <base>[_.-]<channel>.<number>.<ext>
+
+- The number is a UDIM tile when every number in the set is 1001-1999,
+  otherwise a frame. Frames need a `.` separator and zero padding to the
+  same width of at least 3 digits (`shot.0042.exr`), and a sequence needs
+  `MIN_FRAMES` of them. UDIMs may also use `_`, but only after a channel
+  (`wood_albedo_1001.exr`). So numbered but unrelated files like
+  `sunset_01.hdr`, `IMG_1234.JPG` or `env_v2.1.hdr` stay separate.
+- The channel is one of `CHANNELS`, in any case.
+
+Only names with at least one of those tokens are grouped, and only when
+two or more files share the base. Everything else is returned as is.
+"""
+
+import os
+import re
+from collections import defaultdict
+
+# PBR channel suffixes, as exported by common texturing tools
+CHANNELS = (
+    "albedo", "basecolor", "base_color", "diffuse", "color", "col",
+    "normal", "nrm", "nor", "bump", "height", "displacement", "disp",
+    "roughness", "rough", "gloss", "glossiness", "specular", "spec",
+    "metallic", "metalness", "metal", "ao", "ambientocclusion", "occlusion",
+    "opacity", "alpha", "emissive", "emission", "translucency", "sss",
+)
+# Channels preferred for the set's preview, best first
+PREVIEW_CHANNELS = ("albedo", "basecolor", "base_color", "diffuse", "color", "col")
+# Numbered files needed to make a frame sequence
+MIN_FRAMES = 3
+
+_NUMBER = re.compile(r"^(?P<base>.+?)(?:\.(?P<frame>\d{3,})|_(?P<udim>1\d{3}))$")
+_CHANNEL = re.compile(
+    r"^(?P<base>.+?)[._-](?P<channel>" + "|".join(sorted(CHANNELS, key=len, reverse=True)) + r")$",
+    re.IGNORECASE)
+_UDIM_RANGE = range(1001, 2000)
+
+
+def _parse(name: str):
+    """(base, channel, number, width) of a file name; channel and number may
+    be None. `width` is how many digits the number was written with."""
+    stem = os.path.splitext(name)[0]
+    base, number, width = stem, None, None
+    number_match = _NUMBER.match(stem)
+    if number_match:
+        digits = number_match["frame"] or number_match["udim"]
+        base, number, width = number_match["base"], int(digits), len(digits)
+    channel = None
+    match = _CHANNEL.match(base)
+    if match:
+        base, channel = match["base"], match["channel"].lower()
+    elif number_match and number_match["udim"]:
+        # A bare `_1234` is a camera or scan counter far more often than a tile
+        return stem, None, None, None
+    return base, channel, number, width
+
+
+def set_key(path: str):
+    """Key shared by the files of the set `path` would belong to, or None
+    if its name has no channel or number."""
+    directory, name = os.path.split(path)
+    base, channel, number, _ = _parse(name)
+    if channel is None and number is None:
+        return None
+    return directory, base.lower()
+
+
+def _representative(members: list[dict]) -> dict:
+    """The member to preview: the colour channel if any, at the lowest tile or frame."""
+    def rank(member):
+        channel = member["channel"]
+        preference = PREVIEW_CHANNELS.index(channel) if channel in PREVIEW_CHANNELS else len(PREVIEW_CHANNELS)
+        number = member["udim"] if member["udim"] is not None else member["frame"]
+        return preference, channel or "", -1 if number is None else number, member["path"]
+    return min(members, key=rank)
+
+
+def group_files(paths: list[str]) -> tuple[list[dict], list[str]]:
+    """Split `paths` into file sets and files that stay single assets.
+
+    Each set is a dict with the `name` shared by its files, its `kind`
+    ("udim" or "sequence" for the tiles or frames of one channel, else
+    "texture_set"), the `representative` path to preview, and its `members`
+    as dicts of `path`, `channel`, `udim` and `frame`. Members are sorted
+    by path.
+
+    Returns:
+        (sets, singles), with singles in their original order.
+    """
+    candidates = defaultdict(list)
+    singles = []
+    for path in paths:
+        directory, name = os.path.split(path)
+        base, channel, number, width = _parse(name)
+        if channel is None and number is None:
+            singles.append(path)
+            continue
+        candidates[(directory, base.lower())].append((path, base, channel, number, width))
+
+    sets = []
+    for files in candidates.values():
+        numbered = [file for file in files if file[3] is not None]
+        numbers = {file[3] for file in numbered}
+        widths = {file[4] for file in numbered}
+        udim = bool(numbers) and all(number in _UDIM_RANGE for number in numbers) and widths == {4}
+        if numbered and not udim and (len(widths) > 1 or len(numbered) < MIN_FRAMES):
+            # Not a sequence, e.g. two numbered versions: the numbered files
+            # stay single assets
+            singles.extend(file[0] for file in numbered)
+            files = [file for file in files if file[3] is None]
+            numbers = set()
+        if len(files) < 2:
+            singles.extend(file[0] for file in files)
+            continue
+        members = sorted((
+            {"path": path, "channel": channel,
+             "udim": number if udim else None, "frame": None if udim else number}
+            for path, _, channel, number, _ in files), key=lambda member: member["path"])
+        channels = {member["channel"] for member in members}
+        if len(channels - {None}) > 1 or not numbers:
+            kind = "texture_set"
+        else:
+            kind = "udim" if udim else "sequence"
+        sets.append({
+            "name": files[0][1], "kind": kind,
+            "representative": _representative(members)["path"], "members": members,
+        })
+    if candidates:
+        # Files from sets of one were appended at the end
+        order = {path: i for i, path in enumerate(paths)}
+        singles.sort(key=order.__getitem__)
+    return sets, singles
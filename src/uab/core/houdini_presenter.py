@@ -3,15 +3,38 @@ try:
     import hou
 except ImportError:
     pass
+from PySide6.QtCore import Signal
+
+from uab.core import proxy
 from uab.core.base_presenter import Presenter
 
 
 class HoudiniPresenter(Presenter):
-    def __init__(self, view):
-        super().__init__(view)
+    # Emitted from a proxy worker with (dome light node, proxy path);
+    # delivered on the GUI thread, where `hou` may be used
+    proxy_ready = Signal(object, str)
+
+    def __init__(self, view, server=None):
+        super().__init__(view, server)
+        self.proxy_ready.connect(self._on_proxy_ready)
 
-    def spawn_asset(self, asset: dict):
-        self.create_dome_light(asset["directory_path"])
+    def spawn_asset(self, asset: dict, proxy_level: str | None = None):
+        """
+        Args:
+            asset: The asset to spawn as a dome light.
+            proxy_level: "full", "half", "quarter" or "eighth"; defaults to
+                `UAB_PROXY_LEVEL`. A proxy that is not cached yet is
+                generated in the background and swapped in when ready; the
+                light uses the original map until then.
+        """
+        level = proxy_level or proxy.PROXY_LEVEL
+        source = asset["directory_path"]
+        path = proxy.cached_proxy(source, level)
+        dome = self.create_dome_light(str(path or source))
+        if path is None:
+            proxy.get_generator().request(source).add_done_callback(
+                lambda future: self._on_proxies_generated(future, dome, level))
+        return dome
 
     def create_dome_light(self, directory_path: str, light_name: str = "dome_light"):
         stage = hou.node("/stage")
@@ -20,3 +43,19 @@ class HoudiniPresenter(Presenter):
         tex.set(directory_path)
         dome.moveToGoodPosition()
         return dome
+
+    def _on_proxies_generated(self, future, dome, level: str):
+        # Runs on the proxy worker thread
+        try:
+            paths = future.result()
+        except Exception as e:
+            print(f"Could not generate proxies: {e}")
+            return
+        self.proxy_ready.emit(dome, str(paths[level]))
+
+    def _on_proxy_ready(self, dome, path: str):
+        try:
+            dome.parm("xn__inputstexturefile_r3ah").set(path)
+        except hou.ObjectWasDeleted:
+            # The light was deleted while the proxy was generated
+            pass
@@ -0,0 +1,21 @@
+"""Per-user locations for configuration, caches and runtime state."""
+
+import os
+from pathlib import Path
+
+
+def uab_home() -> Path:
+    """Root directory for everything the UAB writes outside the package.
+
+    Defaults to `~/.uab` and can be moved with the `UAB_HOME` variable.
+    """
+    home = Path(os.environ.get("UAB_HOME", Path.home() / ".uab"))
+    home.mkdir(parents=True, exist_ok=True)
+    return home
+
+
+def cache_dir(name: str) -> Path:
+    """Return (and create) a named cache directory under `uab_home()`."""
+    path = uab_home() / "cache" / name
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,174 @@
+"""Reduced-resolution proxies of HDR maps for quick lookdev.
+
+Proxies are Radiance `.hdr` files at 1/2, 1/4 and 1/8 of the source
+resolution. Each proxy pixel is the mean radiance of the source pixels it
+covers (an area filter), so the total light a dome emits does not change
+with the level. Block sums are reduced level by level, which keeps the
+coarser levels exact even when the size is not a multiple of the factor.
+
+Proxies are cached under `$UAB_HOME/cache/proxies`, keyed by the source's
+path, modification time and size, so an edited map gets new proxies. All
+levels are written by one decode of the source, on background worker
+threads: OpenCV and NumPy release the GIL for the heavy parts.
+
+Nothing here needs `hou`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from uab.core.paths import cache_dir
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Proxy level names and their downscale factors; "full" is the source itself
+LEVELS = {"full": 1, "half": 2, "quarter": 4, "eighth": 8}
+PROXY_LEVEL = os.environ.get("UAB_PROXY_LEVEL", "full")
+PROXY_WORKERS = int(os.environ.get("UAB_PROXY_WORKERS", "2"))
+
+
+def _check_level(level: str) -> int:
+    try:
+        return LEVELS[level]
+    except KeyError:
+        raise ValueError(f"Unknown proxy level `{level}`, expected one of {', '.join(LEVELS)}") from None
+
+
+def _block_sums(values: np.ndarray, factor: int) -> np.ndarray:
+    """Sum `values` over `factor` x `factor` blocks; edge blocks may be partial."""
+    import numpy as np
+
+    rows = np.add.reduceat(values, np.arange(0, values.shape[0], factor), axis=0)
+    return np.add.reduceat(rows, np.arange(0, values.shape[1], factor), axis=1)
+
+
+def downsample(hdr: np.ndarray, factors: list[int]) -> dict[int, np.ndarray]:
+    """Area-filtered copies of `hdr` (H x W x C float) for each factor.
+
+    Factors must be powers of two. Sums and pixel counts are carried from
+    one level to the next, so every level is the mean of the source pixels
+    it covers. Sums stay in float32: a 16K map is already 1.6 GB as float32
+    and each block adds at most 64 values.
+    """
+    import numpy as np
+
+    sums = hdr.astype(np.float32, copy=False)
+    counts = np.ones(hdr.shape[:2] + (1,), dtype=np.float32)
+    current = 1
+    levels = {}
+    for factor in sorted(factors):
+        if factor < 1 or factor & (factor - 1):
+            raise ValueError(f"Proxy factors must be powers of two, got {factor}")
+        while current < factor:
+            sums = _block_sums(sums, 2)
+            counts = _block_sums(counts, 2)
+            current *= 2
+        levels[factor] = sums / counts
+    return levels
+
+
+def _source_key(source: Path) -> str:
+    stat = source.stat()
+    key = f"{source.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+
+def cached_proxy_path(source: str | Path, level: str) -> Path:
+    """Where the `level` proxy of `source` is cached; it may not exist yet.
+
+    Raises:
+        FileNotFoundError: If `source` does not exist.
+        ValueError: If `level` is unknown.
+    """
+    _check_level(level)
+    source = Path(source)
+    return cache_dir("proxies") / _source_key(source) / f"{source.stem}_{level}.hdr"
+
+
+def cached_proxy(source: str | Path, level: str) -> Path | None:
+    """The path to use for `level`: the source for "full", else the cached
+    proxy, or None if it has not been generated."""
+    if _check_level(level) == 1:
+        return Path(source)
+    path = cached_proxy_path(source, level)
+    return path if path.is_file() else None
+
+
+def generate_proxies(source: str | Path, levels: list[str] | None = None) -> dict[str, Path]:
+    """Write the missing proxies of `source`, returning every requested level's path.
+
+    Decodes the source once for all levels. Files are written under a
+    temporary name and renamed, so a proxy on disk is always complete.
+
+    Raises:
+        FileNotFoundError: If `source` cannot be read.
+    """
+    import cv2
+
+    from uab.core.utils import load_hdr
+
+    levels = [level for level in (levels or LEVELS) if _check_level(level) > 1]
+    paths = {level: cached_proxy_path(source, level) for level in levels}
+    missing = [level for level in levels if not paths[level].is_file()]
+    if missing:
+        hdr = load_hdr(source)
+        images = downsample(hdr, [LEVELS[level] for level in missing])
+        for level in missing:
+            path = paths[level]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}.hdr")
+            if not cv2.imwrite(str(tmp_path), images[LEVELS[level]]):
+                raise OSError(f"Cannot write proxy {path}")
+            os.replace(tmp_path, path)
+    return paths
+
+
+class ProxyGenerator:
+    """Generates proxies on worker threads, one job per source at a time."""
+
+    def __init__(self, workers: int = PROXY_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="uab-proxy")
+        self._lock = threading.Lock()
+        self._pending: dict[str, Future] = {}
+
+    def request(self, source: str | Path) -> Future:
+        """Generate all proxy levels of `source` in the background.
+
+        The future resolves to the `generate_proxies` result. Requests for a
+        source that is already queued share its future.
+        """
+        key = str(Path(source).resolve())
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._pending[key] = self._executor.submit(generate_proxies, source)
+        # Outside the lock: the callback runs right away if the job is done
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_generator: ProxyGenerator | None = None
+_generator_lock = threading.Lock()
+
+
+def get_generator() -> ProxyGenerator:
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            _generator = ProxyGenerator()
+        return _generator
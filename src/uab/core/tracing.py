@@ -0,0 +1,165 @@
+"""Lightweight span timing for the GUI hot paths.
+
+Tracing is off unless `UAB_TRACE=1` is set or `enable()` is called. When off,
+`span()` returns a shared no-op object and `traced` functions cost one flag
+check, so instrumentation can stay in place permanently.
+
+When on, every span updates per-name totals (count, total/max ms, bytes
+decoded) and is kept, up to `MAX_EVENTS`, for a Chrome trace. From a running
+session, e.g. Houdini's Python shell:
+
+    from uab.core import tracing
+    tracing.enable()
+    ...  # use the browser
+    print(tracing.summary())
+    tracing.dump_chrome_trace("/tmp/uab_trace.json")  # open in chrome://tracing or Perfetto
+
+Setting `UAB_TRACE_FILE` enables tracing and writes the trace on exit.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+MAX_EVENTS = 200_000
+
+_enabled = os.environ.get("UAB_TRACE", "") not in ("", "0") or bool(os.environ.get("UAB_TRACE_FILE"))
+_lock = threading.Lock()
+_stats: dict[str, list] = {}  # name -> [count, total_ns, max_ns, bytes]
+_events: deque = deque(maxlen=MAX_EVENTS)
+_origin_ns = time.perf_counter_ns()
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Forget all recorded spans."""
+    with _lock:
+        _stats.clear()
+        _events.clear()
+
+
+class _Span:
+    __slots__ = ("name", "args", "bytes", "_start")
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+        self.bytes = 0
+
+    def add_bytes(self, n: int) -> None:
+        self.bytes += n
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        duration = end - self._start
+        with _lock:
+            entry = _stats.get(self.name)
+            if entry is None:
+                entry = _stats[self.name] = [0, 0, 0, 0]
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+            entry[3] += self.bytes
+            _events.append((self.name, self._start, duration, threading.get_ident(), self.bytes, self.args))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def add_bytes(self, n: int) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **args):
+    """Context manager timing the enclosed block under `name`.
+
+    Use `add_bytes()` on the returned object to record decoded bytes.
+    """
+    if not _enabled:
+        return _NOOP
+    return _Span(name, args)
+
+
+def traced(name: str):
+    """Decorator timing every call of the wrapped function under `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summary() -> dict[str, dict]:
+    """Per-span totals: call count, total and max milliseconds, bytes decoded."""
+    with _lock:
+        return {
+            name: {
+                "count": count,
+                "total_ms": round(total / 1e6, 3),
+                "max_ms": round(longest / 1e6, 3),
+                "bytes": n_bytes,
+            }
+            for name, (count, total, longest, n_bytes) in sorted(_stats.items())
+        }
+
+
+def dump_chrome_trace(path: str | Path) -> Path:
+    """Write the recorded spans as a Chrome trace-event JSON file."""
+    pid = os.getpid()
+    with _lock:
+        events = list(_events)
+    trace_events = []
+    for name, start, duration, tid, n_bytes, args in events:
+        event_args = dict(args)
+        if n_bytes:
+            event_args["bytes"] = n_bytes
+        trace_events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - _origin_ns) / 1000,
+            "dur": duration / 1000,
+            "pid": pid,
+            "tid": tid,
+            "args": event_args,
+        })
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms",
+                   "otherData": {"summary": summary()}}, f)
+    return path
+
+
+if os.environ.get("UAB_TRACE_FILE"):
+    atexit.register(dump_chrome_trace, os.environ["UAB_TRACE_FILE"])
@@ -1,8 +1,107 @@
-import cv2
-import numpy as np
+from __future__ import annotations
+
+import os
 from io import BytesIO
 from pathlib import Path
-from PIL import Image
+from typing import TYPE_CHECKING
+
+# cv2, numpy and PIL take a noticeable part of startup, so they are imported
+# on first use rather than when the GUI modules import this one.
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
+
+
+# Reinhard's "key": the display value the scene's log-average luminance maps to
+AUTO_EXPOSURE_KEY = 0.18
+
+
+def load_hdr(input_path: str | Path, max_size: int | None = None) -> np.ndarray:
+    """Read an HDR image as finite, non-negative float32 BGR.
+
+    Args:
+        input_path (str | Path): Path to the HDR image.
+        max_size (int, optional): Downscale so the longest side is at most
+            this many pixels.
+
+    Raises:
+        FileNotFoundError: If the HDR file cannot be loaded or is invalid.
+    """
+    if str(input_path).lower().endswith(".exr"):
+        # OpenCV only reads EXR when this is set before its first EXR decode.
+        # Set here rather than on import, so the host process's environment
+        # is only touched when an EXR is actually read.
+        os.environ.setdefault("OPENCV_IO_ENABLE_OPENEXR", "1")
+    import cv2
+    import numpy as np
+
+    hdr = cv2.imread(str(input_path), cv2.IMREAD_UNCHANGED)
+    if hdr is None:
+        raise FileNotFoundError(f"Cannot read HDR image: {input_path}")
+
+    # Ensure it’s float32
+    hdr = hdr.astype(np.float32)
+
+    # Some .hdr files load as single-channel; convert to 3-channel if needed
+    if hdr.ndim == 2:
+        hdr = cv2.merge([hdr, hdr, hdr])
+    elif hdr.shape[2] == 4:
+        # Drop alpha if present
+        hdr = hdr[:, :, :3]
+
+    if max_size and max(hdr.shape[:2]) > max_size:
+        scale = max_size / max(hdr.shape[:2])
+        size = (max(1, round(hdr.shape[1] * scale)), max(1, round(hdr.shape[0] * scale)))
+        hdr = cv2.resize(hdr, size, interpolation=cv2.INTER_AREA)
+
+    # Stray NaN/inf or negative pixels would poison the tone mapping
+    return np.nan_to_num(np.maximum(hdr, 0), nan=0.0, posinf=0.0)
+
+
+def luminance(hdr: np.ndarray) -> np.ndarray:
+    """Rec. 709 luminance of a BGR image."""
+    return hdr[..., 0] * 0.0722 + hdr[..., 1] * 0.7152 + hdr[..., 2] * 0.2126
+
+
+def tonemap_auto(
+    hdr: np.ndarray,
+    log_average: float,
+    white_point: float,
+    gamma: float = 2.2,
+) -> np.ndarray:
+    """Tone-map with Reinhard's photographic operator and known exposure.
+
+    The image is scaled so `log_average` lands on `AUTO_EXPOSURE_KEY`, and
+    `white_point` (e.g. the 99th luminance percentile) maps to white, so
+    dark and bright maps both get usable previews. Both values come from the
+    statistics computed at ingest, so nothing is measured here.
+
+    Returns:
+        np.ndarray: H×W×3 uint8 RGB.
+    """
+    import cv2
+    import numpy as np
+
+    scale = AUTO_EXPOSURE_KEY / max(log_average, 1e-6)
+    lum = luminance(hdr) * scale
+    white = max(white_point * scale, 1e-6)
+    mapped = lum * (1 + lum / (white * white)) / (1 + lum)
+    ratio = np.divide(mapped, lum, out=np.zeros_like(lum), where=lum > 0)
+    ldr = np.clip(hdr * (scale * ratio)[..., None], 0, 1) ** (1 / gamma)
+    return cv2.cvtColor((ldr * 255).astype(np.uint8), cv2.COLOR_BGR2RGB)
+
+
+def exposure_args(asset: dict) -> dict:
+    """`hdr_to_preview` arguments for auto-exposure from an asset's stats.
+
+    Empty when the asset has not been analyzed, which keeps the fixed
+    Reinhard settings.
+    """
+    log_average = asset.get("luminance_log_average")
+    white_point = asset.get("luminance_p99")
+    if not log_average or not white_point:
+        return {}
+    return {"log_average": log_average, "white_point": white_point}
 
 
 def hdr_to_preview(
@@ -13,20 +112,31 @@ def hdr_to_preview(
     color_adapt: float = 0.0,
     as_image: bool = True,
     as_bytes: bool = False,
+    max_size: int | None = None,
+    log_average: float | None = None,
+    white_point: float | None = None,
 ) -> Image.Image | np.ndarray | bytes:
-    """Load an HDR image, tone-map it, and return a preview representation.
+    """Load an image, tone-map it, and return a preview representation.
 
-    This function loads a 32-bit HDR environment map, applies Reinhard tone
-    mapping, and produces a low dynamic range version suitable for previews.
+    The image is read with the decoder registered for its extension, see
+    `uab.core.decoders`. HDR data (e.g. a 32-bit environment map) gets
+    Reinhard tone mapping to produce a low dynamic range version suitable
+    for previews; 8-bit images such as JPEG textures are used as they are.
 
     Args:
-        input_path (str | Path): Path to the HDR image.
+        input_path (str | Path): Path to the image.
         gamma (float, optional): Gamma correction factor. Defaults to 2.2.
         intensity (float, optional): Reinhard tone-mapping intensity. Defaults to 0.0.
         light_adapt (float, optional): Light adaptation factor. Defaults to 1.0.
         color_adapt (float, optional): Color adaptation factor. Defaults to 0.0.
         as_image (bool, optional): If True, return a Pillow Image.
         as_bytes (bool, optional): If True, return JPEG bytes (e.g. for web display).
+        max_size (int, optional): Downscale so the longest side is at most
+            this many pixels before tone mapping. Decoders use the format's
+            cheapest reduced decode where there is one.
+        log_average (float, optional): Log-average luminance of the image.
+            With `white_point`, switches to `tonemap_auto`; see `exposure_args`.
+        white_point (float, optional): Luminance that maps to white.
 
     Returns:
         Union[Image.Image, np.ndarray, bytes]:
@@ -35,38 +145,37 @@ def hdr_to_preview(
             - JPEG byte stream if `as_bytes` is True.
 
     Raises:
-        FileNotFoundError: If the HDR file cannot be loaded or is invalid.
+        FileNotFoundError: If the file cannot be loaded or is invalid.
+        ValueError: If no decoder handles the file's extension.
     """
-    input_path = Path(input_path)
+    import cv2
+    import numpy as np
+    from PIL import Image
 
-    hdr = cv2.imread(str(input_path), cv2.IMREAD_UNCHANGED)
-    if hdr is None:
-        raise FileNotFoundError(f"Cannot read HDR image: {input_path}")
-
-    # Ensure it’s float32
-    hdr = hdr.astype(np.float32)
+    from uab.core import decoders
 
-    # Some .hdr files load as single-channel; convert to 3-channel if needed
-    if hdr.ndim == 2:
-        hdr = cv2.merge([hdr, hdr, hdr])
-    elif hdr.shape[2] == 4:
-        # Drop alpha if present
-        hdr = hdr[:, :, :3]
+    hdr = decoders.decode_preview(input_path, max_size)
 
-    # Create tone mapping operator
-    tonemap = cv2.createTonemapReinhard(
-        gamma=gamma,
-        intensity=intensity,
-        light_adapt=light_adapt,
-        color_adapt=color_adapt,
-    )
+    if hdr.dtype == np.uint8:
+        # Already display-referred
+        ldr_rgb = cv2.cvtColor(hdr, cv2.COLOR_BGR2RGB)
+    elif log_average and white_point:
+        ldr_rgb = tonemap_auto(hdr, log_average, white_point, gamma=gamma)
+    else:
+        # Create tone mapping operator
+        tonemap = cv2.createTonemapReinhard(
+            gamma=gamma,
+            intensity=intensity,
+            light_adapt=light_adapt,
+            color_adapt=color_adapt,
+        )
 
-    # Apply tone mapping safely
-    ldr = tonemap.process(hdr)
+        # Apply tone mapping safely
+        ldr = tonemap.process(hdr)
 
-    # Convert to 8-bit RGB
-    ldr_8bit = np.clip(ldr * 255, 0, 255).astype(np.uint8)
-    ldr_rgb = cv2.cvtColor(ldr_8bit, cv2.COLOR_BGR2RGB)
+        # Convert to 8-bit RGB
+        ldr_8bit = np.clip(np.nan_to_num(ldr) * 255, 0, 255).astype(np.uint8)
+        ldr_rgb = cv2.cvtColor(ldr_8bit, cv2.COLOR_BGR2RGB)
 
     if as_bytes:
         img = Image.fromarray(ldr_rgb)
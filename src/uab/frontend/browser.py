@@ -1,9 +1,8 @@
-from typing import List, Optional
-from PySide6.QtCore import Qt, QSize, QPoint, QTimer
+import math
+from typing import Dict, Optional, Sequence
+from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtWidgets import (
     QWidget,
-    QGridLayout,
-    QSizePolicy,
     QLabel,
     QScrollArea,
     QVBoxLayout,
@@ -11,20 +10,37 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QWheelEvent, QShowEvent
 from PySide6.QtCore import QEvent
 
-from uab.frontend.thumbnail import Thumbnail
+from uab.core import tracing
+from uab.frontend.prefetch import ThumbnailPrefetcher
+from uab.frontend.thumbnail import Thumbnail, ThumbnailSource
+
+# Resize and zoom events within this many milliseconds share one relayout
+REFLOW_INTERVAL_MS = 16
+# A zoom gesture ends this long after its last wheel tick
+ZOOM_SETTLE_MS = 150
+# Rows of cells kept beyond the viewport in each direction
+CELL_BUFFER_ROWS = 1
 
 
 class Browser(QWidget):
     """
-    Styled Browser widget for displaying a grid of Thumbnail widgets.
+    Styled Browser widget for displaying a grid of assets.
 
     Features:
-      - Dynamic resizing & reflow.
-      - Ctrl + wheel = zoom centered on the mouse cursor.
+      - Virtualized: `Thumbnail` widgets exist only for the rows in and next
+        to the viewport, so drawing 100,000 assets costs the same as 100 and
+        the asset list is only indexed for the rows shown.
+      - Dynamic resizing & reflow, at most once per frame.
+      - Ctrl + wheel = zoom centered on the mouse cursor; pixmaps are scaled
+        coarsely during the gesture and re-rendered once it ends.
       - No scrolling occurs while Ctrl is held.
-      - Clean updates when thumbnails are added / removed.
+      - Thumbnails load as they scroll into view, see `ThumbnailPrefetcher`.
     """
 
+    asset_clicked = Signal(int)
+    asset_double_clicked = Signal(int)
+    instantiate_requested = Signal(int)
+
     def __init__(self, parent: Optional[QWidget] = None) -> None:
         super().__init__(parent)
 
@@ -50,84 +66,175 @@ class Browser(QWidget):
             }
         """)
 
+        # Cells are placed by `_update_cells`; the container only sets the
+        # scroll range
         self.grid_container = QWidget()
         self.grid_container.setStyleSheet("""
             QWidget {
                 background-color: #1e1e1e;
             }
         """)
-
-        self.grid = QGridLayout(self.grid_container)
-        self.grid.setSpacing(0)
-        self.grid.setContentsMargins(20, 20, 20, 20)
-        self.grid.setAlignment(Qt.AlignmentFlag.AlignTop |
-                               Qt.AlignmentFlag.AlignLeft)
+        self._margin = 20
+        self._spacing = 0
 
         self.scroll_area.setWidget(self.grid_container)
         main_layout.addWidget(self.scroll_area)
+        self._empty_message = self._create_empty_message()
+        main_layout.addWidget(self._empty_message)
 
         # Install event filter on viewport to intercept wheel events
         self.scroll_area.viewport().installEventFilter(self)
 
-        self._thumbnails: List[Thumbnail] = []
+        self._assets: Sequence[dict] = []
+        # Widgets of the rows in and next to the viewport, by index
+        self._cells: Dict[int, Thumbnail] = {}
+        self._selected_id: Optional[int] = None
         self._cell_min_width = 180            # base cell size
         self._last_cols = 0                   # cache column count
+        self._cell_size = 0                   # cache cell size
         self._scale_factor = 1.0              # zoom level (1.0 = default)
         self._has_shown = False               # track if widget has been shown
+        self._prefetcher = ThumbnailPrefetcher(self.scroll_area, self)
+        self.scroll_area.verticalScrollBar().valueChanged.connect(lambda _: self._update_cells())
+
+        # Bursts of resize and zoom events are coalesced into one reflow
+        self._reflow_timer = QTimer(self)
+        self._reflow_timer.setSingleShot(True)
+        self._reflow_timer.setInterval(REFLOW_INTERVAL_MS)
+        self._reflow_timer.timeout.connect(self._reflow_grid)
+
+        self._zoom_settle_timer = QTimer(self)
+        self._zoom_settle_timer.setSingleShot(True)
+        self._zoom_settle_timer.setInterval(ZOOM_SETTLE_MS)
+        self._zoom_settle_timer.timeout.connect(self._end_zoom)
+        self._zooming = False
+        # (content x, content y, cursor position, scale) when the pending zoom started
+        self._zoom_anchor: Optional[tuple] = None
 
     # Public API
 
-    def refresh_thumbnails(self, thumbnails: List[Thumbnail]) -> None:
-        """Rebuild grid when thumbnails change."""
-        self._thumbnails = list[Thumbnail](thumbnails or [])
+    def set_assets(self, assets: Sequence[dict]) -> None:
+        """Show `assets`, any sequence of asset dicts, e.g. a catalog `Snapshot`."""
+        self._assets = assets if assets is not None else []
         self._draw_thumbnails()
 
-    # Grid management
-
-    def _clear_grid(self) -> None:
-        """Remove all items from layout cleanly."""
-        while self.grid.count():
-            item = self.grid.takeAt(0)
-            w = item.widget()
-            if w:
-                w.setParent(None)
-                w.deleteLater()
-
-    def _draw_thumbnails(self) -> None:
-        """Create or refresh visible thumbnails."""
-        self._clear_grid()
+    def thumbnail(self, asset_id: int) -> Optional[Thumbnail]:
+        """The widget showing `asset_id`, if its row is on screen."""
+        return next((cell for cell in self._cells.values() if cell.asset_id == asset_id), None)
 
-        if not self._thumbnails:
-            self._show_empty_message()
-            return
+    def select_asset(self, asset_id: int) -> None:
+        """Select the asset, or clear the selection if it is selected already."""
+        self._selected_id = None if asset_id == self._selected_id else asset_id
+        for cell in self._cells.values():
+            if cell.is_selected != (cell.asset_id == self._selected_id):
+                cell.set_selected(not cell.is_selected)
 
-        for p in self._thumbnails:
-            p.setParent(self.grid_container)
+    # Grid management
 
-        self._reflow_grid()
+    def _draw_thumbnails(self) -> None:
+        """Start over with the current assets, keeping the scroll position."""
+        for index in list(self._cells):
+            self._release_cell(index)
+        self._prefetcher.set_sources(len(self._assets), self._create_source)
+        self._last_cols = 0
+        self._cell_size = 0
+
+        empty = not self._assets
+        self._empty_message.setVisible(empty)
+        self.scroll_area.setVisible(not empty)
+        if not empty:
+            self._reflow_grid()
 
+    def _create_source(self, index: int) -> ThumbnailSource:
+        return ThumbnailSource(self._assets[index])
+
+    def _create_cell(self, index: int) -> Thumbnail:
+        source = self._prefetcher.source(index)
+        cell = Thumbnail(source.asset, self.grid_container, source)
+        cell.setFixedSize(self._cell_size, self._cell_size)
+        cell.set_fast_scaling(self._zooming)
+        if cell.asset_id == self._selected_id:
+            cell.set_selected(True)
+        cell.asset_clicked.connect(self.asset_clicked)
+        cell.asset_double_clicked.connect(self.asset_double_clicked)
+        cell.instantiate_requested.connect(self.instantiate_requested)
+        cell.show()
+        self._cells[index] = cell
+        return cell
+
+    def _release_cell(self, index: int) -> None:
+        cell = self._cells.pop(index)
+        cell.release()
+        cell.hide()
+        cell.deleteLater()
+
+    def _schedule_reflow(self) -> None:
+        """Reflow on the next frame, once for any number of calls until then."""
+        if not self._reflow_timer.isActive():
+            self._reflow_timer.start()
+
+    @tracing.traced("browser.reflow_grid")
     def _reflow_grid(self) -> None:
-        """Re‑arrange thumbnails according to scale and container width."""
-        for i in reversed(range(self.grid.count())):
-            self.grid.takeAt(i)
+        """Re‑arrange cells according to scale and container width.
+
+        Only the cells on screen exist, so this costs the same for any
+        number of assets.
+        """
+        self._reflow_timer.stop()
+        if not self._assets:
+            return
 
         cols = self._compute_column_count()
-        self._last_cols = cols
         size = int(self._cell_min_width * self._scale_factor)
-        row, col = 0, 0
-
-        for p in self._thumbnails:
-            p.setFixedSize(QSize(size, size))
-            p.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
-            self.grid.addWidget(p, row, col, Qt.AlignmentFlag.AlignTop)
-            col += 1
-            if col >= cols:
-                col = 0
-                row += 1
-
-        # Stretch to fill last row evenly
-        for i in range(cols):
-            self.grid.setColumnStretch(i, 1)
+        resized = size != self._cell_size
+        if resized or cols != self._last_cols:
+            self._cell_size = size
+            self._last_cols = cols
+            rows = math.ceil(len(self._assets) / cols)
+            height = 2 * self._margin + rows * (size + self._spacing) - self._spacing
+            self.grid_container.setMinimumHeight(height)
+            # Resized now rather than on the next layout pass, so the scroll
+            # range fits before the zoom anchor is restored
+            self.grid_container.resize(self.scroll_area.viewport().width(), height)
+
+        if self._zoom_anchor is not None:
+            self._restore_zoom_anchor()
+
+        self._update_cells(relayout=True, resized=resized)
+        self._prefetcher.set_geometry(cols, size + self._spacing, self._margin)
+        self._prefetcher.update()
+
+    def _update_cells(self, relayout: bool = False, resized: bool = False) -> None:
+        """Create the cells of the rows in and next to the viewport and drop the rest.
+
+        With `relayout`, cells that already exist are moved too, and with
+        `resized` also given the current cell size.
+        """
+        if not self._assets or not self._last_cols:
+            return
+        cols, size = self._last_cols, self._cell_size
+        pitch = size + self._spacing
+        top = self.scroll_area.verticalScrollBar().value() - self._margin
+        height = self.scroll_area.viewport().height()
+        rows = math.ceil(len(self._assets) / cols)
+        first = max(0, top // pitch - CELL_BUFFER_ROWS)
+        last = min(rows - 1, (top + height) // pitch + CELL_BUFFER_ROWS)
+        wanted = range(first * cols, min((last + 1) * cols, len(self._assets)))
+
+        for index in [index for index in self._cells if index not in wanted]:
+            self._release_cell(index)
+        # Spread the columns over the width, each cell at the left of its column
+        column_width = (self.scroll_area.viewport().width() - 2 * self._margin) / cols
+        for index in wanted:
+            cell = self._cells.get(index)
+            if cell is None:
+                cell = self._create_cell(index)
+            elif not relayout:
+                continue
+            elif resized:
+                cell.setFixedSize(size, size)
+            row, col = divmod(index, cols)
+            cell.move(self._margin + int(col * column_width), self._margin + row * pitch)
 
     def _compute_column_count(self) -> int:
         """Determine how many cells fit per row."""
@@ -140,20 +247,19 @@ class Browser(QWidget):
             # Default to 1200px
             available = 1200
 
-        spacing = self.grid.spacing()
-        margins = self.grid.contentsMargins()
-        available -= margins.left() + margins.right()
+        available -= 2 * self._margin
         scaled_width = int(self._cell_min_width * self._scale_factor)
-        return max(1, available // (scaled_width + spacing))
+        return max(1, available // (scaled_width + self._spacing))
 
-    def _show_empty_message(self) -> None:
-        """Display a 'no assets' placeholder."""
+    def _create_empty_message(self) -> QWidget:
+        """The 'no assets' placeholder, shown instead of the grid."""
         empty_container = QWidget()
         layout = QVBoxLayout(empty_container)
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         icon = QLabel("📁")
         icon.setStyleSheet("font-size: 64pt; color: #666;")
+        icon.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(icon)
 
         text = QLabel("No assets to display")
@@ -162,7 +268,8 @@ class Browser(QWidget):
         text.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(text)
 
-        self.grid.addWidget(empty_container, 0, 0, 1, -1)
+        empty_container.hide()
+        return empty_container
 
     # Event Handlers
 
@@ -183,17 +290,16 @@ class Browser(QWidget):
     def showEvent(self, event: QShowEvent):
         """Trigger reflow when widget is first shown to fix initial layout."""
         super().showEvent(event)
-        if not self._has_shown and self._thumbnails:
+        if not self._has_shown and self._assets:
             # Defer reflow to ensure layout is complete
-            QTimer.singleShot(0, self._reflow_grid)
+            self._schedule_reflow()
             self._has_shown = True
 
     def resizeEvent(self, event):
-        """Re‑layout on resize if column count changes."""
+        """Re‑layout on resize."""
         super().resizeEvent(event)
-        cols = self._compute_column_count()
-        if cols != self._last_cols:
-            self._reflow_grid()
+        # Column positions depend on the width and the rows shown on the height
+        self._schedule_reflow()
 
     def _handle_zoom(self, event: QWheelEvent):
         """
@@ -209,25 +315,44 @@ class Browser(QWidget):
         h_scroll = self.scroll_area.horizontalScrollBar()
         v_scroll = self.scroll_area.verticalScrollBar()
 
-        # Position in content coordinates before zoom
-        pre_x = h_scroll.value() + mouse_pos.x()
-        pre_y = v_scroll.value() + mouse_pos.y()
-
         # Compute new zoom
         delta = event.angleDelta().y() / 240.0
         factor_change = 1.0 + delta * 0.2
         new_scale = max(0.3, min(self._scale_factor * factor_change, 2.74))
 
-        # Ratio between old and new scales
-        scale_ratio = new_scale / self._scale_factor
+        # Position in content coordinates before the first tick of this
+        # reflow; later ticks only change the scale
+        if self._zoom_anchor is None:
+            self._zoom_anchor = (
+                h_scroll.value() + mouse_pos.x(),
+                v_scroll.value() + mouse_pos.y(),
+                mouse_pos,
+                self._scale_factor,
+            )
         self._scale_factor = new_scale
 
-        # Reflow previews at new size
-        self._reflow_grid()
+        if not self._zooming:
+            self._zooming = True
+            for p in self._cells.values():
+                p.set_fast_scaling(True)
+        self._zoom_settle_timer.start()
 
-        # Compute new scroll so that point under cursor stays fixed
-        h_scroll.setValue(int(pre_x * scale_ratio) - mouse_pos.x())
-        v_scroll.setValue(int(pre_y * scale_ratio) - mouse_pos.y())
+        # Reflow previews at new size
+        self._schedule_reflow()
+
+    def _restore_zoom_anchor(self) -> None:
+        """Scroll so that the point under the cursor stays fixed."""
+        pre_x, pre_y, mouse_pos, scale = self._zoom_anchor
+        self._zoom_anchor = None
+        scale_ratio = self._scale_factor / scale
+        self.scroll_area.horizontalScrollBar().setValue(int(pre_x * scale_ratio) - mouse_pos.x())
+        self.scroll_area.verticalScrollBar().setValue(int(pre_y * scale_ratio) - mouse_pos.y())
+
+    def _end_zoom(self) -> None:
+        """Re-render the pixmaps smoothly at the final size."""
+        self._zooming = False
+        for p in self._cells.values():
+            p.set_fast_scaling(False)
 
     def wheelEvent(self, event: QWheelEvent):
         """
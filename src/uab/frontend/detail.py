@@ -2,14 +2,19 @@ from pathlib import Path
 from typing import Any, Optional
 
 from PySide6.QtCore import Signal, Qt
-from PySide6.QtGui import QPixmap
+from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QLineEdit, QTextEdit, QPushButton, QScrollArea,
     QFrame, QSizePolicy
 )
 
-from uab.core import utils
+from uab.core import tracing, utils
+from uab.frontend import preview_loader
+
+# Preview decodes are sized up to a multiple of this, so small window
+# resizes still reuse the cached preview
+PREVIEW_SIZE_STEP = 256
 
 
 class Detail(QWidget):
@@ -27,12 +32,16 @@ class Detail(QWidget):
     back_clicked = Signal()
     save_clicked = Signal(dict)  # Emits the updated asset data
     delete_clicked = Signal(int)
+    favorite_toggled = Signal(int, bool)  # (asset id, is now a favorite)
 
     def __init__(self, parent: Optional[QWidget] = None) -> None:
         super().__init__(parent)
 
         self.current_asset: Optional[dict] = None
         self.is_edit_mode: bool = False
+        self._preview_request: Optional[preview_loader.PreviewRequest] = None
+        # (path, size) of the preview shown or being decoded
+        self._preview_key: Optional[tuple] = None
 
         self._init_ui()
 
@@ -87,6 +96,12 @@ class Detail(QWidget):
         self.btn_delete.setMaximumWidth(80)
         self.btn_delete.clicked.connect(self._on_delete_clicked)
 
+        self.btn_favorite = QPushButton("☆ Favorite")
+        self.btn_favorite.setToolTip("Add to or remove from your favorites")
+        self.btn_favorite.setCheckable(True)
+        self.btn_favorite.setMaximumWidth(100)
+        self.btn_favorite.toggled.connect(self._on_favorite_toggled)
+
         self.btn_save = QPushButton("Save")
         self.btn_save.setToolTip("Save changes to asset metadata")
         self.btn_save.setMaximumWidth(80)
@@ -101,6 +116,7 @@ class Detail(QWidget):
 
         button_layout.addWidget(self.btn_edit)
         button_layout.addWidget(self.btn_delete)
+        button_layout.addWidget(self.btn_favorite)
         button_layout.addWidget(self.btn_save)
         button_layout.addWidget(self.btn_cancel)
         button_layout.addStretch()
@@ -245,59 +261,38 @@ class Detail(QWidget):
 
         main_layout.addWidget(right_panel, 3)
 
-    def draw_details(self, asset: dict) -> None:
+    def draw_details(self, asset: dict, placeholder: Optional[QPixmap] = None) -> None:
         """
         Draw the full details view for the given asset.
 
         Args:
             asset: Dictionary containing asset data with keys:
-                   name, directory_path, description, tags, id, preview_image_file_path
+                   name, directory_path, description, tags, id, preview_image_file_path,
+                   and optionally favorite
+            placeholder: Pixmap to show until the full preview is decoded,
+                         typically the grid thumbnail
         """
         self.current_asset = asset
-        self.display_metadata(asset)
+        self.display_metadata(asset, placeholder)
+        self.set_favorite(bool(asset and asset.get('favorite')))
         self._set_edit_mode(False)
 
-    def display_metadata(self, asset: dict) -> None:
+    @tracing.traced("detail.display_metadata")
+    def display_metadata(self, asset: dict, placeholder: Optional[QPixmap] = None) -> None:
         """
         Display metadata for the given asset without entering edit mode.
 
+        The preview is decoded in the background; until then the placeholder
+        is shown.
+
         Args:
             asset: Dictionary containing asset data
+            placeholder: Pixmap to show until the full preview is decoded
         """
         if not asset:
             return
 
-        # TODO: @thumbnail.py has a method that does exactly the same thing.
-        pixmap = QPixmap()
-        directory_path = Path(asset.get('directory_path', ''))
-        if directory_path and directory_path.exists():
-            try:
-                byte_image = utils.hdr_to_preview(
-                    directory_path, as_bytes=True)
-                pixmap.loadFromData(byte_image)
-            except Exception as e:
-                print(f"Error loading preview: {e}")
-
-            if not pixmap.isNull():
-                scaled_pixmap = pixmap.scaled(
-                    self.preview_label.width() - 40,
-                    self.preview_label.height() - 40,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                self.preview_label.setPixmap(scaled_pixmap)
-            else:
-                self.preview_label.setText("Preview not available")
-                self.preview_label.setStyleSheet(
-                    "border: 1px solid #333; background-color: #0a0a0a; "
-                    "border-radius: 4px; color: #666; font-size: 14pt;"
-                )
-        else:
-            self.preview_label.setText("Preview not available")
-            self.preview_label.setStyleSheet(
-                "border: 1px solid #333; background-color: #0a0a0a; "
-                "border-radius: 4px; color: #666; font-size: 14pt;"
-            )
+        self._load_preview(asset, placeholder)
 
         # Display name
         name = asset.get('name', 'Unnamed Asset')
@@ -324,6 +319,71 @@ class Detail(QWidget):
         self.tags_edit.setText(
             ', '.join(tags) if isinstance(tags, list) else str(tags))
 
+    def _load_preview(self, asset: dict, placeholder: Optional[QPixmap]) -> None:
+        """Show the asset's preview: cached, already loading, or queued."""
+        directory_path = Path(asset.get('directory_path', ''))
+        if not asset.get('directory_path') or not directory_path.is_file():
+            self.cancel_preview()
+            self._show_preview_unavailable()
+            return
+
+        path = str(directory_path)
+        step = PREVIEW_SIZE_STEP
+        longest = max(self.preview_label.width(), self.preview_label.height()) - 40
+        size = max(step, -(-longest // step) * step)
+        if (path, size) == self._preview_key:
+            # Same preview, e.g. when entering edit mode: keep what is shown
+            return
+
+        self.cancel_preview()
+        self._preview_key = (path, size)
+        exposure = utils.exposure_args(asset)
+        loader = preview_loader.get_loader()
+        image = loader.cached(path, size, exposure)
+        if image is not None:
+            self._show_preview(QPixmap.fromImage(image))
+            return
+
+        if placeholder is not None and not placeholder.isNull():
+            self._show_preview(placeholder)
+        else:
+            self.preview_label.clear()
+        # Ahead of grid thumbnails: this is what the user is looking at
+        self._preview_request = loader.request(
+            path, size, exposure, self._on_preview_loaded, priority=-1, cache=True)
+
+    def cancel_preview(self) -> None:
+        """Stop decoding the preview of the asset being left."""
+        self._preview_key = None
+        if self._preview_request is not None:
+            self._preview_request.cancel()
+            self._preview_request = None
+
+    def _on_preview_loaded(self, image: QImage) -> None:
+        self._preview_request = None
+        if image.isNull():
+            self._show_preview_unavailable()
+        else:
+            self._show_preview(QPixmap.fromImage(image))
+
+    def _show_preview(self, pixmap: QPixmap) -> None:
+        scaled_pixmap = pixmap.scaled(
+            self.preview_label.width() - 40,
+            self.preview_label.height() - 40,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.SmoothTransformation
+        )
+        self.preview_label.setPixmap(scaled_pixmap)
+        self.preview_label.setStyleSheet(
+            "border: 1px solid #333; background-color: #0a0a0a; border-radius: 4px;")
+
+    def _show_preview_unavailable(self) -> None:
+        self.preview_label.setText("Preview not available")
+        self.preview_label.setStyleSheet(
+            "border: 1px solid #333; background-color: #0a0a0a; "
+            "border-radius: 4px; color: #666; font-size: 14pt;"
+        )
+
     def edit_metadata(self, asset: dict) -> None:
         """
         Enter edit mode for the asset metadata.
@@ -388,8 +448,22 @@ class Detail(QWidget):
         self.btn_save.setVisible(edit_mode)
         self.btn_cancel.setVisible(edit_mode)
 
+    def set_favorite(self, favorite: bool) -> None:
+        """Show the favorite state without emitting `favorite_toggled`."""
+        self.btn_favorite.blockSignals(True)
+        self.btn_favorite.setChecked(favorite)
+        self.btn_favorite.blockSignals(False)
+        self.btn_favorite.setText("★ Favorite" if favorite else "☆ Favorite")
+
+    def _on_favorite_toggled(self, favorite: bool) -> None:
+        self.btn_favorite.setText("★ Favorite" if favorite else "☆ Favorite")
+        if self.current_asset:
+            self.current_asset['favorite'] = favorite
+            self.favorite_toggled.emit(self.current_asset['id'], favorite)
+
     def _on_back_clicked(self) -> None:
         """Handle back button click."""
+        self.cancel_preview()
         self.back_clicked.emit()
 
     def _on_delete_clicked(self) -> None:
@@ -1,4 +1,7 @@
+from typing import Optional, Sequence
+
 from PySide6.QtCore import Signal
+from PySide6.QtGui import QKeySequence, QPixmap, QShortcut
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -9,7 +12,6 @@ from uab.core.desktop_presenter import DesktopPresenter
 from uab.core.houdini_presenter import HoudiniPresenter
 from uab.frontend.browser import Browser
 from uab.frontend.detail import Detail
-from uab.frontend.thumbnail import Thumbnail
 from uab.frontend.toolbar import Toolbar
 from uab.frontend.status_bar import StatusBar
 
@@ -24,11 +26,15 @@ class MainWidget(QWidget):
     renderer_changed = Signal(str)
     import_clicked = Signal(str)
     delete_asset_clicked = Signal(int)
+    favorite_toggled = Signal(int, bool)
+    dump_trace_requested = Signal()
+    asset_clicked = Signal(int)
+    asset_double_clicked = Signal(int)
+    asset_instantiate_requested = Signal(int)
 
-    def __init__(self, dcc: str, parent: QWidget | None = None) -> None:
+    def __init__(self, dcc: str, parent: QWidget | None = None, server=None) -> None:
         super().__init__(parent)
         self.current_asset = None
-        self.current_thumbnails = []
 
         # Root layout
         self.layout = QVBoxLayout(self)
@@ -69,23 +75,32 @@ class MainWidget(QWidget):
         # Connections
         self.detail.back_clicked.connect(self.show_browser)
         self.detail.delete_clicked.connect(self._on_delete_asset_clicked)
+        self.detail.favorite_toggled.connect(self.favorite_toggled.emit)
         self.toolbar.import_asset_selected.connect(self._on_import_clicked)
         self.toolbar.renderer_changed.connect(self._on_renderer_changed)
+        self.browser.asset_clicked.connect(self.asset_clicked.emit)
+        self.browser.asset_double_clicked.connect(self.asset_double_clicked.emit)
+        self.browser.instantiate_requested.connect(self.asset_instantiate_requested.emit)
+
+        # Write a Chrome trace of the recorded GUI spans
+        self.dump_trace_shortcut = QShortcut(QKeySequence("Ctrl+Shift+T"), self)
+        self.dump_trace_shortcut.activated.connect(self.dump_trace_requested.emit)
 
         match dcc:
             case "hou":
-                self.presenter = HoudiniPresenter(self)
+                self.presenter = HoudiniPresenter(self, server)
             case "desktop":
-                self.presenter = DesktopPresenter(self)
+                self.presenter = DesktopPresenter(self, server)
             case _:
                 raise ValueError(f"Invalid DCC: {dcc}")
 
     def show_browser(self) -> None:
+        self.detail.cancel_preview()
         self.stacked.setCurrentWidget(self.browser)
 
-    def show_asset_detail(self, asset: dict) -> None:
+    def show_asset_detail(self, asset: dict, placeholder: Optional[QPixmap] = None) -> None:
         self.stacked.setCurrentWidget(self.detail)
-        self.detail.draw_details(asset)
+        self.detail.draw_details(asset, placeholder)
 
     def show_message(
         self, msg: str, message_type: str = "info", timeout: int = 5000
@@ -110,16 +125,8 @@ class MainWidget(QWidget):
     def set_current_asset(self, asset: dict) -> None:
         self.current_asset = asset
 
-    def draw_thumbnails(self, thumbnails: list[Thumbnail]) -> None:
-        self.current_thumbnails = thumbnails
-        self.browser.refresh_thumbnails(thumbnails)
-
-    def set_new_selected_thumbnail(self, thumbnail: Thumbnail) -> Thumbnail:
-        if thumbnail.is_selected:
-            thumbnail.set_selected(False)
-            return thumbnail
-        for p in self.current_thumbnails:
-            if p.asset_id != thumbnail.asset_id:
-                p.set_selected(False)
-        thumbnail.set_selected(True)
-        return thumbnail
+    def draw_assets(self, assets: Sequence[dict]) -> None:
+        self.browser.set_assets(assets)
+
+    def select_asset(self, asset_id: int) -> None:
+        self.browser.select_asset(asset_id)
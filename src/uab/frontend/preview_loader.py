@@ -0,0 +1,225 @@
+"""Background decoding of HDR previews for the GUI.
+
+Decoding and tone-mapping a large map takes from a fraction of a second to
+several seconds, so widgets ask the shared `PreviewLoader` for a preview and
+get a callback on the GUI thread when it is ready. Workers build `QImage`s,
+which unlike `QPixmap`s may be created off the GUI thread.
+
+Requests are served lowest `priority` first, and their priority can be
+changed while they wait, e.g. as the grid scrolls. At most
+`UAB_PREVIEW_WORKERS` decodes run at once, and fewer when their estimated
+memory would exceed `UAB_PREVIEW_MEMORY_MB`.
+
+A request can be cancelled: if it has not started it is dropped, otherwise
+its result is discarded when the decode finishes. Requests made with
+`cache=True` keep their image in a small in-memory cache, bounded by
+`UAB_PREVIEW_CACHE_MB`, even when cancelled late, so `cached` can return it
+the next time the same preview is wanted.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QImage
+
+from uab.core import tracing, utils
+
+PREVIEW_WORKERS = int(os.environ.get("UAB_PREVIEW_WORKERS", min(8, os.cpu_count() or 1)))
+PREVIEW_MEMORY_BUDGET = int(os.environ.get("UAB_PREVIEW_MEMORY_MB", "1024")) * 1024 * 1024
+# Peak memory of a decode per byte of file: RGBE files expand to float32
+# RGB, plus the copies made while resizing and tone-mapping
+DECODE_MEMORY_FACTOR = 8
+PREVIEW_CACHE_SIZE = int(os.environ.get("UAB_PREVIEW_CACHE_MB", "256")) * 1024 * 1024
+
+
+class PreviewRequest:
+    """Handle to a pending preview; `cancel` drops it."""
+
+    def __init__(self, path: str, max_size: Optional[int], exposure: dict,
+                 callback: Callable[[QImage], None], priority: float, cache: bool = False):
+        self.path = path
+        self.max_size = max_size
+        self.exposure = exposure
+        self.callback = callback
+        self.priority = priority
+        self.cache = cache
+        self.cancelled = False
+        self.started = False
+        try:
+            self.cost = os.path.getsize(path) * DECODE_MEMORY_FACTOR
+        except OSError:
+            self.cost = 0
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+def decode_preview(path: str, max_size: Optional[int] = None, exposure: Optional[dict] = None) -> QImage:
+    """Tone-mapped preview of the HDR at `path` as a QImage; null if it cannot be read.
+
+    Safe to call from any thread.
+    """
+    with tracing.span("preview_loader.decode") as span:
+        try:
+            rgb = utils.hdr_to_preview(path, as_image=False, max_size=max_size, **(exposure or {}))
+            span.add_bytes(os.path.getsize(path))
+        except Exception as e:
+            print(f"Error loading HDR preview for {path}: {e}")
+            return QImage()
+    height, width = rgb.shape[:2]
+    # Copied, so the image owns its pixels once the array is freed
+    return QImage(rgb.data, width, height, 3 * width, QImage.Format.Format_RGB888).copy()
+
+
+def _cache_key(path: str, max_size: Optional[int], exposure: dict) -> Optional[tuple]:
+    # The file's stamp is part of the key, so an edited map is decoded again
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size, max_size, tuple(sorted(exposure.items()))
+
+
+class ImageCache:
+    """Least recently used images, up to `capacity` bytes. GUI thread only."""
+
+    def __init__(self, capacity: int = PREVIEW_CACHE_SIZE):
+        self.capacity = capacity
+        self._images: OrderedDict[tuple, QImage] = OrderedDict()
+        self._size = 0
+
+    def get(self, key: tuple) -> Optional[QImage]:
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+        return image
+
+    def put(self, key: tuple, image: QImage) -> None:
+        if key in self._images:
+            self._size -= self._images.pop(key).sizeInBytes()
+        if image.sizeInBytes() > self.capacity:
+            return
+        self._images[key] = image
+        self._size += image.sizeInBytes()
+        while self._size > self.capacity:
+            _, evicted = self._images.popitem(last=False)
+            self._size -= evicted.sizeInBytes()
+
+
+class PreviewLoader(QObject):
+    # Emitted from a worker with (request, image); delivered on the GUI thread
+    _decoded = Signal(object, QImage)
+
+    def __init__(self, workers: int = PREVIEW_WORKERS, memory_budget: int = PREVIEW_MEMORY_BUDGET,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.memory_budget = memory_budget
+        self._condition = threading.Condition()
+        # Entries are (priority, sequence, request); re-prioritizing pushes a
+        # new entry and the outdated one is skipped when popped
+        self._queue: list[tuple] = []
+        self._sequence = itertools.count()
+        self._compact_at = 1024
+        self._in_flight = 0
+        self._in_flight_cost = 0
+        self._cache = ImageCache()
+        self._decoded.connect(self._deliver)
+        for i in range(max(1, workers)):
+            threading.Thread(target=self._work, name=f"uab-preview-{i}", daemon=True).start()
+
+    def request(self, path: str, max_size: Optional[int], exposure: dict,
+                callback: Callable[[QImage], None], priority: float = 0,
+                cache: bool = False) -> PreviewRequest:
+        """Decode `path` with its longest side at most `max_size` pixels.
+
+        `callback` is called on the GUI thread with the image, unless the
+        request is cancelled first. Lower `priority` values are served first.
+        With `cache`, the image is kept for `cached`.
+        """
+        request = PreviewRequest(path, max_size, exposure, callback, priority, cache)
+        with self._condition:
+            self._push(request)
+        return request
+
+    def cached(self, path: str, max_size: Optional[int], exposure: dict) -> Optional[QImage]:
+        """The image of an earlier cached request for the same preview, if still kept."""
+        key = _cache_key(path, max_size, exposure)
+        return None if key is None else self._cache.get(key)
+
+    def set_priority(self, request: PreviewRequest, priority: float) -> None:
+        """Move a waiting request in the queue; no effect once it has started."""
+        with self._condition:
+            if request.started or request.cancelled or request.priority == priority:
+                return
+            request.priority = priority
+            self._push(request)
+
+    def _push(self, request: PreviewRequest) -> None:
+        heapq.heappush(self._queue, (request.priority, next(self._sequence), request))
+        if len(self._queue) > self._compact_at:
+            # Drop outdated entries before they pile up
+            self._queue = [entry for entry in self._queue if self._is_current(entry)]
+            heapq.heapify(self._queue)
+            self._compact_at = max(1024, 2 * len(self._queue))
+        self._condition.notify()
+
+    @staticmethod
+    def _is_current(entry: tuple) -> bool:
+        priority, _, request = entry
+        return not (request.cancelled or request.started or priority != request.priority)
+
+    def _next_request(self) -> PreviewRequest:
+        with self._condition:
+            while True:
+                while self._queue and not self._is_current(self._queue[0]):
+                    heapq.heappop(self._queue)
+                if self._queue:
+                    request = self._queue[0][2]
+                    # A single decode may exceed the budget on its own
+                    if not self._in_flight or self._in_flight_cost + request.cost <= self.memory_budget:
+                        heapq.heappop(self._queue)
+                        request.started = True
+                        self._in_flight += 1
+                        self._in_flight_cost += request.cost
+                        return request
+                self._condition.wait()
+
+    def _work(self) -> None:
+        while True:
+            request = self._next_request()
+            try:
+                image = decode_preview(request.path, request.max_size, request.exposure)
+                if request.cache or not request.cancelled:
+                    self._decoded.emit(request, image)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._in_flight_cost -= request.cost
+                    self._condition.notify_all()
+
+    def _deliver(self, request: PreviewRequest, image: QImage) -> None:
+        if request.cache and not image.isNull():
+            key = _cache_key(request.path, request.max_size, request.exposure)
+            if key is not None:
+                self._cache.put(key, image)
+        # Cancelled requests can still arrive if the decode was already done
+        if not request.cancelled:
+            request.callback(image)
+
+
+_loader: Optional[PreviewLoader] = None
+_loader_lock = threading.Lock()
+
+
+def get_loader() -> PreviewLoader:
+    """The shared loader; create it from the GUI thread first."""
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = PreviewLoader()
+        return _loader
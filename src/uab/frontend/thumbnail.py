@@ -1,7 +1,7 @@
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict
 import os
 from PySide6.QtCore import Qt, QSize, QEvent, Signal, QPoint, QTimer
-from PySide6.QtGui import QPixmap, QColor
+from PySide6.QtGui import QPixmap, QColor, QImage
 from PySide6.QtWidgets import (
     QSizePolicy,
     QWidget,
@@ -13,11 +13,16 @@ from PySide6.QtWidgets import (
     QDialog,
     QMenu,
 )
-from uab.core import utils
+from uab.core import decoders, utils
+from uab.frontend import preview_loader
 
 
 class LargePreviewPopup(QDialog):
-    """Frameless popup that shows a large scaled pixmap near the hovered widget."""
+    """Frameless popup that shows a large scaled pixmap near the hovered widget.
+
+    It opens with whatever pixmap it is given (the grid thumbnail) and
+    `refine` swaps in a screen-sized decode once it is ready.
+    """
 
     def __init__(self, parent=None):
         super().__init__(parent, Qt.ToolTip)
@@ -38,6 +43,10 @@ class LargePreviewPopup(QDialog):
         layout.addWidget(self.label)
         self._hover = False
         self._pending_hide = False
+        self._request: Optional[preview_loader.PreviewRequest] = None
+
+    def _max_size(self, percent_of_screen: float):
+        return self.screen().availableGeometry().size() * percent_of_screen
 
     def set_pixmap(self, pm: QPixmap, percent_of_screen: float = 0.5):
         # Fit to a large size (limit for screen safety)
@@ -45,8 +54,7 @@ class LargePreviewPopup(QDialog):
             self.label.setText("No Preview")
             self.label.setStyleSheet("color:#888; font-size:10pt;")
         else:
-            screen = self.screen()
-            max_size = screen.availableGeometry().size() * percent_of_screen
+            max_size = self._max_size(percent_of_screen)
             scaled = pm.scaled(
                 max_size.width(),
                 max_size.height(),
@@ -56,6 +64,25 @@ class LargePreviewPopup(QDialog):
             self.label.setPixmap(scaled)
             self.label.setStyleSheet("")
 
+    def refine(self, path: str, exposure: dict, percent_of_screen: float = 0.5):
+        """Decode `path` at the popup's size in the background and show it when ready."""
+        self.cancel_refine()
+        max_size = self._max_size(percent_of_screen)
+        self._request = preview_loader.get_loader().request(
+            path, max(max_size.width(), max_size.height()), exposure,
+            lambda image: self._on_refined(image, percent_of_screen))
+
+    def cancel_refine(self):
+        if self._request is not None:
+            self._request.cancel()
+            self._request = None
+
+    def _on_refined(self, image: QImage, percent_of_screen: float):
+        self._request = None
+        if image.isNull() or not self.isVisible():
+            return
+        self.set_pixmap(QPixmap.fromImage(image), percent_of_screen)
+
     def enterEvent(self, event):
         self._hover = True
 
@@ -69,10 +96,90 @@ class LargePreviewPopup(QDialog):
 
     def safe_hide(self):
         if not self._hover:
+            # Stop decoding for a popup that is gone, so fast sweeps over
+            # the grid do not queue up decodes
+            self.cancel_refine()
             self.hide()
 
 
+# Longest side of grid thumbnails; larger cells scale them up
+THUMBNAIL_SIZE = 320
+
+
+class ThumbnailSource:
+    """The grid thumbnail of one asset: its queued decode and the result.
+
+    Kept apart from the `Thumbnail` widget, since the browser only creates
+    widgets for the cells on screen while decodes are queued further
+    ahead. Decoded images also go to the preview loader's cache, so a cell
+    scrolled back to later does not decode again.
+    """
+
+    def __init__(self, asset: Dict):
+        self.asset = asset
+        self.path = self._thumbnail_path()
+        self.exposure = utils.exposure_args(asset)
+        self.image: Optional[QImage] = None
+        # Called with the image once loaded; set by the widget showing it
+        self.on_loaded: Optional[Callable[[QImage], None]] = None
+        self._request: Optional[preview_loader.PreviewRequest] = None
+        self._loaded = not self.path
+        if self.path:
+            self.image = preview_loader.get_loader().cached(self.path, THUMBNAIL_SIZE, self.exposure)
+            self._loaded = self.image is not None
+
+    def _thumbnail_path(self) -> str:
+        """The image file to preview, or an empty string if there is none."""
+        dir_path = self.asset.get('directory_path') or ''
+
+        # Normalize the directory path
+        norm = os.path.normpath(str(dir_path)) if dir_path else ''
+
+        # Check if directory_path is an image a decoder can read
+        if norm and decoders.is_supported(norm) and os.path.isfile(norm):
+            return norm
+        return ''
+
+    @property
+    def thumbnail_pending(self) -> bool:
+        return not self._loaded
+
+    def request_thumbnail(self, priority: float = 0) -> None:
+        """Queue the preview decode, or move it in the queue if already queued.
+
+        Lower priorities load first. Decodes use the exposure stats computed
+        at ingest when present.
+        """
+        if self._loaded:
+            return
+        loader = preview_loader.get_loader()
+        if self._request is not None:
+            loader.set_priority(self._request, priority)
+            return
+        self._request = loader.request(
+            self.path, THUMBNAIL_SIZE, self.exposure, self._on_loaded, priority, cache=True)
+
+    def cancel_thumbnail(self) -> None:
+        if self._request is not None:
+            self._request.cancel()
+            self._request = None
+
+    def _on_loaded(self, image: QImage) -> None:
+        self._request = None
+        self._loaded = True
+        self.image = image
+        if self.on_loaded is not None:
+            self.on_loaded(image)
+
+
 class Thumbnail(QWidget):
+    """Grid cell for one asset.
+
+    The preview is not decoded on creation: the browser calls
+    `request_thumbnail` for the cells that are visible or about to be, or
+    passes the `source` it already queued.
+    """
+
     asset_clicked = Signal(int)
     asset_double_clicked = Signal(int)
     open_image_requested = Signal(int)
@@ -83,15 +190,20 @@ class Thumbnail(QWidget):
         self,
         asset: Dict,
         parent: Optional[QWidget] = None,
+        source: Optional[ThumbnailSource] = None,
     ) -> None:
         super().__init__(parent)
         self.asset = asset
         self.asset_id = asset.get('id')
         self.asset_name = asset.get('name', '')
-        self.thumbnail: QPixmap = self._load_thumbnail()
+        self.source = source or ThumbnailSource(asset)
+        self.source.on_loaded = self._on_thumbnail_loaded
+        self.thumbnail = QPixmap() if self.source.image is None else QPixmap.fromImage(self.source.image)
+        self._fast_scaling = False
         self.is_selected = False
         self._hover = False
-        self._large_preview = LargePreviewPopup(self)
+        # Created on first hover
+        self._large_preview: Optional[LargePreviewPopup] = None
 
         # core styling
         self.setStyleSheet("""
@@ -161,26 +273,41 @@ class Thumbnail(QWidget):
 
         self._update_pixmap_display()
 
-    def _load_thumbnail(self) -> QPixmap:
-        """Load thumbnail from asset's directory_path or preview_image_file_path."""
-        pixmap = QPixmap()
-        dir_path = self.asset.get('directory_path') or ''
+    @property
+    def thumbnail_pending(self) -> bool:
+        return self.source.thumbnail_pending
 
-        # Normalize the directory path
-        norm = os.path.normpath(str(dir_path)) if dir_path else ''
+    def request_thumbnail(self, priority: float = 0) -> None:
+        """Queue the preview decode, see `ThumbnailSource.request_thumbnail`."""
+        self.source.request_thumbnail(priority)
+
+    def cancel_thumbnail(self) -> None:
+        self.source.cancel_thumbnail()
+
+    def release(self) -> None:
+        """Detach from the source before the widget is deleted; the decode stays queued."""
+        if self.source.on_loaded == self._on_thumbnail_loaded:
+            self.source.on_loaded = None
+        if hasattr(self, "_hover_timer"):
+            self._hover_timer.stop()
+        if self._large_preview is not None:
+            self._large_preview.cancel_refine()
+            self._large_preview.hide()
+
+    def _on_thumbnail_loaded(self, image: QImage) -> None:
+        self.thumbnail = QPixmap.fromImage(image)
+        self._update_pixmap_display()
 
-        # Check if directory_path is a .hdr file
-        if norm and norm.lower().endswith('.hdr') and os.path.isfile(norm):
-            try:
-                # Use hdr_to_preview to generate a tone-mapped preview
-                byte_image = utils.hdr_to_preview(norm, as_bytes=True)
-                # Convert PIL Image to QPixmap
-                pixmap.loadFromData(byte_image)
-            except Exception as e:
-                print(f"Error loading HDR preview for {norm}: {e}")
-                pixmap = QPixmap()
+    def set_fast_scaling(self, fast: bool) -> None:
+        """Scale the pixmap coarsely on resize, e.g. during a zoom gesture.
 
-        return pixmap
+        Turning it off re-renders the pixmap smoothly at the current size.
+        """
+        if fast == self._fast_scaling:
+            return
+        self._fast_scaling = fast
+        if not fast:
+            self._update_pixmap_display()
 
     # Events Handlers
 
@@ -214,6 +341,9 @@ class Thumbnail(QWidget):
         self._hover_timer.start(1000)
 
     def _actually_show_large_preview(self):
+        if self._large_preview is None:
+            self._large_preview = LargePreviewPopup(self)
+        # Show the grid thumbnail straight away, then refine it
         self._large_preview.set_pixmap(self.thumbnail)
 
         popup = self._large_preview
@@ -246,12 +376,15 @@ class Thumbnail(QWidget):
 
         popup.move(x, y)
         popup.show()
+        popup.refine(
+            os.path.normpath(self.asset['directory_path']), utils.exposure_args(self.asset))
 
     def _hide_large_preview_delayed(self):
         # Stop pending timer if hover leaves before 1 s
         if hasattr(self, "_hover_timer"):
             self._hover_timer.stop()
-        self._large_preview.schedule_hide()
+        if self._large_preview is not None:
+            self._large_preview.schedule_hide()
 
     def mousePressEvent(self, e):
         """QT LMB pressed event handler."""
@@ -358,7 +491,7 @@ class Thumbnail(QWidget):
 
     def _update_pixmap_display(self):
         if self.thumbnail.isNull():
-            self.label_icon.setText("No Preview")
+            self.label_icon.setText("" if self.thumbnail_pending else "No Preview")
             self.label_icon.setStyleSheet(
                 "color:#666; font-size:9pt; background:transparent;"
             )
@@ -371,6 +504,7 @@ class Thumbnail(QWidget):
             size.width() - 6,
             size.height() - 6,
             Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
+            Qt.TransformationMode.FastTransformation if self._fast_scaling
+            else Qt.TransformationMode.SmoothTransformation,
         )
         self.label_icon.setPixmap(scaled)
@@ -1,15 +1,16 @@
-import subprocess
 import os
 import sys
-import requests
-import time
 import threading
-import uvicorn
-from PySide6.QtWidgets import QApplication
 
-from uab.frontend.main_widget import MainWidget
-from uab.frontend.main_window import MainWindow
-from uab.backend.server import app
+# Heavy modules (uvicorn, FastAPI, SQLAlchemy, PySide6 and the GUI) are
+# imported inside the functions that need them, so importing this module from
+# a Houdini pane is cheap and the server can boot while the GUI is built.
+
+HOST = "127.0.0.1"
+PORT = 8000
+# "inprocess" boots a private server in this process, "daemon" reuses (or
+# spawns) the shared backend daemon, see `uab.backend.daemon`.
+SERVER_MODE = os.environ.get("UAB_SERVER_MODE", "inprocess")
 
 # Global server reference
 _server_instance = None
@@ -25,12 +26,12 @@ def run():
         # In Houdini, keep the server running and return the widget
         global _server_instance
         _server_instance = server
-        result = _start_gui()
+        result = _start_gui(server)
         return result
     else:
         # In desktop mode, clean up server when GUI closes
         try:
-            result = _start_gui()
+            result = _start_gui(server)
             return result
         finally:
             print("Shutting down server...")
@@ -38,36 +39,124 @@ def run():
             print("Server shut down.")
 
 
-def _start_server():
-    """Start the uvicorn FastAPI server in a background thread."""
-    global _server_thread
+class BackgroundServer:
+    """A uvicorn server booted on a background thread.
 
-    print(app.title)
-    config = uvicorn.Config(app, host="127.0.0.1", port=8000, reload=False)
-    server = uvicorn.Server(config)
+    The backend is imported and started on that thread, so the caller returns
+    immediately. `ready` is set once startup has finished; `failed` tells
+    whether it ended without the server accepting connections.
+    """
 
-    def _run_server():
-        print("Starting server thread...")
-        server.run()
-        print("Server stopped.")
+    def __init__(self, host: str = HOST, port: int = PORT):
+        self.host = host
+        self.port = port
+        self.url = f"http://{host}:{port}"
+        self.ready = threading.Event()
+        self.failed = False
+        self._server = None
+        self._stopping = False
 
-    is_houdini = _get_current_dcc() == "hou"
-    thread = threading.Thread(target=_run_server, daemon=(not is_houdini))
-    thread.start()
-    _server_thread = thread
+    def run(self):
+        try:
+            import uvicorn
+            from uab.backend.server import app
+
+            ready = self.ready
+
+            class _Server(uvicorn.Server):
+                async def startup(self, sockets=None):
+                    await super().startup(sockets=sockets)
+                    # Signal readiness directly instead of polling over HTTP
+                    if self.started:
+                        ready.set()
+
+            print(app.title)
+            config = uvicorn.Config(app, host=self.host, port=self.port, reload=False)
+            self._server = _Server(config)
+            if self._stopping:
+                return
+            print("Starting server thread...")
+            self._server.run()
+            print("Server stopped.")
+        except BaseException as e:
+            print(f"Server failed: {e!r}")
+        finally:
+            if not self.ready.is_set():
+                self.failed = True
+                self.ready.set()
+
+    def stop(self):
+        self._stopping = True
+        if self._server is not None:
+            self._server.should_exit = True
+
+
+class DaemonServer:
+    """Handle on the shared backend daemon, with the `BackgroundServer` interface.
+
+    `run` finds a running daemon or spawns one, then sends heartbeats until
+    `stop` is called. A daemon that stops answering them, e.g. after a
+    crash, is spawned again. Stopping only disconnects this client; the
+    daemon shuts itself down once no client has been seen for its idle
+    timeout.
+    """
+
+    def __init__(self):
+        from uab.backend import daemon
+
+        self.url = daemon.daemon_url()
+        self.ready = threading.Event()
+        self.failed = False
+        self._stopped = threading.Event()
+
+    def run(self):
+        from uab.backend import daemon
+
+        try:
+            self.url = daemon.ensure_daemon()
+            print(f"Using backend daemon at {self.url}")
+        except Exception as e:
+            print(f"Backend daemon failed: {e!r}")
+            self.failed = True
+            return
+        finally:
+            self.ready.set()
+        while not self._stopped.wait(daemon.HEARTBEAT_INTERVAL):
+            if daemon.heartbeat(self.url):
+                continue
+            try:
+                self.url = daemon.ensure_daemon()
+            except Exception as e:
+                # Tried again on the next heartbeat
+                print(f"Backend daemon failed: {e!r}")
+
+    def stop(self):
+        self._stopped.set()
 
-    SERVER_URL = "http://127.0.0.1:8000"
-    if not _wait_for_server(SERVER_URL, timeout=10):
-        raise RuntimeError("Server failed to start in time.")
 
-    print("Server started and reachable.")
+def _start_server():
+    """Boot the uvicorn FastAPI server in a background thread, without waiting."""
+    global _server_thread
+
+    if SERVER_MODE == "daemon":
+        server = DaemonServer()
+    elif SERVER_MODE == "inprocess":
+        server = BackgroundServer()
+    else:
+        raise ValueError(f"Invalid UAB_SERVER_MODE: {SERVER_MODE}")
+    # The in-process server outlives the pane in Houdini; heartbeats never
+    # need to keep the interpreter alive
+    keep_alive = SERVER_MODE == "inprocess" and _get_current_dcc() == "hou"
+    thread = threading.Thread(target=server.run, daemon=not keep_alive)
+    thread.start()
+    _server_thread = thread
     return server
 
 
 def _stop_server(server):
     """Gracefully stop the server."""
     try:
-        server.should_exit = True
+        server.stop()
     except Exception:
         pass  # Uvicorn server may already be down
 
@@ -82,15 +171,20 @@ def shutdown_server():
         print("Server shut down.")
 
 
-def _start_gui():
+def _start_gui(server=None):
     """Launch the GUI appropriately depending on environment."""
     print("Starting GUI...")
+    from uab.frontend.main_widget import MainWidget
+
     match _get_current_dcc():
         case "hou":
-            return MainWidget("hou")
+            return MainWidget("hou", server=server)
         case "desktop":
+            from PySide6.QtWidgets import QApplication
+            from uab.frontend.main_window import MainWindow
+
             app = QApplication(sys.argv)
-            win = MainWindow(MainWidget("desktop"))
+            win = MainWindow(MainWidget("desktop", server=server))
             win.show()
             exit_code = app.exec()
             return exit_code
@@ -105,16 +199,3 @@ def _get_current_dcc():
         return "hou"
     except ImportError:
         return "desktop"
-
-
-def _wait_for_server(url, timeout=5, tick=0.25):
-    """Wait for the server to respond, ensuring that it's running."""
-    start = time.time()
-    while time.time() - start < timeout:
-        try:
-            r = requests.get(url)
-            if r.status_code < 500:
-                return True
-        except Exception:
-            time.sleep(tick)
-    return False
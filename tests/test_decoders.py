@@ -0,0 +1,63 @@
+import struct
+import threading
+
+import numpy as np
+
+from uab.core import decoders
+
+
+def _exr(path, *attributes):
+    """A bare EXR header with the given (name, type, payload or size) attributes."""
+    data = struct.pack("<ii", decoders._EXR_MAGIC, 2)
+    for name, attr_type, payload in attributes:
+        data += name + b"\0" + attr_type + b"\0"
+        if isinstance(payload, int):
+            data += struct.pack("<i", payload)
+        else:
+            data += struct.pack("<i", len(payload)) + payload
+    path.write_bytes(data + b"\0")
+    return path
+
+
+def _read(path):
+    # Run aside, so a header that loops fails the test instead of hanging it
+    result = []
+    thread = threading.Thread(target=lambda: result.append(decoders._read_exr_preview(path)), daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive(), "reading the header did not terminate"
+    return result[0]
+
+
+def test_exr_preview(tmp_path):
+    rgba = np.arange(2 * 3 * 4, dtype=np.uint8).reshape(2, 3, 4)
+    path = _exr(tmp_path / "a.exr",
+                (b"compression", b"compression", b"\0"),
+                (b"preview", b"preview", struct.pack("<II", 3, 2) + rgba.tobytes()))
+    np.testing.assert_array_equal(_read(path), rgba[..., 2::-1])
+
+
+def test_exr_without_preview(tmp_path):
+    assert _read(_exr(tmp_path / "a.exr", (b"compression", b"compression", b"\0"))) is None
+
+
+def test_exr_negative_attribute_size(tmp_path):
+    # Seeking by the size would land back on the attribute's own name
+    size = -len(b"comments\0string\0") - 4
+    assert _read(_exr(tmp_path / "a.exr", (b"comments", b"string", size))) is None
+
+
+def test_exr_truncated_preview(tmp_path):
+    path = _exr(tmp_path / "a.exr", (b"preview", b"preview", struct.pack("<II", 64, 64) + b"\0" * 10))
+    assert _read(path) is None
+
+
+def test_exr_overlong_attribute_name(tmp_path):
+    assert _read(_exr(tmp_path / "a.exr", (b"x" * 300, b"int", b"\0" * 4))) is None
+
+
+def test_not_exr(tmp_path):
+    path = tmp_path / "a.exr"
+    path.write_bytes(b"\x76\x2f\x31\x00 not really")
+    assert _read(path) is None
+    assert _read(tmp_path / "missing.exr") is None
@@ -0,0 +1,58 @@
+from uab.core import grouping
+
+
+def _group(*names):
+    sets, singles = grouping.group_files([f"/lib/{name}" for name in names])
+    return ({(file_set["name"], file_set["kind"], len(file_set["members"])) for file_set in sets},
+            [path.rsplit("/", 1)[1] for path in singles])
+
+
+def test_texture_set():
+    assert _group("wood_albedo.png", "wood_Normal.png", "wood_rough.png") == (
+        {("wood", "texture_set", 3)}, [])
+
+
+def test_udim_tiles():
+    assert _group("wood_albedo.1001.exr", "wood_albedo.1002.exr") == ({("wood", "udim", 2)}, [])
+    assert _group("wood.1001.exr", "wood.1002.exr") == ({("wood", "udim", 2)}, [])
+    assert _group("wood_albedo_1001.exr", "wood_albedo_1011.exr") == ({("wood", "udim", 2)}, [])
+
+
+def test_sequence():
+    assert _group("shot.0001.exr", "shot.0002.exr", "shot.0003.exr") == (
+        {("shot", "sequence", 3)}, [])
+
+
+def test_representative_prefers_colour_at_first_tile():
+    sets, _ = grouping.group_files(
+        ["/lib/wood_normal.1001.exr", "/lib/wood_albedo.1002.exr", "/lib/wood_albedo.1001.exr"])
+    assert sets[0]["representative"] == "/lib/wood_albedo.1001.exr"
+
+
+def test_camera_counters_stay_single():
+    names = ["IMG_1234.JPG", "IMG_1235.JPG", "IMG_1999.JPG"]
+    assert _group(*names) == (set(), names)
+    assert grouping.set_key("/lib/IMG_1234.JPG") is None
+
+
+def test_bare_underscore_udim_stays_single():
+    assert _group("wood_1001.exr", "wood_1002.exr") == (set(), ["wood_1001.exr", "wood_1002.exr"])
+
+
+def test_version_numbers_stay_single():
+    assert _group("env_v2.1.hdr", "env_v2.2.hdr") == (set(), ["env_v2.1.hdr", "env_v2.2.hdr"])
+    assert _group("sunset_01.hdr", "sunset_02.hdr") == (set(), ["sunset_01.hdr", "sunset_02.hdr"])
+
+
+def test_frames_need_same_padding():
+    names = ["shot.001.exr", "shot.0002.exr", "shot.003.exr"]
+    assert _group(*names) == (set(), names)
+
+
+def test_frames_need_min_count():
+    assert _group("shot.001.exr", "shot.002.exr") == (set(), ["shot.001.exr", "shot.002.exr"])
+
+
+def test_stray_numbered_file_leaves_texture_set():
+    assert _group("wood_albedo.png", "wood.001.png", "wood_normal.png") == (
+        {("wood", "texture_set", 2)}, ["wood.001.png"])
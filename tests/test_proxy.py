@@ -0,0 +1,134 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from uab.core import proxy
+
+
+@pytest.fixture(autouse=True)
+def uab_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("UAB_HOME", str(tmp_path / "home"))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "sky.hdr"
+    image = np.random.default_rng(0).uniform(0, 50, (37, 53, 3)).astype(np.float32)
+    assert cv2.imwrite(str(path), image)
+    return path
+
+
+@pytest.mark.parametrize("shape", [(16, 16, 3), (13, 7, 3), (37, 53, 3), (1, 9, 3)])
+def test_downsample_is_mean_of_covered_pixels(shape):
+    hdr = np.random.default_rng(1).uniform(0, 1000, shape).astype(np.float32)
+    levels = proxy.downsample(hdr, [8, 2, 4])
+    assert sorted(levels) == [2, 4, 8]
+    for factor, image in levels.items():
+        rows, cols = -(-shape[0] // factor), -(-shape[1] // factor)
+        assert image.shape == (rows, cols, shape[2])
+        for y in range(rows):
+            for x in range(cols):
+                block = hdr[y * factor:(y + 1) * factor, x * factor:(x + 1) * factor]
+                np.testing.assert_allclose(image[y, x], block.mean(axis=(0, 1)), rtol=1e-5)
+
+
+def test_downsample_rejects_other_factors():
+    with pytest.raises(ValueError):
+        proxy.downsample(np.zeros((4, 4, 3), np.float32), [3])
+
+
+def test_generate_writes_only_missing_levels(source, monkeypatch):
+    half = proxy.cached_proxy_path(source, "half")
+    half.parent.mkdir(parents=True, exist_ok=True)
+    half.write_bytes(b"existing")
+    factors = []
+    downsample = proxy.downsample
+    monkeypatch.setattr(proxy, "downsample", lambda hdr, f: factors.append(f) or downsample(hdr, f))
+
+    paths = proxy.generate_proxies(source, ["half", "quarter"])
+
+    assert factors == [[4]]
+    assert half.read_bytes() == b"existing"
+    assert cv2.imread(str(paths["quarter"]), cv2.IMREAD_UNCHANGED).shape == (10, 14, 3)
+    assert proxy.generate_proxies(source, ["half", "quarter"]) == paths
+    assert factors == [[4]]
+
+
+def test_generate_renames_complete_files_into_place(source, monkeypatch):
+    renames = []
+    replace = os.replace
+
+    def _replace(src, dst):
+        # The proxy only appears once it has been written in full
+        assert not os.path.exists(dst)
+        assert cv2.imread(str(src), cv2.IMREAD_UNCHANGED) is not None
+        renames.append((src, dst))
+        replace(src, dst)
+
+    monkeypatch.setattr(proxy.os, "replace", _replace)
+    paths = proxy.generate_proxies(source)
+
+    assert sorted(dst for _, dst in renames) == sorted(paths.values())
+    assert all(src.parent == dst.parent and src.name.startswith(".") for src, dst in renames)
+    assert sorted(path.name for path in paths["half"].parent.iterdir()) == sorted(
+        path.name for path in paths.values())
+
+
+def test_failed_write_leaves_no_proxy(source, monkeypatch):
+    monkeypatch.setattr(cv2, "imwrite", lambda *args: False)
+    with pytest.raises(OSError):
+        proxy.generate_proxies(source, ["half"])
+    assert proxy.cached_proxy(source, "half") is None
+
+
+def test_cache_key_follows_mtime_and_size(source):
+    key = proxy.cached_proxy_path(source, "half")
+    assert proxy.cached_proxy_path(source, "half") == key
+
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    touched = proxy.cached_proxy_path(source, "half")
+    assert touched != key
+
+    mtime = source.stat().st_mtime_ns
+    with open(source, "ab") as f:
+        f.write(b"\0")
+    os.utime(source, ns=(mtime, mtime))
+    assert proxy.cached_proxy_path(source, "half") not in (key, touched)
+
+
+def test_cached_proxy_full_is_source(source):
+    assert proxy.cached_proxy(source, "full") == source
+    assert proxy.cached_proxy(source, "half") is None
+    with pytest.raises(ValueError):
+        proxy.cached_proxy(source, "tenth")
+
+
+def test_repeated_requests_share_one_future(source, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def _generate(path):
+        calls.append(path)
+        release.wait(5)
+        return {"half": path}
+
+    monkeypatch.setattr(proxy, "generate_proxies", _generate)
+    generator = proxy.ProxyGenerator(workers=2)
+    try:
+        first = generator.request(source)
+        assert generator.request(str(source)) is first
+        release.set()
+        assert first.result(5) == {"half": source}
+        assert calls == [source]
+
+        # Finished jobs are forgotten, so a later request runs again
+        again = generator.request(source)
+        assert again is not first
+        again.result(5)
+        assert len(calls) == 2
+    finally:
+        generator.shutdown()
@@ -0,0 +1,68 @@
+import pytest
+
+from uab.backend import snapshot
+
+
+def _asset(i):
+    asset = {"id": i + 1, "library": "default", "name": f"sky_{i:03d} ☀", "description": None,
+             "directory_path": f"/lib/sky_{i:03d}.exr", "preview_image_file_path": None}
+    asset.update(dict.fromkeys(snapshot.FLOAT_FIELDS))
+    asset["luminance_p50"] = i / 4
+    return asset
+
+
+@pytest.fixture
+def assets():
+    return [_asset(i) for i in range(25)]
+
+
+@pytest.fixture
+def path(tmp_path, assets):
+    path = tmp_path / "catalog.snap"
+    snapshot.write_snapshot(path, assets)
+    return path
+
+
+def test_round_trip(path, assets):
+    snap = snapshot.read_snapshot(path)
+    assert isinstance(snap, snapshot.Snapshot)
+    assert len(snap) == len(assets)
+    assert list(snap) == assets
+    assert snap == assets and assets == snap
+
+
+def test_indexing(path, assets):
+    snap = snapshot.read_snapshot(path)
+    assert snap[0] == assets[0]
+    assert snap[-1] == assets[-1]
+    assert snap[3:9:2] == assets[3:9:2]
+    with pytest.raises(IndexError):
+        snap[len(assets)]
+
+
+def test_not_equal_to_changed_catalog(path, assets):
+    snap = snapshot.read_snapshot(path)
+    assert snap != assets[:-1]
+    assert snap != assets[:-1] + [dict(assets[-1], name="renamed")]
+    assert snap != "not a catalog"
+
+
+def test_empty_catalog(tmp_path):
+    path = tmp_path / "catalog.snap"
+    snapshot.write_snapshot(path, [])
+    snap = snapshot.read_snapshot(path)
+    assert len(snap) == 0 and snap == []
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:-7],
+    lambda data: b"NOTSNAP\0" + data[8:],
+    lambda data: b"",
+])
+def test_unusable_file_reads_as_empty(path, corrupt):
+    path.write_bytes(corrupt(path.read_bytes()))
+    assert snapshot.read_snapshot(path) == []
+
+
+def test_missing_file_reads_as_empty(tmp_path):
+    assert snapshot.read_snapshot(tmp_path / "missing.snap") == []